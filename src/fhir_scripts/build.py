@@ -1,7 +1,7 @@
 from argparse import ArgumentParser, _SubParsersAction
 from pathlib import Path
 
-from . import log
+from . import log, pipeline, step_cache, trace
 from .exception import NoConfigException, NotInstalledException
 from .models.config import Config
 from .tools import epatools, igpub, igtools, sushi
@@ -40,6 +40,7 @@ def setup_subparser(
     ig_parser.add_argument(
         "--only-oapi", action="store_true", help="Only build OpenAPI"
     )
+    _add_igpub_arguments(ig_parser)
 
     all_parser = subparser.add_parser(ALL, help="Build everything")
     all_parser.add_argument(
@@ -49,8 +50,34 @@ def setup_subparser(
         "--cap", action="store_true", help="Also merge CapabilityStatements"
     )
     all_parser.add_argument("--oapi", action="store_true", help="Also build OpenAPI")
+    _add_igpub_arguments(all_parser)
+
+    pipeline_parser = subparser.add_parser(PIPELINE, help="Build IG")
+    pipeline_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        help="Maximum number of steps processed at the same time (default from config)",
+    )
+    pipeline_parser.add_argument(
+        "--force", action="store_true", help="Process all steps even if up to date"
+    )
+    pipeline_parser.add_argument(
+        "--explain", action="store_true", help="Explain why steps are processed"
+    )
+    _add_igpub_arguments(pipeline_parser)
 
-    subparser.add_parser(PIPELINE, help="Build IG")
+
+def _add_igpub_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "--profile",
+        help="Build profile of the IG Publisher, e.g. 'dev', 'ci' or 'release' (default from config)",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Show the progress of the IG Publisher instead of its output, which is written to a file",
+    )
 
 
 def build_defs(
@@ -84,7 +111,7 @@ def build_defs(
         build_req(*args, **kwargs)
 
     if enable_sushi:
-        build_sushi(*args, **kwargs)
+        build_sushi(config, *args, **kwargs)
 
     if enable_cap_statements:
         build_cap(*args, **kwargs)
@@ -92,8 +119,8 @@ def build_defs(
     log.succ("Definitions built successfully")
 
 
-def build_sushi(*args, **kwargs):
-    sushi.run()
+def build_sushi(config: Config | None = None, *args, **kwargs):
+    sushi.run(config.build.fail_fast.sushi if config else None)
 
 
 def build_req(*args, **kwargs):
@@ -146,7 +173,7 @@ def build_ig(
     )
 
     if enable_igpub:
-        build_igpub(*args, **kwargs)
+        build_igpub(config, *args, **kwargs)
 
     if enable_openapi:
         build_openapi(config)
@@ -155,8 +182,22 @@ def build_ig(
     build_igpub_qa(*args, **kwargs)
 
 
-def build_igpub(*args, **kwargs):
-    igpub.run()
+def build_igpub(
+    config: Config | None = None,
+    profile: str | None = None,
+    progress: bool = False,
+    *args,
+    **kwargs,
+):
+    if config is None:
+        igpub.run(progress=progress)
+        return
+
+    build_profile = config.build.get_profile(profile)
+    log.info(f"Using build profile '{profile or config.build.profile}'")
+    igpub.run(
+        config.build.jvm, build_profile, config.build.fail_fast.igpub, progress=progress
+    )
 
 
 def build_igpub_qa(*args, **kwargs):
@@ -183,10 +224,6 @@ def build_shell(c_args: str, *args, **kwargs):
     log.succ("Processed shell command successfully")
 
 
-def _step_name(any) -> str:
-    return any if isinstance(any, str) else list(any.model_dump().keys())[0]
-
-
 PIPELINE_STEPS = {
     "requirements": build_req,
     "sushi": build_sushi,
@@ -197,28 +234,135 @@ PIPELINE_STEPS = {
     "shell": build_shell,
 }
 
+# Files read and written by steps, so they can be skipped if nothing changed
+CACHED_STEPS = {
+    # SUSHI also loads predefined resources from `input`, but not the data generated from the requirements
+    "sushi": step_cache.Spec(
+        inputs=["input", "sushi-config.yaml"],
+        outputs=["fsh-generated"],
+        version=sushi.version,
+        exclude=["input/data"],
+    ),
+    # The IG Publisher reads files all over the project, e.g. `publication-request.json` or `package-list.json`
+    "igpub": step_cache.Spec(
+        inputs=["*"],
+        outputs=["output"],
+        version=igpub.version,
+        exclude=[".*", "temp", "template", "input-cache"],
+    ),
+}
 
-def build_pipeline(config: Config, *args, **kwargs):
-    pipeline = config.build.pipeline
 
-    invalid_steps = [
-        step_name
-        for step in pipeline
-        if not isinstance(step, str)
-        if (step_name := _step_name(step)) and step_name not in PIPELINE_STEPS
-    ]
+def build_pipeline(
+    config: Config,
+    workers: int | None = None,
+    force: bool = False,
+    explain: bool = False,
+    *args,
+    **kwargs,
+):
+    steps = pipeline.create_steps(config.build.pipeline)
+
+    invalid_steps = [step.name for step in steps if step.name not in PIPELINE_STEPS]
 
     if invalid_steps:
         raise Exception(
             f"Pipeline configuration contains invalid step(s): {", ".join(invalid_steps)}"
         )
 
-    for step in pipeline:
-        step_name = _step_name(step)
-        c_args = getattr(step, step_name) if not isinstance(step, str) else None
+    pipeline.validate(steps)
+    config.build.get_profile(kwargs.get("profile"))
+
+    for i, stage in enumerate(pipeline.stages(steps), start=1):
+        log.debug(f"Stage {i}: {", ".join(step.id for step in stage)}")
+
+    def process(step: pipeline.Step):
+        with trace.span(step.id, "step", step=step.name, args=step.args) as span:
+            _process_step(step, span)
+
+    def _process_step(step: pipeline.Step, span: trace.Span):
+        cache = _step_cache(step, config, kwargs.get("profile"))
+
+        if cache is None:
+            reason = "not cached"
+
+        elif force:
+            reason = "forced"
+
+        elif (reason := cache.outdated()) is None:
+            restored = cache.restore()
+            log.succ(
+                "Step '{}' is up to date{}".format(
+                    step.id, ", restored outputs" if restored else ""
+                )
+            )
+            span.set(skipped=True, restored=restored)
+            return
+
+        span.set(skipped=False, reason=reason)
+
+        log.info(f"Processing step '{step.id}'" + (f" ({reason})" if explain else ""))
+        PIPELINE_STEPS[step.name](config=config, c_args=step.args, *args, **kwargs)
+
+        if cache is not None:
+            cache.save()
 
-        log.info(f"Processing step '{step_name}'")
-        PIPELINE_STEPS[step_name](config=config, c_args=c_args, *args, **kwargs)
+    durations = pipeline.run(steps, process, workers or config.build.workers)
+
+    # Show which steps determine the duration of the build
+    if len(steps) > 1:
+        path = pipeline.critical_path(steps, durations)
+        log.info(
+            "Critical path: {} ({:.1f} s)".format(
+                " -> ".join(
+                    "{} ({:.1f} s)".format(step.id, durations[step.id]) for step in path
+                ),
+                sum(durations[step.id] for step in path),
+            )
+        )
+
+
+def _step_cache(
+    step: pipeline.Step, config: Config, profile: str | None = None
+) -> step_cache.StepCache | None:
+    """
+    Get the cache of a step, returns None if the step cannot be cached
+    """
+    if not step.cache:
+        return None
+
+    default = CACHED_STEPS.get(step.name)
+    if step.inputs is None and default is None:
+        return None
+
+    spec = step_cache.Spec(
+        inputs=step.inputs if step.inputs is not None else default.inputs,
+        outputs=(
+            step.outputs
+            if step.outputs is not None
+            else default.outputs if default else []
+        ),
+        version=default.version if default else None,
+        exclude=default.exclude if step.inputs is None else [],
+    )
+
+    return step_cache.StepCache(
+        step.id,
+        spec,
+        {
+            "name": step.name,
+            "args": step.args,
+            # Only the IG Publisher depends on the build profile
+            "profile": (
+                config.build.get_profile(profile).model_dump()
+                if step.name == "igpub"
+                else None
+            ),
+            "builtin": config.build.builtin.model_dump(),
+            "build_args": config.build.args.model_dump(),
+        },
+        store_outputs=step.store_outputs,
+    )
 
 
 __doc__ = "Build FHIR definitions and IGs"
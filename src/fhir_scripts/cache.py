@@ -1,23 +1,30 @@
 import json
 import shutil
+import sqlite3
 from argparse import _SubParsersAction
 from pathlib import Path
 
-from . import log
+from . import log, package_installer
+from .models.config import Config
+from .package_index import PackageIndex, format_time
 from .tools import fhir_pkg_tool, firely_terminal
 from .tools.basic import npm
 
 # Commands
 PKG = "package"
 BUILD = "build"
+INDEX = "index"
 
 # Arguments
 PKG_DIR = "--package-dir"
 NO_CLEAR = "--no-clear"
 NEW = "--new"
 LEGACY = "--legacy"
+NATIVE = "--native"
+PACKAGE = "--package"
+DEPENDANTS = "--dependants"
 
-FHIR_REGISTRY = "https://packages.simplifier.net"
+FHIR_REGISTRY = package_installer.FHIR_REGISTRY
 
 
 def setup_subparser(subparser: _SubParsersAction, *args, **kwarsg):
@@ -42,19 +49,53 @@ def setup_subparser(subparser: _SubParsersAction, *args, **kwarsg):
     group.add_argument(
         LEGACY, action="store_true", help="Old implementation using Firely Terminal"
     )
+    group.add_argument(
+        NATIVE,
+        action="store_true",
+        help="Install the packages directly, without any other tool",
+    )
 
     subparser.add_parser(BUILD, help="Clear all build related cache directories")
 
+    index_parser = subparser.add_parser(
+        INDEX, help="Update and show the index of the FHIR package cache"
+    )
+    group = index_parser.add_mutually_exclusive_group()
+    group.add_argument(PACKAGE, help="Only show the versions of this package")
+    group.add_argument(
+        DEPENDANTS, help="Show the packages depending on this package instead"
+    )
+
 
 def cache_rebuild_fhir_cache(
+    config: Config | None = None,
     package_dir: Path | None = None,
     no_clear: bool = False,
     new: bool = False,
     legacy: bool = False,
+    native: bool = False,
     *args,
     **kwargs,
 ):
 
+    if native:
+        dependencies = _package_json_dependencies()
+
+        if not no_clear:
+            _clear_fhir_cache()
+
+        if package_dir is not None:
+            log.info(
+                f"Using package directory '{package_dir}' to restore package cache"
+            )
+
+        log.info("Restore cache")
+        count = package_installer.install_all(dependencies, package_dir=package_dir)
+        log.succ(f"Restore successful: {count} package(s) installed")
+
+        _refresh_index()
+        return
+
     # Set default to "legacy" at the moment
     if not new and not legacy:
         legacy = True
@@ -79,29 +120,13 @@ def cache_rebuild_fhir_cache(
         # dependencies = sushi_config_def.get("dependencies", {})
 
         # Get dependencies from package.json
-        package_json = Path("./package.json")
-
-        if not package_json.exists():
-            raise Exception("Not in project root; no `package.json` found")
-
-        packge_json_def = json.loads(package_json.read_text(encoding="utf-8"))
-        dependencies = packge_json_def.get("dependencies", {})
+        dependencies = _package_json_dependencies()
 
         pkg_json = Path("./package.json")
         pkg_json_bak = Path("./package.bak.json")
 
         if not no_clear:
-            # Remove all previous packages
-            fhir_cache = Path.home() / ".fhir/packages"
-
-            if fhir_cache.exists():
-                log.info("Remove all previous packages")
-                for item in fhir_cache.iterdir():
-                    if item.is_file():
-                        item.unlink()
-                    elif item.is_dir():
-                        shutil.rmtree(item)
-                log.succ("Removed all packages")
+            _clear_fhir_cache()
 
         if package_dir is not None:
 
@@ -173,24 +198,18 @@ def cache_rebuild_fhir_cache(
         firely_terminal.restore()
         log.succ("Restore successful")
 
+        _refresh_index()
+
     else:
         if not no_clear:
-            # Remove all previous packages
-            fhir_cache = Path.home() / ".fhir/packages"
-
-            if fhir_cache.exists():
-                log.info("Remove all previous packages")
-                for item in fhir_cache.iterdir():
-                    if item.is_file():
-                        item.unlink()
-                    elif item.is_dir():
-                        shutil.rmtree(item)
-                log.succ("Removed all packages")
+            _clear_fhir_cache()
 
         log.info("Restore cache")
-        fhir_pkg_tool.install_deps()
+        fhir_pkg_tool.install_deps(config.build.jvm if config else None)
         log.succ("Restore successful")
 
+        _refresh_index()
+
 
 def clear_build_caches(*args, **kwargs):
     log.info("Clear build caches")
@@ -201,6 +220,74 @@ def clear_build_caches(*args, **kwargs):
     log.succ("Cleared build caches successfully")
 
 
+def show_package_index(
+    package: str | None = None, dependants: str | None = None, *args, **kwargs
+):
+    with PackageIndex() as index:
+        read, removed = index.refresh(content=True)
+        log.succ(
+            f"Package index updated: {read} package(s) read, {removed} package(s) removed"
+        )
+
+        if dependants is not None:
+            rows = [[name, version] for name, version in index.dependants(dependants)]
+            log.table(["Package", "Version"], rows)
+            return
+
+        rows = [
+            [
+                p.name,
+                p.version,
+                ", ".join(p.fhir_versions),
+                f"{p.size / (1024 * 1024):.1f} MB" if p.size is not None else "-",
+                format_time(p.installed),
+                len(p.dependencies),
+            ]
+            for p in index.packages(package)
+        ]
+        log.table(
+            ["Package", "Version", "FHIR", "Size", "Installed", "Dependencies"], rows
+        )
+
+
+def _package_json_dependencies() -> dict[str, str]:
+    package_json = Path("./package.json")
+
+    if not package_json.exists():
+        raise Exception("Not in project root; no `package.json` found")
+
+    packge_json_def = json.loads(package_json.read_text(encoding="utf-8"))
+    return packge_json_def.get("dependencies", {})
+
+
+def _clear_fhir_cache():
+    # Remove all previous packages
+    fhir_cache = Path.home() / ".fhir/packages"
+
+    if fhir_cache.exists():
+        log.info("Remove all previous packages")
+        for item in fhir_cache.iterdir():
+            if item.is_file():
+                item.unlink()
+            elif item.is_dir():
+                shutil.rmtree(item)
+        log.succ("Removed all packages")
+
+
+def _refresh_index():
+    # Size and hash of the restored packages are determined when showing the index
+    try:
+        with PackageIndex() as index:
+            index.refresh()
+
+    except (sqlite3.Error, OSError) as e:
+        log.warn(f"Could not update the package index: {e}")
+
+
 __doc__ = "Handle caches"
-__handlers__ = {PKG: cache_rebuild_fhir_cache, BUILD: clear_build_caches}
+__handlers__ = {
+    PKG: cache_rebuild_fhir_cache,
+    BUILD: clear_build_caches,
+    INDEX: show_package_index,
+}
 __setup_subparser__ = setup_subparser
@@ -1,4 +1,5 @@
 import json
+import os
 import re
 from argparse import ArgumentParser
 from collections import deque
@@ -14,6 +15,19 @@ PACKAGE_JSON_NAME = "package.json"
 
 VERSION_REGEX = re.compile(r"(?:\/|\s|^)(\d+(?:\.\d+){2}(?:-[a-z\.\d]+)?)(?:\s|$)")
 
+# Keys read from the definitions, the rest of a definition is not parsed
+DEF_KEYS = {"version", "date"}
+
+# Starting processes only pays off for many definitions
+DEF_PROCESSES_THRESHOLD = 500
+DEF_CHUNK_SIZE = 64
+
+# Size of the first part of a file read when looking for keys, doubled for each further part
+READ_SIZE = 16 * 1024
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
 
 def setup_parser(parser: ArgumentParser, *args, **kwarsg):
     parser.add_argument(
@@ -22,9 +36,16 @@ def setup_parser(parser: ArgumentParser, *args, **kwarsg):
     parser.add_argument(
         "--release", action="store_true", help="Perform extra checks for release"
     )
+    parser.add_argument(
+        "--deps-graph",
+        type=Path,
+        help="Write the dependency graph and the paths introducing conflicting versions to a file (.json or .dot)",
+    )
 
 
-def check(workdir: Path, release: bool, *args, **kwargs):
+def check(
+    workdir: Path, release: bool, deps_graph: Path | None = None, *args, **kwargs
+):
     errors = 0
     warnings = 0
 
@@ -61,6 +82,7 @@ def check(workdir: Path, release: bool, *args, **kwargs):
         "sushi_config": sushi_config,
         "package_json": package_json,
         "defs_dir": workdir / "fsh-generated" / "resources",
+        "graph_file": deps_graph,
     }
 
     # Check versions equal
@@ -193,61 +215,292 @@ def _check_deps(pub_request: dict, sushi_config: dict, package_json: dict, **kwa
     return errors, warnings
 
 
-def _check_transitive_deps(sushi_config: dict, pkg_dir: Path | None = None, **kwargs):
-    fhir_pkg_dir = pkg_dir or (Path.home() / ".fhir" / "packages")
+def _check_transitive_deps(
+    sushi_config: dict,
+    pkg_dir: Path | None = None,
+    graph_file: Path | None = None,
+    **kwargs,
+):
+    import sqlite3
+
+    from .package_index import PackageIndex, default_pkg_dir
+
+    fhir_pkg_dir = pkg_dir or default_pkg_dir()
     sushi_config_deps = sushi_config.get("dependencies", {})
 
     err = 0
     warn = 0
 
-    dep_versions: dict[str, list[str]] = {}
+    # Use the index of the FHIR package cache instead of reading the packages, without creating a missing cache
+    index = None
+    if pkg_dir is None and fhir_pkg_dir.is_dir():
+        try:
+            index = PackageIndex(fhir_pkg_dir)
+            index.refresh()
 
-    to_process = deque(sushi_config_deps.items())
-    while len(to_process) > 0:
-        pkg, version = to_process.popleft()
+        except (sqlite3.Error, OSError) as e:
+            log.debug(f"Package index not available, reading packages: {e}")
+            index = None
 
-        if pkg not in dep_versions:
-            dep_versions[pkg] = []
+    try:
+        graph = DependencyGraph(fhir_pkg_dir, index)
+        graph.build(sushi_config_deps)
 
-        if version not in dep_versions[pkg]:
-            dep_versions[pkg].append(version)
+    finally:
+        if index is not None:
+            index.close()
 
-        pkg_json = fhir_pkg_dir / f"{pkg}#{version}" / "package" / "package.json"
-
-        if not pkg_json.exists():
-            log.fail(f"Transitive package {pkg}#{version} not installed")
+    # Report each package requiring a missing one
+    for source, target in graph.edges:
+        if not graph.installed(target):
+            log.fail(
+                "Transitive package {} not installed (required by {})".format(
+                    _node_name(target), _node_name(source)
+                )
+            )
             err += 1
-            continue
 
-        pkg_content = json.loads(pkg_json.read_text())
-        pkg_deps = pkg_content.get("dependencies", {})
-
-        to_process += deque(pkg_deps.items())
+    for cycle in graph.cycles:
+        log.warn(
+            "Cyclic dependency: {}".format(" > ".join(_node_name(n) for n in cycle))
+        )
+        warn += 1
 
-    for pkg, versions in dep_versions.items():
+    for pkg, versions in graph.versions().items():
         if len(versions) > 1:
             log.warn(
-                f"Different transitive versions of package {pkg}: {', '.join(versions)}"
+                "Different transitive versions of package {}: {}".format(
+                    pkg,
+                    ", ".join(
+                        "{} (via {})".format(
+                            version,
+                            " > ".join(map(_node_name, graph.path((pkg, version)))),
+                        )
+                        for version in versions
+                    ),
+                )
             )
             warn += 1
 
         else:
             log.succ(f"Matching transitive versions of package {pkg}: {versions[0]}")
 
+    if graph_file is not None:
+        graph.export(graph_file)
+        log.info(f"Dependency graph written to {graph_file}")
+
     return err, warn
 
 
+ROOT = ("project", None)
+
+
+def _node_name(node: tuple[str, str | None]) -> str:
+    pkg, version = node
+    return pkg if version is None else f"{pkg}#{version}"
+
+
+class DependencyGraph:
+    """
+    Dependency graph of FHIR packages, built from the `package.json` of the packages installed in `pkg_dir`
+
+    Packages are nodes identified by `(name, version)`, the project itself is `ROOT`. Each package is read once, no
+    matter how many packages depend on it, and the first path reaching a package is kept to show where it comes from.
+    The dependencies are taken from `index` instead if given.
+    """
+
+    def __init__(self, pkg_dir: Path, index: "PackageIndex | None" = None):
+        self.pkg_dir = pkg_dir
+        self.index = index
+
+        # Dependencies of each package, None if not installed
+        self.nodes: dict[tuple, dict[str, str] | None] = {ROOT: {}}
+        self.edges: list[tuple[tuple, tuple]] = []
+        self.cycles: list[list[tuple]] = []
+        self.parents: dict[tuple, tuple | None] = {ROOT: None}
+
+    def build(self, dependencies: dict[str, str]):
+        self.nodes[ROOT] = dict(dependencies)
+
+        to_process = deque([ROOT])
+        while len(to_process) > 0:
+            source = to_process.popleft()
+
+            for target in (self.nodes[source] or {}).items():
+                self.edges.append((source, target))
+
+                if target in self.nodes:
+                    continue
+
+                self.nodes[target] = self._read_deps(*target)
+                self.parents[target] = source
+                to_process.append(target)
+
+        self.cycles = self._find_cycles()
+
+    def _find_cycles(self) -> list[list[tuple]]:
+        """
+        Find cycles using a depth-first search, an edge to a node still being visited (grey) closes a cycle
+        """
+        adjacency: dict[tuple, list[tuple]] = {}
+        for source, target in self.edges:
+            adjacency.setdefault(source, []).append(target)
+
+        white, grey, black = 0, 1, 2
+        colors = {node: white for node in self.nodes}
+        cycles = []
+
+        for start in self.nodes:
+            if colors[start] != white:
+                continue
+
+            # Iterative, as dependency chains can be deeper than the recursion limit
+            colors[start] = grey
+            path = [start]
+            targets = [iter(adjacency.get(start, []))]
+
+            while targets:
+                target = next(targets[-1], None)
+
+                if target is None:
+                    colors[path.pop()] = black
+                    targets.pop()
+
+                elif colors[target] == grey:
+                    cycles.append(path[path.index(target) :] + [target])
+
+                elif colors[target] == white:
+                    colors[target] = grey
+                    path.append(target)
+                    targets.append(iter(adjacency.get(target, [])))
+
+        return cycles
+
+    def installed(self, node: tuple) -> bool:
+        return self.nodes.get(node) is not None
+
+    def versions(self) -> dict[str, list[str]]:
+        """
+        Get the versions of each package in the order they were found
+        """
+        result: dict[str, list[str]] = {}
+        for pkg, version in self.nodes:
+            if (pkg, version) != ROOT:
+                result.setdefault(pkg, []).append(version)
+
+        return result
+
+    def conflicts(self) -> dict[str, dict[str, list[tuple]]]:
+        """
+        Get the packages used in different versions, with the path introducing each version
+        """
+        return {
+            pkg: {version: self.path((pkg, version)) for version in versions}
+            for pkg, versions in self.versions().items()
+            if len(versions) > 1
+        }
+
+    def path(self, node: tuple) -> list[tuple]:
+        """
+        Get the first path from the project to a package
+        """
+        result = []
+        while node is not None:
+            result.append(node)
+            node = self.parents.get(node)
+
+        return list(reversed(result))
+
+    def export(self, file: Path):
+        """
+        Write the graph and the paths of conflicting versions to a file, as DOT if its suffix is `.dot`, as JSON
+        otherwise
+        """
+        file.write_text(
+            (
+                self.to_dot()
+                if file.suffix == ".dot"
+                else json.dumps(self.to_json(), indent=2)
+            ),
+            "utf-8",
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "packages": {
+                _node_name(node): {
+                    "installed": deps is not None,
+                    "dependencies": [_node_name(d) for d in (deps or {}).items()],
+                }
+                for node, deps in self.nodes.items()
+                if node != ROOT
+            },
+            "dependencies": [_node_name(d) for d in self.nodes[ROOT].items()],
+            "conflicts": {
+                pkg: {
+                    version: [_node_name(n) for n in path]
+                    for version, path in versions.items()
+                }
+                for pkg, versions in self.conflicts().items()
+            },
+            "cycles": [[_node_name(n) for n in cycle] for cycle in self.cycles],
+        }
+
+    def to_dot(self) -> str:
+        # Highlight the paths introducing conflicting versions
+        conflict_nodes = set()
+        conflict_edges = set()
+        for versions in self.conflicts().values():
+            for path in versions.values():
+                conflict_nodes.add(path[-1])
+                conflict_edges.update(zip(path, path[1:]))
+
+        lines = ["digraph dependencies {"]
+        for node in self.nodes:
+            attrs = []
+            if node in conflict_nodes:
+                attrs.append("color=red")
+            if node != ROOT and not self.installed(node):
+                attrs.append("style=dashed")
+
+            lines.append(
+                '  "{}"{};'.format(
+                    _node_name(node), f" [{', '.join(attrs)}]" if attrs else ""
+                )
+            )
+
+        for source, target in self.edges:
+            lines.append(
+                '  "{}" -> "{}"{};'.format(
+                    _node_name(source),
+                    _node_name(target),
+                    " [color=red]" if (source, target) in conflict_edges else "",
+                )
+            )
+
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def _read_deps(self, pkg: str, version: str) -> dict[str, str] | None:
+        if self.index is not None:
+            return self.index.dependencies(pkg, version)
+
+        pkg_json = self.pkg_dir / f"{pkg}#{version}" / "package" / "package.json"
+
+        try:
+            return json.loads(pkg_json.read_text("utf-8")).get("dependencies", {})
+
+        except FileNotFoundError:
+            return None
+
+
 def _check_def_versions(defs_dir: Path, **kwargs):
     err = 0
     warn = 0
 
     # Generate list of versions and associated dates
     version_dates: dict[str, list[str]] = {}
-    for f in defs_dir.glob("**/*.json"):
-        content = json.loads(f.read_text())
-        version = content.get("version")
-        date = content.get("date")
-
+    for version, date in _read_def_versions(sorted(defs_dir.glob("**/*.json"))):
         if version is None:
             continue
 
@@ -270,6 +523,120 @@ def _check_def_versions(defs_dir: Path, **kwargs):
     return err, warn
 
 
+def _read_def_versions(files: list[Path]) -> list[tuple[str | None, str | None]]:
+    """
+    Get version and date of the definitions, using multiple processes for many of them
+    """
+    if len(files) < DEF_PROCESSES_THRESHOLD or (os.cpu_count() or 1) < 2:
+        return [_read_def_version(f) for f in files]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(_read_def_version, files, chunksize=DEF_CHUNK_SIZE))
+
+
+def _read_def_version(file: Path) -> tuple[str | None, str | None]:
+    content = read_keys(file, DEF_KEYS)
+    return content.get("version"), content.get("date")
+
+
+def read_keys(file: Path, keys: set[str]) -> dict:
+    """
+    Read the values of `keys` of the top-level object of a JSON file
+
+    The file is read and parsed only until all keys are found, which is usually right at the beginning of a FHIR
+    resource. Other values are skipped without keeping them.
+    """
+    result = {}
+
+    with file.open("r", encoding="utf-8") as f:
+        reader = _PartialReader(f)
+        pos = reader.skip_whitespace(0)
+
+        if reader.char(pos) != "{":
+            return result
+
+        pos += 1
+        while len(result) < len(keys):
+            pos = reader.skip_whitespace(pos)
+            char = reader.char(pos)
+
+            if char == ",":
+                pos += 1
+                continue
+
+            if char != '"':
+                break
+
+            key, pos = reader.decode(pos)
+            pos = reader.skip_whitespace(pos)
+
+            if reader.char(pos) != ":":
+                raise ValueError(f"Invalid JSON in {file} at {pos}")
+
+            value, pos = reader.decode(reader.skip_whitespace(pos + 1))
+
+            if key in keys:
+                result[key] = value
+
+    return result
+
+
+class _PartialReader:
+    """
+    Reads a file in growing parts as far as needed to decode values
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.text = ""
+        self.read_size = READ_SIZE
+        self.eof = False
+
+    def char(self, pos: int) -> str | None:
+        while pos >= len(self.text) and self._read():
+            pass
+
+        return self.text[pos] if pos < len(self.text) else None
+
+    def skip_whitespace(self, pos: int) -> int:
+        while True:
+            pos = _whitespace.match(self.text, pos).end()
+
+            if pos < len(self.text) or not self._read():
+                return pos
+
+    def decode(self, pos: int) -> tuple:
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, pos)
+
+                # A number at the end might continue in the next part
+                if end < len(self.text) or self.eof:
+                    return value, end
+
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+
+            self._read()
+
+    def _read(self) -> bool:
+        if self.eof:
+            return False
+
+        part = self.file.read(self.read_size)
+        self.read_size *= 2
+
+        if len(part) == 0:
+            self.eof = True
+            return False
+
+        self.text += part
+        return True
+
+
 def _check_release(pub_request: dict, sushi_config: dict, **kwargs):
     errors = 0
     warnings = 0
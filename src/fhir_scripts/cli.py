@@ -1,15 +1,18 @@
 import importlib
-import pkgutil
+import sys
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
 from types import ModuleType
 
 import fhir_scripts
 
+from .commands import COMMANDS
+
 
 def get_args(
     module_dict: dict[str, ModuleType],
     parser_dict: dict[str, ArgumentParser],
+    argv: list[str] | None = None,
 ) -> Namespace:
 
     parser = ArgumentParser(description="Scripts to support FHIR development")
@@ -19,33 +22,28 @@ def get_args(
         default=None,
         help="Name and path of the config file; default `./fhirscripts.config.yaml`",
     )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        help="Record the timing of commands, steps and subprocesses into a trace file (Chrome trace format, or OTLP "
+        "JSON if ending with `.otlp.json`) or send it to an OTLP/HTTP endpoint",
+    )
     subparsers = parser.add_subparsers(dest="cmd")
 
-    # Get modules dynmaically
-    mod_names = [
-        name
-        for _, name, _ in pkgutil.iter_modules(
-            fhir_scripts.__path__, fhir_scripts.__name__ + "."
-        )
-    ]
-    modules = [
-        mod
-        for mod_name in mod_names
-        if (mod := importlib.import_module(mod_name))
-        and hasattr(mod, "__doc__")
-        and (hasattr(mod, "__handler__") or hasattr(mod, "__handlers__"))
-    ]
-
-    for module in modules:
-        cmd = module.__name__.split(".")[-1]
-        desc = module.__doc__
-
-        module_dict[cmd] = module
+    # Only the module of the called command is imported, all others are listed from the registry
+    selected_cmd = _selected_cmd(argv)
 
+    for cmd, command in COMMANDS.items():
         # Setup parser
-        _parser = subparsers.add_parser(cmd, help=desc)
+        _parser = subparsers.add_parser(cmd, help=command.help)
         parser_dict[cmd] = _parser
 
+        if cmd != selected_cmd:
+            continue
+
+        module = importlib.import_module(fhir_scripts.__name__ + "." + command.module)
+        module_dict[cmd] = module
+
         if setup_parser := getattr(module, "__setup_parser__", None):
             setup_parser(parser=_parser)
 
@@ -58,10 +56,24 @@ def get_args(
                 f"No setup function for parser or subparser defined for '{module.__name__}'"
             )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.cmd is None:
         parser.print_help()
         exit(0)
 
     return args
+
+
+def _selected_cmd(argv: list[str] | None = None) -> str | None:
+    """
+    Get the command from the arguments without setting up the parsers of all commands
+    """
+    parser = ArgumentParser(add_help=False)
+    parser.add_argument("--config")
+    parser.add_argument("--trace")
+    parser.add_argument("cmd", nargs="?")
+
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    return args.cmd if args.cmd in COMMANDS else None
@@ -0,0 +1,29 @@
+class Command:
+    """
+    Entry of the command registry
+
+    Holds everything needed to list a command on the command line without importing its module. `module` is the name
+    of the module within `fhir_scripts` that defines the handler(s) and the parser setup, `help` is shown in the
+    overview and `uses_config` defines if the config file needs to be loaded for the handler.
+    """
+
+    def __init__(self, module: str, help: str, uses_config: bool = False):
+        self.module = module
+        self.help = help
+        self.uses_config = uses_config
+
+    def __repr__(self) -> str:
+        return "<command={}>".format(self.module)
+
+
+# Registry of all commands, keep in sync with the command modules (see `test/test_cli.py`)
+COMMANDS = {
+    "build": Command("build", "Build FHIR definitions and IGs", uses_config=True),
+    "cache": Command("cache", "Handle caches", uses_config=True),
+    "check": Command("check", "Check consistencies"),
+    "deploy": Command("deploy", "Deploy IG", uses_config=True),
+    "install": Command("install", "Update tools", uses_config=True),
+    "publish": Command("publish", "Publish a project or IG registry"),
+    "update": Command("update", "Update tools"),
+    "versions": Command("versions", "Version information of all tools"),
+}
@@ -1,8 +1,10 @@
+import hashlib
+import os
 import re
 from functools import wraps
+from pathlib import Path
 
 from .exception import CancelException, NotInstalledException
-from .tools.basic import shell
 
 COLOR_REGEX = re.compile(r"(?:\x1b|\033)\[(?:\d+;){,2}\d+m", re.IGNORECASE)
 
@@ -87,14 +89,43 @@ def confirm_with_path_modification(initial_path: str, confirm_yes: bool = False)
             continue
 
 
+def cache_dir() -> Path:
+    """
+    Get the directory for caches of fhirscripts
+
+    Uses `$FHIR_SCRIPTS_CACHE_DIR` if set, otherwise `fhir-scripts` in `$XDG_CACHE_HOME` (default `~/.cache`).
+    """
+    if cache := os.environ.get("FHIR_SCRIPTS_CACHE_DIR"):
+        return Path(cache)
+
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg_cache) if xdg_cache else Path.home() / ".cache") / "fhir-scripts"
+
+
+def project_id() -> str:
+    """
+    Get an identifier of the project in the current directory, e.g. to store caches per project
+    """
+    return hashlib.sha256(str(Path.cwd().resolve()).encode()).hexdigest()[:16]
+
+
 def check_installed(cmd: str, name: str):
-    try:
-        shell.run(f"which {cmd}", check=True, log_output=False)
+    # shell imports asyncio, which is only needed when running commands and slows down the startup
+    from .tools.basic import shell
 
-    except shell.CalledProcessError:
+    if shell.which(cmd) is None:
         raise NotInstalledException(f"{name} is needed but not installed")
 
 
+def is_installed(cmd: str) -> bool:
+    try:
+        check_installed(cmd, cmd)
+        return True
+
+    except NotInstalledException:
+        return False
+
+
 def require_installed(cmd: str, name: str):
     """
     Decorator that checks if `cmd` can be found
@@ -115,5 +146,18 @@ def require_installed(cmd: str, name: str):
     return decorator
 
 
+def format_size(size: int) -> str:
+    """
+    Format a size in bytes human readable
+    """
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            break
+
+        size /= 1024
+
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
 def clean_string(text: str) -> str:
     return COLOR_REGEX.sub("", text.strip())
@@ -1,42 +1,22 @@
-import importlib
-import pkgutil
 from argparse import ArgumentParser
 
-import fhir_scripts.tools
-
 from . import log
 from .config import Config
-
-TOOL_MODULES = {}
+from .tools import UPDATE, get_tools
 
 
 def setup_parser(parser: ArgumentParser, *args, **kwarsg):
-    global TOOL_MODULES
-
-    # Get modules dynmaically
-    mod_names = [
-        name
-        for _, name, _ in pkgutil.iter_modules(
-            fhir_scripts.tools.__path__, fhir_scripts.tools.__name__ + "."
-        )
-    ]
-    TOOL_MODULES = {
-        mod_name.rsplit(".")[-1]: mod
-        for mod_name in mod_names
-        if (mod := importlib.import_module(mod_name)) and hasattr(mod, "update")
-    }
-
     parser.add_argument(
         "--config-file",
         action="store_true",
         help="Install tools defined from config file",
     )
 
-    for name, mod in TOOL_MODULES.items():
+    for name, tool in get_tools(UPDATE).items():
         parser.add_argument(
             f"--{name.replace("_", "-")}",
             action="store_true",
-            help=f"Install {mod.__tool_name__}",
+            help=f"Install {tool.tool_name}",
         )
 
 
@@ -52,10 +32,11 @@ def install(config: Config, config_file: bool = False, *args, **kwargs):
         ]
 
     # Get the module for each tool
+    tools = get_tools(UPDATE)
     modules = []
     for tool in install_tools:
-        if (mod := TOOL_MODULES.get(tool, None)) and hasattr(mod, "update"):
-            modules.append(mod)
+        if registered := tools.get(tool, None):
+            modules.append(registered.load())
 
         else:
             log.warn(f"Tool '{tool}' does not exist")
@@ -45,6 +45,15 @@ def debug(text: str):
     print(colored(text, Colors.GRAY))
 
 
+def table(header: list[str], rows: list[list[str]]):
+    """Print rows as table with aligned columns"""
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+
+    for i, row in enumerate([header] + rows):
+        line = "  ".join(str(cell).ljust(width) for cell, width in zip(row, widths))
+        print(colored(line, Colors.BOLD) if i == 0 else line)
+
+
 def supports_color() -> bool:
     """Check if terminal supports ANSI colors"""
     return hasattr(sys.stdout, "isatty") and sys.stdout.isatty()
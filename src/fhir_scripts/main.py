@@ -3,7 +3,8 @@ import sys
 from argparse import ArgumentParser
 from types import ModuleType
 
-from . import cli, config, log
+from . import cli, log, trace
+from .commands import COMMANDS
 from .exception import CancelException
 
 
@@ -13,8 +14,18 @@ def main():
 
     args = cli.get_args(module_dict, parser_dict)
 
+    if args.trace:
+        trace.start(args.trace)
+
     try:
-        cfg = config.load(args.config)
+        # Loading the config is only needed for commands using it
+        if COMMANDS[args.cmd].uses_config:
+            from . import config
+
+            cfg = config.load(args.config)
+
+        else:
+            cfg = None
 
         # Get handle function for command
         module = module_dict[args.cmd]
@@ -39,14 +50,25 @@ def main():
         # Unpack the cli arguments
         cli_args = vars(args)
         del cli_args["config"]
+        del cli_args["trace"]
 
         # Otherwise handle the command
-        handle(config=cfg, **cli_args)
+        name = " ".join(cmd for cmd in [args.cmd, getattr(args, args.cmd, None)] if cmd)
+        with trace.span(name, "command", **_trace_args(cli_args)):
+            handle(config=cfg, **cli_args)
 
     except CancelException as e:
         log.warn(str(e))
         sys.exit(-1)
 
+    except KeyboardInterrupt:
+        # Commands run in their own process group and do not receive Ctrl+C from the terminal
+        from .tools.basic import shell
+
+        shell.terminate_all()
+        log.warn("Aborted")
+        sys.exit(-1)
+
     except Exception as e:
         if stdout := getattr(e, "stdout", None):
             log.info(stdout)
@@ -57,4 +79,23 @@ def main():
         log.fail(f"Error: {str(e)}")
         sys.exit(os.EX_DATAERR)
 
+    finally:
+        _finish_trace()
+
     sys.exit(os.EX_OK)
+
+
+def _trace_args(cli_args: dict) -> dict:
+    return {
+        key: value if isinstance(value, (bool, int, float)) else str(value)
+        for key, value in cli_args.items()
+        if value is not None
+    }
+
+
+def _finish_trace():
+    try:
+        trace.finish()
+
+    except Exception as e:
+        log.warn(f"Could not write trace: {str(e)}")
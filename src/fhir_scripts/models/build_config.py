@@ -1,4 +1,7 @@
 from pathlib import Path
+from typing import Literal
+
+from pydantic import Field, PositiveInt
 
 from .strict_base_model import StrictBaseModel
 
@@ -13,7 +16,23 @@ class BuildBuiltinConfig(StrictBaseModel):
     epatools: BuildBuiltinEpaToolsConfig | bool = False
 
 
-class BuildPipelineShellStep(StrictBaseModel):
+class BuildPipelineStepBase(StrictBaseModel):
+    id: str | None = None
+    # None depends on the previous step, an empty list on no step at all
+    needs: list[str] | None = None
+    # Override the files read and written by the step, used to skip it if nothing changed
+    inputs: list[str] | None = None
+    outputs: list[str] | None = None
+    cache: bool = True
+    # Keep a copy of the outputs, so they are restored if changed instead of processing the step again
+    store_outputs: bool = False
+
+
+class BuildPipelineNamedStep(BuildPipelineStepBase):
+    step: str
+
+
+class BuildPipelineShellStep(BuildPipelineStepBase):
     shell: str
 
 
@@ -21,11 +40,92 @@ class BuildArgsOpenApi(StrictBaseModel):
     additional_archive: list[Path] = []
 
 
+class BuildArgsArchive(StrictBaseModel):
+    # zlib level used for files added to the IG archive
+    compression_level: int = Field(default=6, ge=0, le=9)
+    # Threads compressing files, defaults to the number of CPUs
+    workers: PositiveInt | None = None
+
+
 class BuildArgsConfig(StrictBaseModel):
     openapi: BuildArgsOpenApi = BuildArgsOpenApi()
+    archive: BuildArgsArchive = BuildArgsArchive()
+
+
+class BuildJvmToolConfig(StrictBaseModel):
+    # Size like "6g" or percentage of the available memory like "75%", derived from the container limits if not set
+    max_heap: str | None = None
+    gc: Literal["g1", "parallel", "serial", "z", "shenandoah"] | None = None
+    gc_threads: PositiveInt | None = None
+    args: list[str] = []
+
+
+class BuildJvmConfig(BuildJvmToolConfig):
+    log_gc: bool = True
+    igpub: BuildJvmToolConfig = BuildJvmToolConfig()
+    fhir_pkg_tool: BuildJvmToolConfig = BuildJvmToolConfig()
+
+    def tool(self, name: str) -> BuildJvmToolConfig:
+        """
+        Get the settings for a tool, its own settings override the general ones
+        """
+        tool = getattr(self, name)
+        return BuildJvmToolConfig(
+            max_heap=tool.max_heap or self.max_heap,
+            gc=tool.gc or self.gc,
+            gc_threads=tool.gc_threads or self.gc_threads,
+            args=self.args + tool.args,
+        )
+
+
+class BuildFailFastToolConfig(StrictBaseModel):
+    # Stop the tool as soon as this number of errors is reached
+    max_errors: PositiveInt | None = None
+    # Stop the tool as soon as a line of its output matches one of these regular expressions
+    fatal: list[str] = []
+
+
+class BuildFailFastConfig(StrictBaseModel):
+    sushi: BuildFailFastToolConfig = BuildFailFastToolConfig()
+    igpub: BuildFailFastToolConfig = BuildFailFastToolConfig()
+
+
+class BuildProfileConfig(StrictBaseModel):
+    # Run a publication build using `-publish`
+    publish: bool = True
+    args: list[str] = []
+
+
+# Profiles available without configuring them, can be overridden in the config
+DEFAULT_PROFILES = {
+    "release": BuildProfileConfig(),
+    "ci": BuildProfileConfig(publish=False),
+    "dev": BuildProfileConfig(publish=False, args=["-tx n/a"]),
+}
 
 
 class BuildConfig(StrictBaseModel):
     builtin: BuildBuiltinConfig = BuildBuiltinConfig()
-    pipeline: list[str | BuildPipelineShellStep] = []
+    pipeline: list[str | BuildPipelineNamedStep | BuildPipelineShellStep] = []
+    workers: PositiveInt = 4
+    jvm: BuildJvmConfig = BuildJvmConfig()
     args: BuildArgsConfig = BuildArgsConfig()
+    fail_fast: BuildFailFastConfig = BuildFailFastConfig()
+    profile: str = "release"
+    profiles: dict[str, BuildProfileConfig] = {}
+
+    def get_profile(self, name: str | None = None) -> BuildProfileConfig:
+        """
+        Get a build profile by its name, the configured default profile if None
+        """
+        profiles = DEFAULT_PROFILES | self.profiles
+        name = name or self.profile
+
+        if (profile := profiles.get(name)) is None:
+            raise Exception(
+                "Unknown build profile '{}', use one of {}".format(
+                    name, ", ".join(profiles.keys())
+                )
+            )
+
+        return profile
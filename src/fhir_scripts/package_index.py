@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+INDEX_NAME = "fhir-scripts-index.sqlite"
+
+# Increase if the tables change, the index is then created again
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    dir TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    fhir_versions TEXT NOT NULL,
+    size INTEGER,
+    installed REAL NOT NULL,
+    hash TEXT,
+    state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_name ON packages (name, version);
+CREATE TABLE IF NOT EXISTS dependencies (
+    dir TEXT NOT NULL REFERENCES packages (dir) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_dir ON dependencies (dir);
+CREATE INDEX IF NOT EXISTS dependencies_name ON dependencies (name, version);
+"""
+
+HASH_READ_SIZE = 1024 * 1024
+
+
+def default_pkg_dir() -> Path:
+    return Path.home() / ".fhir" / "packages"
+
+
+class IndexedPackage:
+    """
+    Package installed in the FHIR package cache, `installed` is a timestamp and `hash` covers all files of the package
+
+    `size` and `hash` are `None` until the content of the package was read (see `PackageIndex.refresh`).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        fhir_versions: list[str],
+        size: int | None,
+        installed: float,
+        hash: str | None,
+        dependencies: dict[str, str],
+    ):
+        self.name = name
+        self.version = version
+        self.fhir_versions = fhir_versions
+        self.size = size
+        self.installed = installed
+        self.hash = hash
+        self.dependencies = dependencies
+
+    def __repr__(self) -> str:
+        return "<package={}#{}>".format(self.name, self.version)
+
+
+class PackageIndex:
+    """
+    Index of the packages in the FHIR package cache (`~/.fhir/packages`), stored as SQLite database next to it
+
+    `refresh` updates the index: only packages whose directory or `package.json` changed since the last refresh are
+    read again, removed packages are dropped. Only `package.json` is read, unless the size and hash of the content are
+    requested.
+    """
+
+    def __init__(self, pkg_dir: Path | None = None, index_file: Path | None = None):
+        self.pkg_dir = pkg_dir or default_pkg_dir()
+        self.index_file = index_file or self.pkg_dir.parent / INDEX_NAME
+
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.index_file)
+        self.db.execute("PRAGMA foreign_keys = ON")
+
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript(
+                "DROP TABLE IF EXISTS dependencies; DROP TABLE IF EXISTS packages;"
+            )
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self, content: bool = False) -> tuple[int, int]:
+        """
+        Update the index from the package cache, returns the number of packages read and removed
+
+        With `content` all files of packages without size and hash are read to determine them, which takes long for
+        large packages.
+        """
+        known = dict(self.db.execute("SELECT dir, state FROM packages").fetchall())
+        found = set()
+        read = 0
+
+        with self.db:
+            if self.pkg_dir.is_dir():
+                for entry in os.scandir(self.pkg_dir):
+                    # Hidden directories are incomplete installations
+                    if (
+                        not entry.is_dir()
+                        or entry.name.startswith(".")
+                        or "#" not in entry.name
+                    ):
+                        continue
+
+                    found.add(entry.name)
+                    state = _state(Path(entry.path))
+
+                    if state is not None and known.get(entry.name) != state:
+                        self._add(Path(entry.path), state)
+                        read += 1
+
+            removed = set(known.keys()) - found
+            self.db.executemany(
+                "DELETE FROM packages WHERE dir = ?", [(d,) for d in removed]
+            )
+
+            if content:
+                for (dir,) in self.db.execute(
+                    "SELECT dir FROM packages WHERE hash IS NULL"
+                ).fetchall():
+                    self.db.execute(
+                        "UPDATE packages SET size = ?, hash = ? WHERE dir = ?",
+                        (*_size_and_hash(self.pkg_dir / dir), dir),
+                    )
+
+        return read, len(removed)
+
+    def packages(self, name: str | None = None) -> list[IndexedPackage]:
+        """
+        Get the packages in the index, all or the versions of one package
+        """
+        query = "SELECT dir, name, version, fhir_versions, size, installed, hash FROM packages"
+        params = ()
+
+        if name is not None:
+            query += " WHERE name = ?"
+            params = (name,)
+
+        rows = self.db.execute(query + " ORDER BY name, version", params).fetchall()
+        return [self._package(row) for row in rows]
+
+    def get(self, name: str, version: str) -> IndexedPackage | None:
+        row = self.db.execute(
+            "SELECT dir, name, version, fhir_versions, size, installed, hash FROM packages WHERE dir = ?",
+            (f"{name}#{version}",),
+        ).fetchone()
+
+        return self._package(row) if row is not None else None
+
+    def dependencies(self, name: str, version: str) -> dict[str, str] | None:
+        """
+        Get the dependencies of a package, `None` if it is not installed
+        """
+        package = self.get(name, version)
+        return package.dependencies if package is not None else None
+
+    def dependants(self, name: str) -> list[tuple[str, str]]:
+        """
+        Get the packages depending on any version of a package
+        """
+        return [
+            tuple(row)
+            for row in self.db.execute(
+                "SELECT DISTINCT p.name, p.version FROM dependencies d JOIN packages p ON p.dir = d.dir "
+                "WHERE d.name = ? ORDER BY p.name, p.version",
+                (name,),
+            )
+        ]
+
+    def _add(self, path: Path, state: str):
+        try:
+            pkg_json = json.loads(
+                (path / "package" / "package.json").read_text("utf-8")
+            )
+
+        except (OSError, ValueError):
+            pkg_json = {}
+
+        name, _, version = path.name.partition("#")
+
+        self.db.execute("DELETE FROM packages WHERE dir = ?", (path.name,))
+        self.db.execute(
+            "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path.name,
+                name,
+                version,
+                json.dumps(pkg_json.get("fhirVersions", [])),
+                None,
+                path.stat().st_mtime,
+                None,
+                state,
+            ),
+        )
+        self.db.executemany(
+            "INSERT INTO dependencies VALUES (?, ?, ?)",
+            [
+                (path.name, dep, str(dep_version))
+                for dep, dep_version in pkg_json.get("dependencies", {}).items()
+            ],
+        )
+
+    def _package(self, row: tuple) -> IndexedPackage:
+        dir, name, version, fhir_versions, size, installed, content_hash = row
+        dependencies = dict(
+            self.db.execute(
+                "SELECT name, version FROM dependencies WHERE dir = ?", (dir,)
+            ).fetchall()
+        )
+
+        return IndexedPackage(
+            name,
+            version,
+            json.loads(fhir_versions),
+            size,
+            installed,
+            content_hash,
+            dependencies,
+        )
+
+
+def format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def _state(path: Path) -> str | None:
+    """
+    Get the state of a package directory, which changes if files are added or removed or `package.json` is changed
+    """
+    try:
+        dir_stat = path.stat()
+        package_dir_stat = (path / "package").stat()
+        pkg_json_stat = (path / "package" / "package.json").stat()
+
+    except OSError:
+        return None
+
+    return "{}:{}:{}:{}".format(
+        dir_stat.st_mtime_ns,
+        package_dir_stat.st_mtime_ns,
+        pkg_json_stat.st_mtime_ns,
+        pkg_json_stat.st_size,
+    )
+
+
+def _size_and_hash(path: Path) -> tuple[int, str]:
+    size = 0
+    content_hash = hashlib.sha256()
+
+    for file in sorted(f for f in path.rglob("*") if f.is_file()):
+        content_hash.update(str(file.relative_to(path)).encode())
+        content_hash.update(b"\0")
+
+        with file.open("rb") as f:
+            while chunk := f.read(HASH_READ_SIZE):
+                size += len(chunk)
+                content_hash.update(chunk)
+
+    return size, content_hash.hexdigest()
@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import tarfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import BinaryIO
+
+from . import log
+from .package_index import default_pkg_dir
+from .tools.basic import http
+
+FHIR_REGISTRY = "https://packages.simplifier.net"
+
+# Size of the chunks read from a download after the archive was extracted
+READ_SIZE = 256 * 1024
+
+DEFAULT_WORKERS = 8
+
+
+def archive_names(pkg: str, version: str) -> list[str]:
+    """
+    Get the possible file names of a package archive, for official and own build packages
+    """
+    return [f"{pkg}-{version}.tgz", f"{pkg}_{version}.tgz"]
+
+
+def installed(pkg: str, version: str, pkg_dir: Path | None = None) -> bool:
+    return _pkg_json(_target(pkg, version, pkg_dir or default_pkg_dir())).exists()
+
+
+def find_archive(pkg: str, version: str, package_dir: Path | None) -> Path | None:
+    """
+    Get the archive of a package from `package_dir` if it is there
+    """
+    if package_dir is None:
+        return None
+
+    for name in archive_names(pkg, version):
+        if (archive := package_dir / name).exists():
+            return archive
+
+    return None
+
+
+def download(
+    pkg: str,
+    version: str,
+    pkg_dir: Path | None = None,
+    package_dir: Path | None = None,
+    registry: str = FHIR_REGISTRY,
+) -> dict[str, str]:
+    """
+    Install a package from `registry`, returns the dependencies of the package
+
+    The archive is extracted while it is downloaded. If `package_dir` is given, the archive is also stored there.
+    """
+    with http.stream(f"{registry}/{pkg}/{version}") as stream:
+        if package_dir is None:
+            return install(stream, pkg, version, pkg_dir)
+
+        archive = package_dir / archive_names(pkg, version)[0]
+        tmp_file = archive.with_name(
+            f"{archive.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+
+        try:
+            package_dir.mkdir(parents=True, exist_ok=True)
+
+            with tmp_file.open("wb") as copy:
+                reader = _CopyingReader(stream, copy)
+                deps = install(reader, pkg, version, pkg_dir)
+
+                # The end of the archive is not needed for extracting it, but for a complete copy
+                while reader.read(READ_SIZE):
+                    pass
+
+            tmp_file.replace(archive)
+
+        finally:
+            tmp_file.unlink(missing_ok=True)
+
+    return deps
+
+
+def install(
+    archive: Path | BinaryIO, pkg: str, version: str, pkg_dir: Path | None = None
+) -> dict[str, str]:
+    """
+    Install a package archive (file or stream) into the FHIR package cache, returns the dependencies of the package
+
+    The archive is extracted while reading it to a hidden directory next to the package, which is renamed once
+    complete.
+    """
+    pkg_dir = pkg_dir or default_pkg_dir()
+    target = _target(pkg, version, pkg_dir)
+    tmp_dir = pkg_dir / f".{pkg}@{version}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        pkg_dir.mkdir(parents=True, exist_ok=True)
+
+        with (
+            tarfile.open(archive, "r|gz")
+            if isinstance(archive, Path)
+            else tarfile.open(fileobj=archive, mode="r|gz")
+        ) as tar:
+            tar.extractall(tmp_dir, filter="data")
+
+        if not _pkg_json(tmp_dir).exists():
+            raise Exception(f"Archive of {pkg}@{version} is not a FHIR package")
+
+        # Replace a broken previous installation
+        if target.exists():
+            shutil.rmtree(target)
+
+        tmp_dir.rename(target)
+
+    finally:
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+
+    return _dependencies(target)
+
+
+def install_all(
+    dependencies: dict[str, str],
+    pkg_dir: Path | None = None,
+    package_dir: Path | None = None,
+    registry: str = FHIR_REGISTRY,
+    workers: int = DEFAULT_WORKERS,
+) -> int:
+    """
+    Install packages and their transitive dependencies, returns the number of packages installed
+
+    Packages already installed are kept. Each package is taken from `package_dir` or downloaded and extracted on one of
+    `workers` threads, its dependencies are installed as soon as it is known which they are.
+    """
+    pkg_dir = pkg_dir or default_pkg_dir()
+    seen = set()
+    count = 0
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {}
+
+    def submit(deps: dict[str, str]):
+        for pkg, version in deps.items():
+            if (pkg, version) not in seen:
+                seen.add((pkg, version))
+                futures[
+                    executor.submit(
+                        _install, pkg, version, pkg_dir, package_dir, registry
+                    )
+                ] = (pkg, version)
+
+    try:
+        submit(dependencies)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                del futures[future]
+                deps, new = future.result()
+                count += new
+                submit(deps)
+
+    except BaseException:
+        # Do not wait for running installations, e.g. if one failed or the user aborted
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    executor.shutdown()
+
+    return count
+
+
+def _install(
+    pkg: str, version: str, pkg_dir: Path, package_dir: Path | None, registry: str
+) -> tuple[dict[str, str], bool]:
+    if installed(pkg, version, pkg_dir):
+        log.info(f"Already installed {pkg}@{version}")
+        return _dependencies(_target(pkg, version, pkg_dir)), False
+
+    if (archive := find_archive(pkg, version, package_dir)) is not None:
+        log.info(f"Cache hit for {pkg}@{version}, install")
+        deps = install(archive, pkg, version, pkg_dir)
+
+    else:
+        if package_dir is not None:
+            log.info(f"Cache miss for {pkg}@{version}")
+
+        log.info(f"Download and install {pkg}@{version}")
+        deps = download(pkg, version, pkg_dir, package_dir, registry)
+
+    log.succ(f"Installed {pkg}@{version} successfully")
+
+    return deps, True
+
+
+class _CopyingReader:
+    """
+    Reads from a stream and writes everything read to a file
+    """
+
+    def __init__(self, stream: BinaryIO, copy: BinaryIO):
+        self.stream = stream
+        self.copy = copy
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.copy.write(data)
+        return data
+
+
+def _target(pkg: str, version: str, pkg_dir: Path) -> Path:
+    return pkg_dir / f"{pkg}#{version}"
+
+
+def _pkg_json(path: Path) -> Path:
+    return path / "package" / "package.json"
+
+
+def _dependencies(path: Path) -> dict[str, str]:
+    return json.loads(_pkg_json(path).read_text("utf-8")).get("dependencies", {})
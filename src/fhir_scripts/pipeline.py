@@ -0,0 +1,231 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+from .models.build_config import BuildPipelineNamedStep, BuildPipelineShellStep
+from .tools.basic import shell
+
+
+class Step:
+    """
+    A step of the build pipeline
+
+    `name` is the kind of step (e.g. `sushi` or `shell`), `args` its argument if any and `id` identifies the step
+    within the pipeline. `needs` are the ids of the steps that need to be finished before this step can start. The
+    `inputs` and `outputs` configured for the step, if it may be skipped (`cache`) and if its outputs are stored
+    (`store_outputs`) are used by the step cache.
+    """
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        args: str | None,
+        needs: list[str],
+        inputs: list[str] | None = None,
+        outputs: list[str] | None = None,
+        cache: bool = True,
+        store_outputs: bool = False,
+    ):
+        self.id = id
+        self.name = name
+        self.args = args
+        self.needs = needs
+        self.inputs = inputs
+        self.outputs = outputs
+        self.cache = cache
+        self.store_outputs = store_outputs
+
+    def __repr__(self) -> str:
+        return "<step={}>".format(self.id)
+
+
+def create_steps(
+    pipeline: list[str | BuildPipelineNamedStep | BuildPipelineShellStep],
+) -> list[Step]:
+    """
+    Create the steps from the pipeline config
+
+    Steps without an explicit `id` are identified by their name, or `<name>#<n>` if the name is used multiple times.
+    Steps without `needs` depend on the previous step, so a pipeline without any `needs` is processed in order.
+    """
+    names = [_step_name(step) for step in pipeline]
+
+    steps = []
+    count: dict[str, int] = {}
+    for i, (step, name) in enumerate(zip(pipeline, names)):
+        count[name] = count.get(name, 0) + 1
+        id = getattr(step, "id", None)
+
+        if id is None:
+            id = name if names.count(name) == 1 else f"{name}#{count[name]}"
+
+        needs = getattr(step, "needs", None)
+        if needs is None:
+            needs = [steps[i - 1].id] if i > 0 else []
+
+        args = step.shell if isinstance(step, BuildPipelineShellStep) else None
+        steps.append(
+            Step(
+                id,
+                name,
+                args,
+                needs,
+                inputs=getattr(step, "inputs", None),
+                outputs=getattr(step, "outputs", None),
+                cache=getattr(step, "cache", True),
+                store_outputs=getattr(step, "store_outputs", False),
+            )
+        )
+
+    return steps
+
+
+def validate(steps: list[Step]):
+    """
+    Check that ids are unique, all needed steps exist and there are no cycles
+    """
+    ids = [step.id for step in steps]
+
+    if duplicates := sorted({id for id in ids if ids.count(id) > 1}):
+        raise Exception(
+            "Pipeline configuration contains duplicate step id(s): {}".format(
+                ", ".join(duplicates)
+            )
+        )
+
+    if unknown := [
+        f"{need} (needed by {step.id})"
+        for step in steps
+        for need in step.needs
+        if need not in ids
+    ]:
+        raise Exception(
+            "Pipeline configuration needs unknown step(s): {}".format(
+                ", ".join(unknown)
+            )
+        )
+
+    stages(steps)
+
+
+def stages(steps: list[Step]) -> list[list[Step]]:
+    """
+    Group the steps into stages, all steps of a stage only need steps of previous stages
+    """
+    done: set[str] = set()
+    remaining = list(steps)
+    result = []
+
+    while remaining:
+        stage = [step for step in remaining if all(n in done for n in step.needs)]
+
+        if not stage:
+            raise Exception(
+                "Pipeline configuration contains a cycle between step(s): {}".format(
+                    ", ".join(step.id for step in remaining)
+                )
+            )
+
+        result.append(stage)
+        done.update(step.id for step in stage)
+        remaining = [step for step in remaining if step.id not in done]
+
+    return result
+
+
+def run(steps: list[Step], func: Callable[[Step], None], workers: int = 1):
+    """
+    Process the steps calling `func` for each of them, steps are started as soon as all needed steps are finished
+
+    At most `workers` steps are processed at the same time. If a step fails, no further steps are started and the
+    first error is raised after the running steps finished. If processing is interrupted, e.g. by Ctrl+C, the commands
+    of running steps are interrupted as well. Returns the durations of the processed steps in seconds.
+    """
+    pending = {step.id: step for step in steps}
+    done: set[str] = set()
+    durations: dict[str, float] = {}
+    running = {}
+    error = None
+
+    def process(step: Step):
+        start = time.perf_counter()
+        func(step)
+        return time.perf_counter() - start
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        while pending or running:
+            # Start all steps whose needs are fulfilled
+            if error is None:
+                for step in [
+                    step
+                    for step in pending.values()
+                    if all(n in done for n in step.needs)
+                ]:
+                    del pending[step.id]
+                    # Keep the context, e.g. to nest trace spans within the calling one
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, process, step)] = step
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                step = running.pop(future)
+
+                if e := future.exception():
+                    error = error or e
+                    continue
+
+                durations[step.id] = future.result()
+                done.add(step.id)
+
+    except BaseException:
+        # Do not wait for running steps, e.g. if the user aborted
+        shell.terminate_all()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    executor.shutdown()
+
+    if error is not None:
+        raise error
+
+    return durations
+
+
+def critical_path(steps: list[Step], durations: dict[str, float]) -> list[Step]:
+    """
+    Get the chain of needed steps with the longest total duration, which limits the duration of the whole pipeline
+    """
+    longest: dict[str, tuple[float, list[Step]]] = {}
+
+    # Stages are in order, so needed steps are always handled before
+    for stage in stages(steps):
+        for step in stage:
+            before = max(
+                (longest[need] for need in step.needs),
+                key=lambda item: item[0],
+                default=(0.0, []),
+            )
+            longest[step.id] = (
+                before[0] + durations.get(step.id, 0.0),
+                before[1] + [step],
+            )
+
+    return max(longest.values(), key=lambda item: item[0], default=(0.0, []))[1]
+
+
+def _step_name(step: str | BuildPipelineNamedStep | BuildPipelineShellStep) -> str:
+    if isinstance(step, str):
+        return step
+
+    if isinstance(step, BuildPipelineNamedStep):
+        return step.step
+
+    return "shell"
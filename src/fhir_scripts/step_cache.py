@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Callable
+
+from .helper import cache_dir, project_id
+
+CACHE_NAME = "steps"
+ENTRY_NAME = "entry.json"
+OUTPUTS_NAME = "outputs"
+
+# Maximum number of changed inputs listed when explaining why a step needs to run
+EXPLAIN_FILES = 3
+
+
+class Spec:
+    """
+    Description of a cacheable step
+
+    `inputs` are glob patterns of the files the step reads, matched directories include all files within them.
+    `exclude` are glob patterns of files and directories within the inputs that are not read. `outputs` are the files
+    and directories the step creates. `version` returns the version of the tool used by the step, so updating the
+    tool invalidates the cache.
+    """
+
+    def __init__(
+        self,
+        inputs: list[str],
+        outputs: list[str],
+        version: Callable[[], object] | None = None,
+        exclude: list[str] = [],
+    ):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.version = version
+        self.exclude = exclude
+
+
+class StepCache:
+    """
+    Cache of the last successful run of a step in the current project
+
+    A step is up to date if the content of its inputs, its configuration and the tool version match the last
+    successful run and its outputs were not changed since. With `store_outputs` a copy of the outputs is kept in the
+    cache, so changed outputs are restored instead of running the step again.
+    """
+
+    def __init__(
+        self, step_id: str, spec: Spec, config: dict, store_outputs: bool = False
+    ):
+        self.step_id = step_id
+        self.spec = spec
+        self.store_outputs = store_outputs
+        self.dir = (
+            cache_dir() / CACHE_NAME / project_id() / re.sub(r"[^\w.-]", "_", step_id)
+        )
+        self.entry = self._read()
+
+        version = spec.version() if spec.version else None
+        self.state = {
+            "version": str(version) if version is not None else None,
+            "config": hashlib.sha256(
+                json.dumps(config, sort_keys=True, default=str).encode()
+            ).hexdigest(),
+            "inputs": self._hash_inputs(),
+        }
+
+    def outdated(self) -> str | None:
+        """
+        Get the reason why the step needs to run, or `None` if it is up to date
+        """
+        if self.entry is None:
+            return "no previous run"
+
+        if self.entry["version"] != self.state["version"]:
+            return "tool version changed from {} to {}".format(
+                self.entry["version"], self.state["version"]
+            )
+
+        if self.entry["config"] != self.state["config"]:
+            return "configuration changed"
+
+        prev, curr = self.entry["inputs"], self.state["inputs"]
+        changed = sorted(
+            [
+                path
+                for path in curr
+                if path not in prev or prev[path][2] != curr[path][2]
+            ]
+            + [path for path in prev if path not in curr]
+        )
+        if changed:
+            more = len(changed) - EXPLAIN_FILES
+            return "input(s) changed: {}{}".format(
+                ", ".join(changed[:EXPLAIN_FILES]),
+                f" and {more} more" if more > 0 else "",
+            )
+
+        if self._outputs_changed() and not (self.dir / OUTPUTS_NAME).exists():
+            return "outputs changed"
+
+        return None
+
+    def restore(self) -> bool:
+        """
+        Restore the outputs from the cache if they were changed, returns `True` if restored
+        """
+        if not self._outputs_changed():
+            return False
+
+        cached = self.dir / OUTPUTS_NAME
+        for output in self.spec.outputs:
+            _remove(Path(output))
+
+            if (source := cached / output).is_dir():
+                shutil.copytree(source, output, symlinks=True)
+
+            elif source.exists():
+                Path(output).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, output)
+
+        return True
+
+    def save(self):
+        """
+        Store the outputs and the state of the inputs after a successful run
+        """
+        tmp_dir = self.dir.with_name(f"{self.dir.name}.{os.getpid()}.tmp")
+        _remove(tmp_dir)
+
+        try:
+            outputs = {}
+            for output in self.spec.outputs:
+                if (path := Path(output)).is_dir():
+                    if self.store_outputs:
+                        shutil.copytree(
+                            path, tmp_dir / OUTPUTS_NAME / output, symlinks=True
+                        )
+                    files = [f for f in path.rglob("*") if not f.is_dir()]
+
+                elif path.exists():
+                    if self.store_outputs:
+                        (tmp_dir / OUTPUTS_NAME / output).parent.mkdir(
+                            parents=True, exist_ok=True
+                        )
+                        shutil.copy2(path, tmp_dir / OUTPUTS_NAME / output)
+                    files = [path]
+
+                else:
+                    continue
+
+                outputs.update({f.as_posix(): _stat(f) for f in files})
+
+            if self.store_outputs:
+                (tmp_dir / OUTPUTS_NAME).mkdir(parents=True, exist_ok=True)
+
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            (tmp_dir / ENTRY_NAME).write_text(
+                json.dumps(self.state | {"outputs": outputs}), "utf-8"
+            )
+
+            # Replace the previous entry as a whole, so it is never mixed with this one
+            _remove(self.dir)
+            tmp_dir.replace(self.dir)
+
+        except OSError:
+            _remove(tmp_dir)
+
+    def _read(self) -> dict | None:
+        try:
+            return json.loads((self.dir / ENTRY_NAME).read_text("utf-8"))
+
+        except (OSError, ValueError):
+            return None
+
+    def _outputs_changed(self) -> bool:
+        return not all(
+            _stat(Path(path)) == tuple(stat)
+            for path, stat in self.entry["outputs"].items()
+        ) or not all(Path(output).exists() for output in self.spec.outputs)
+
+    def _hash_inputs(self) -> dict[str, list]:
+        """
+        Hash the content of all inputs, files not changed since the last run are not read again
+        """
+        prev = self.entry["inputs"] if self.entry else {}
+
+        hashes = {}
+        # Outputs of a step are not its inputs
+        for file in sorted(
+            _files(self.spec.inputs, self.spec.exclude + self.spec.outputs)
+        ):
+            path = file.as_posix()
+            if (stat := _stat(file)) is None:
+                continue
+
+            if (entry := prev.get(path)) and tuple(entry[:2]) == stat:
+                hashes[path] = entry
+                continue
+
+            with file.open("rb") as f:
+                hashes[path] = [*stat, hashlib.file_digest(f, "sha256").hexdigest()]
+
+        return hashes
+
+
+def _files(patterns: list[str], exclude: list[str]) -> set[Path]:
+    files = set()
+    for pattern in patterns:
+        for match in Path(".").glob(pattern):
+            if _excluded(match, exclude):
+                continue
+
+            if match.is_dir():
+                # Excluded directories are not walked at all, e.g. the output of the IG Publisher
+                for root, dirs, names in os.walk(match):
+                    dirs[:] = [d for d in dirs if not _excluded(Path(root, d), exclude)]
+                    files.update(
+                        file
+                        for name in names
+                        if (file := Path(root, name)).is_file()
+                        and not _excluded(file, exclude)
+                    )
+
+            elif match.is_file():
+                files.add(match)
+
+    return files
+
+
+def _excluded(path: Path, exclude: list[str]) -> bool:
+    return any(
+        fnmatchcase(p.as_posix(), pattern)
+        for p in [path, *path.parents[:-1]]
+        for pattern in exclude
+    )
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    except OSError:
+        return None
+
+
+def _remove(path: Path):
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+
+    elif path.exists() or path.is_symlink():
+        path.unlink()
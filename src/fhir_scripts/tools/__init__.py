@@ -0,0 +1,172 @@
+import importlib
+import json
+from types import ModuleType
+
+# Capabilities a tool module can provide
+UPDATE = "update"
+VERSION = "version"
+LATEST_VERSION = "latest_version"
+CAPABILITIES = [UPDATE, VERSION, LATEST_VERSION]
+
+# Entry point group for tools provided by other packages
+ENTRY_POINT_GROUP = "fhir_scripts.tools"
+MANIFEST_NAME = "tools.json"
+
+
+class Tool:
+    """
+    Entry of the tool registry
+
+    Describes a tool without importing its module. `name` is used on the command line and in the config,
+    `tool_name` is the human readable name (`__tool_name__` of the module) and `capabilities` lists the functions the
+    module provides. `installer` (`__installer__` of the module) names the package manager used to update the tool,
+    tools using the same one cannot be updated at the same time. The module itself is only imported using `load`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        tool_name: str,
+        capabilities: list[str],
+        installer: str | None = None,
+    ):
+        self.name = name
+        self.module = module
+        self.tool_name = tool_name
+        self.capabilities = capabilities
+        self.installer = installer
+
+    def __repr__(self) -> str:
+        return "<tool={}>".format(self.name)
+
+    def has(self, capability: str) -> bool:
+        return capability in self.capabilities
+
+    def load(self) -> ModuleType:
+        return importlib.import_module(self.module)
+
+
+BUILTIN_TOOLS = {
+    tool.name: tool
+    for tool in [
+        Tool("epatools", __name__ + ".epatools", "epatools", CAPABILITIES, "python"),
+        Tool(
+            "fhir_pkg_tool",
+            __name__ + ".fhir_pkg_tool",
+            "FHIR Package Snapshot Tool",
+            CAPABILITIES,
+        ),
+        Tool(
+            "fhirscripts",
+            __name__ + ".fhirscripts",
+            "fhirscripts",
+            CAPABILITIES,
+            "python",
+        ),
+        Tool(
+            "firely_terminal",
+            __name__ + ".firely_terminal",
+            "Firely Terminal",
+            CAPABILITIES,
+            "dotnet",
+        ),
+        Tool("gcloud", __name__ + ".gcloud", "gCloud SDK", [VERSION, LATEST_VERSION]),
+        Tool("igpub", __name__ + ".igpub", "IG Publisher", CAPABILITIES),
+        Tool("igtools", __name__ + ".igtools", "igtools", CAPABILITIES, "python"),
+        Tool(
+            "publishtools",
+            __name__ + ".publishtools",
+            "publishtools",
+            CAPABILITIES,
+            "python",
+        ),
+        Tool("sushi", __name__ + ".sushi", "FSH Sushi", CAPABILITIES, "npm"),
+    ]
+}
+
+
+def get_tools(capability: str | None = None) -> dict[str, Tool]:
+    """
+    Get all registered tools
+
+    Contains the builtin tools and the ones registered by other packages using the entry point group
+    `fhir_scripts.tools`. If `capability` is provided, only tools having this capability are returned.
+    """
+    tools = BUILTIN_TOOLS | _entry_point_tools()
+
+    return {
+        name: tool
+        for name, tool in tools.items()
+        if capability is None or tool.has(capability)
+    }
+
+
+def get_tool(name: str) -> Tool | None:
+    return get_tools().get(name)
+
+
+def _entry_point_tools() -> dict[str, Tool]:
+    """
+    Get the tools registered by other packages
+
+    Their description is read from the manifest in the cache dir and only modules not described there are imported
+    once to add them.
+    """
+    from importlib.metadata import entry_points
+
+    from .. import log
+    from ..helper import cache_dir
+
+    eps = sorted(entry_points(group=ENTRY_POINT_GROUP), key=lambda ep: ep.name)
+    if not eps:
+        return {}
+
+    manifest_file = cache_dir() / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_file.read_text("utf-8"))
+
+    except (OSError, ValueError):
+        manifest = {}
+
+    tools = {}
+    changed = False
+    for ep in eps:
+        # Changes of the providing package invalidate the entry
+        key = "{}={}@{}".format(
+            ep.name, ep.value, ep.dist.version if ep.dist else "n/a"
+        )
+
+        if (entry := manifest.get(key)) is None:
+            try:
+                module = importlib.import_module(ep.module)
+
+            except Exception as e:
+                log.warn(f"Tool '{ep.name}' could not be loaded, skipping: {str(e)}")
+                continue
+
+            entry = {
+                "tool_name": getattr(module, "__tool_name__", None) or ep.name,
+                "capabilities": [c for c in CAPABILITIES if hasattr(module, c)],
+                "installer": getattr(module, "__installer__", None),
+            }
+            manifest[key] = entry
+            changed = True
+
+        tools[ep.name] = Tool(
+            ep.name,
+            ep.module,
+            entry["tool_name"],
+            entry["capabilities"],
+            entry.get("installer"),
+        )
+
+    if changed:
+        try:
+            manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            manifest_file.write_text(json.dumps(manifest, indent=2), "utf-8")
+
+        except OSError:
+            pass
+
+    return tools
@@ -0,0 +1,289 @@
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+# Size of the chunks copied between archives
+COPY_SIZE = 1024 * 1024
+
+# Header ID of the extra field holding the sizes of large entries, written again as needed
+ZIP64_EXTRA_ID = 0x0001
+
+# Bit of the flags of an entry, which is set if its sizes follow the data instead of being in the local header
+DATA_DESCRIPTOR_FLAG = 0x08
+
+DEFAULT_LEVEL = 6
+
+# Date and attributes of written entries, so the same files always result in the same archive
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_ATTR = 0o100644 << 16
+UNIX_SYSTEM = 3
+
+# Files compressed ahead of writing them per worker, limits the memory used
+PENDING_PER_WORKER = 4
+
+# Compressed data of a file larger than this is kept in a temporary file until written
+SPOOL_SIZE = 4 * 1024 * 1024
+
+# Internals of `ZipFile` used to write entries that are already compressed
+RAW_ATTRIBUTES = ["fp", "filelist", "NameToInfo", "start_dir", "_didModify"]
+
+
+def update(
+    archive: Path,
+    files: dict[str, Path],
+    level: int = DEFAULT_LEVEL,
+    workers: int | None = None,
+) -> tuple[int, int]:
+    """
+    Add or replace `files` (archive name to file) in a zip archive, returns the number of entries copied and written
+
+    Entries not replaced are copied as they are, without decompressing and compressing them again, so only the new
+    files are compressed (see `write_files`). If `zipfile` does not support this (see `raw_supported`), the entries are
+    compressed again. The new archive is written next to the old one and replaces it once complete.
+    """
+    tmp_file = archive.with_name(f"{archive.name}.{os.getpid()}.tmp")
+
+    try:
+        with ZipFile(archive, "r") as src, ZipFile(tmp_file, "w") as dest:
+            copy = copy_raw if raw_supported(src, dest) else _copy_entry
+
+            copied = 0
+            for info in src.infolist():
+                if info.filename not in files:
+                    copy(src, dest, info)
+                    copied += 1
+
+            write_files(dest, files, level, workers)
+
+        tmp_file.replace(archive)
+
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+    return copied, len(files)
+
+
+def write_files(
+    dest: ZipFile,
+    files: dict[str, Path],
+    level: int = DEFAULT_LEVEL,
+    workers: int | None = None,
+):
+    """
+    Compress `files` (archive name to file) using multiple threads and write them to an archive
+
+    Files are read and compressed in chunks, large compressed files are kept in temporary files until written, so the
+    memory used does not depend on the size of the files.
+
+    The entries are written ordered by their name, with a fixed date and attributes, so the same files and compression
+    level always result in the same bytes. `workers` defaults to the number of CPUs. If `zipfile` does not support
+    writing compressed entries (see `raw_supported`), the files are compressed one after another by `zipfile`.
+    """
+    workers = workers or os.cpu_count() or 1
+    names = sorted(files.keys())
+
+    if not raw_supported(dest):
+        for name in names:
+            _write_file(dest, name, files[name], level)
+
+        return
+
+    # zlib releases the GIL while compressing, so threads run in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        for name in names:
+            pending.append((name, executor.submit(_compress, files[name], level)))
+
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                _write_compressed(dest, *_result(pending.popleft()))
+
+        while pending:
+            _write_compressed(dest, *_result(pending.popleft()))
+
+
+def raw_supported(*archives: ZipFile) -> bool:
+    """
+    Check if entries can be copied and written in their compressed form
+
+    This uses internals of `zipfile`, which may change with any release of Python, so they are checked first.
+    """
+    return (
+        callable(getattr(ZipInfo, "FileHeader", None))
+        and all(
+            hasattr(archive, name) for archive in archives for name in RAW_ATTRIBUTES
+        )
+        and all(
+            isinstance(archive.filelist, list) and isinstance(archive.NameToInfo, dict)
+            for archive in archives
+        )
+    )
+
+
+def copy_raw(src: ZipFile, dest: ZipFile, info: ZipInfo):
+    """
+    Copy an entry between archives in its compressed form
+    """
+    # The local header may differ from the central directory, e.g. in the extra field, so skip it as it is
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(30)
+    name_length = int.from_bytes(header[26:28], "little")
+    extra_length = int.from_bytes(header[28:30], "little")
+    src.fp.seek(info.header_offset + 30 + name_length + extra_length)
+
+    # The sizes are known, so they are written to the local header instead of a data descriptor
+    copied = ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    copied.comment = info.comment
+    copied.extra = strip_extra(info.extra, ZIP64_EXTRA_ID)
+    copied.create_system = info.create_system
+    copied.create_version = info.create_version
+    copied.extract_version = info.extract_version
+    copied.flag_bits = info.flag_bits & ~DATA_DESCRIPTOR_FLAG
+    copied.internal_attr = info.internal_attr
+    copied.external_attr = info.external_attr
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+
+    _write_raw(dest, copied, lambda: _copy(src.fp, dest.fp, info.compress_size))
+
+
+def strip_extra(extra: bytes, header_id: int) -> bytes:
+    """
+    Remove the fields with `header_id` from the extra field of an entry
+    """
+    stripped = b""
+    pos = 0
+
+    # Each field is a header ID and the size of its data (2 bytes each) followed by the data
+    while pos + 4 <= len(extra):
+        field_id = int.from_bytes(extra[pos : pos + 2], "little")
+        end = pos + 4 + int.from_bytes(extra[pos + 2 : pos + 4], "little")
+
+        if field_id != header_id:
+            stripped += extra[pos:end]
+
+        pos = end
+
+    return stripped
+
+
+def _copy_entry(src: ZipFile, dest: ZipFile, info: ZipInfo):
+    copied = ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    copied.comment = info.comment
+    copied.create_system = info.create_system
+    copied.internal_attr = info.internal_attr
+    copied.external_attr = info.external_attr
+    copied.file_size = info.file_size
+
+    with (
+        src.open(info) as reader,
+        dest.open(
+            copied, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT
+        ) as writer,
+    ):
+        shutil.copyfileobj(reader, writer, COPY_SIZE)
+
+
+def _write_file(dest: ZipFile, name: str, file: Path, level: int):
+    info = _fixed_info(name)
+    _set_level(info, level)
+    info.file_size = file.stat().st_size
+
+    with (
+        file.open("rb") as reader,
+        dest.open(
+            info, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT
+        ) as writer,
+    ):
+        shutil.copyfileobj(reader, writer, COPY_SIZE)
+
+
+def _fixed_info(name: str) -> ZipInfo:
+    info = ZipInfo(name, FIXED_DATE_TIME)
+    info.compress_type = ZIP_DEFLATED
+    info.create_system = UNIX_SYSTEM
+    info.external_attr = FIXED_ATTR
+
+    return info
+
+
+def _set_level(info: ZipInfo, level: int):
+    # The level of an entry is public since Python 3.13
+    if hasattr(ZipInfo, "compress_level"):
+        info.compress_level = level
+
+    else:
+        info._compresslevel = level
+
+
+def _compress(file: Path, level: int) -> tuple:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    crc, size = 0, 0
+
+    try:
+        with file.open("rb") as f:
+            while chunk := f.read(COPY_SIZE):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                compressed.write(compressor.compress(chunk))
+
+        compressed.write(compressor.flush())
+        compressed.seek(0)
+
+    except BaseException:
+        compressed.close()
+        raise
+
+    return compressed, crc, size
+
+
+def _result(pending: tuple) -> tuple:
+    name, future = pending
+    return (name, *future.result())
+
+
+def _write_compressed(dest: ZipFile, name: str, compressed, crc: int, size: int):
+    with compressed:
+        info = _fixed_info(name)
+        info.CRC = crc
+        info.compress_size = compressed.seek(0, os.SEEK_END)
+        info.file_size = size
+        compressed.seek(0)
+
+        _write_raw(dest, info, lambda: _copy(compressed, dest.fp, info.compress_size))
+
+
+def _write_raw(dest: ZipFile, info: ZipInfo, write_data):
+    """
+    Write an entry with its data already compressed, `write_data` writes `info.compress_size` bytes to `dest.fp`
+    """
+    info.header_offset = dest.fp.tell()
+    dest.fp.write(info.FileHeader())
+    write_data()
+
+    # Register the entry, so it is part of the central directory written on close
+    dest.filelist.append(info)
+    dest.NameToInfo[info.filename] = info
+    dest.start_dir = dest.fp.tell()
+    dest._didModify = True
+
+
+def _copy(src, dest, size: int):
+    while size > 0:
+        chunk = src.read(min(COPY_SIZE, size))
+        if not chunk:
+            raise EOFError("Archive entry is truncated")
+
+        dest.write(chunk)
+        size -= len(chunk)
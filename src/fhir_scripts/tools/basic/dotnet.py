@@ -2,7 +2,7 @@ __tool_name__ = ".NET"
 
 from ...helper import require_installed
 from ...version import Version
-from . import shell
+from . import shell, version_cache
 
 
 @require_installed("dotnet", __tool_name__)
@@ -29,6 +29,7 @@ def update(pkg_name: str):
         )
 
 
+@version_cache.cached("dotnet")
 def version(*args, **kwargs) -> Version | None:
     """
     Get the installed version, returns None if not installed
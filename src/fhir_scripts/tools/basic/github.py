@@ -2,9 +2,8 @@ import json
 import re
 from datetime import datetime
 
-import requests
-
 from ...version import Version
+from . import http
 
 REPO_REGEX = re.compile(r"https://github\.com/([^/]+/[^/]+)")
 
@@ -16,7 +15,7 @@ def latest_version_number(repo_url: str) -> Version | None:
         return None
 
     url = f"https://api.github.com/repos/{match[1]}/releases"
-    response = requests.get(url)
+    response = http.get(url)
     if response.status_code != 200:
         return None
 
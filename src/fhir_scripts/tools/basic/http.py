@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from ... import log
+from ...helper import cache_dir
+
+CACHE_NAME = "http"
+
+# Time in seconds a cached response is used without asking the server again
+DEFAULT_TTL = 3600
+
+# Number of connections kept open per host
+POOL_SIZE = 8
+
+
+_lock = threading.Lock()
+_session = None
+
+
+class Response:
+    def __init__(
+        self,
+        status_code: int,
+        text: str = "",
+        headers: dict[str, str] | None = None,
+        from_cache: bool = False,
+    ):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    def __repr__(self) -> str:
+        return "<response={}{}>".format(
+            self.status_code, " (cached)" if self.from_cache else ""
+        )
+
+
+def ttl() -> int:
+    """
+    Get the time to live of cached responses, can be set using `$FHIR_SCRIPTS_HTTP_TTL` in seconds
+    """
+    try:
+        return int(os.environ.get("FHIR_SCRIPTS_HTTP_TTL", DEFAULT_TTL))
+
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def offline() -> bool:
+    """
+    Check if offline mode is enabled using `$FHIR_SCRIPTS_OFFLINE`, only cached responses are used then
+    """
+    return os.environ.get("FHIR_SCRIPTS_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def session():
+    """
+    Get the HTTP session shared by all requests, so connections are reused
+    """
+    global _session
+
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+
+    return _session
+
+
+def get(url: str, max_age: int | None = None) -> Response:
+    """
+    Get `url` using the response cache
+
+    A cached response younger than `max_age` seconds (default see `ttl`) is returned directly. Otherwise the server is
+    asked if it changed using `ETag` and `Last-Modified`. In offline mode or if the server cannot be reached, a cached
+    response is returned regardless of its age. Only successful responses are cached.
+    """
+    max_age = ttl() if max_age is None else max_age
+    entry = _read(url)
+
+    if entry is not None and (offline() or time.time() - entry["time"] < max_age):
+        return _response(entry)
+
+    if offline():
+        return Response(504)
+
+    headers = {}
+    if entry is not None:
+        if etag := entry["headers"].get("etag"):
+            headers["If-None-Match"] = etag
+
+        if last_modified := entry["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = last_modified
+
+    try:
+        res = session().get(url, headers=headers, timeout=30)
+
+    except OSError as e:
+        if entry is None:
+            raise e
+
+        log.warn(f"Could not reach {url}, using cached response: {str(e)}")
+        return _response(entry)
+
+    if res.status_code == 304 and entry is not None:
+        entry["time"] = time.time()
+        _write(url, entry)
+        return _response(entry)
+
+    if res.status_code == 200:
+        _write(
+            url,
+            {
+                "url": url,
+                "time": time.time(),
+                "headers": {
+                    key: value
+                    for key in ["etag", "last-modified", "content-type"]
+                    if (value := res.headers.get(key)) is not None
+                },
+                "text": res.text,
+            },
+        )
+
+    return Response(res.status_code, res.text, dict(res.headers))
+
+
+@contextmanager
+def stream(url: str) -> Iterator[BinaryIO]:
+    """
+    Open `url` to read its content while it is downloaded, without keeping it in memory or on disk
+
+    Responses are not cached, so this fails in offline mode.
+    """
+    if offline():
+        raise Exception(f"Cannot download {url} in offline mode")
+
+    with session().get(url, stream=True, timeout=30) as res:
+        if res.status_code != 200:
+            raise Exception(f"Could not download {url}: HTTP {res.status_code}")
+
+        # Undo a compression of the transfer, not of the content itself
+        res.raw.decode_content = True
+        yield res.raw
+
+
+def _cache_file(url: str) -> Path:
+    return (
+        cache_dir() / CACHE_NAME / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+    )
+
+
+def _read(url: str) -> dict | None:
+    try:
+        entry = json.loads(_cache_file(url).read_text("utf-8"))
+
+    except (OSError, ValueError):
+        return None
+
+    return entry if entry.get("url") == url else None
+
+
+def _write(url: str, entry: dict):
+    cache_file = _cache_file(url)
+    tmp_file = cache_file.with_name(
+        f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file.write_text(json.dumps(entry), "utf-8")
+        tmp_file.replace(cache_file)
+
+    except OSError:
+        tmp_file.unlink(missing_ok=True)
+
+
+def _response(entry: dict) -> Response:
+    return Response(200, entry["text"], entry["headers"], from_cache=True)
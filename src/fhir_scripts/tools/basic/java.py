@@ -1,27 +1,274 @@
 __tool_name__ = "Java"
 
+import hashlib
+import os
 import re
+import shlex
+import tempfile
+import time
+from functools import cache
 from pathlib import Path
 
-from ...exception import PrerequisiteFailed
-from ...helper import require_installed
+from ... import log
+from ...exception import NotInstalledException, PrerequisiteFailed
+from ...helper import cache_dir
 from ...version import Version
-from . import shell
+from . import jvm, shell, version_cache
 
 VERSION_REGEX = re.compile(
     r"\w*jdk\w*\s+version\s+\"(\d+(?:\.\d+){,2})\"", re.IGNORECASE
 )
+PROPERTY_REGEX = re.compile(r"^\s*([\w\.]+)\s+=\s+(.*)$")
 
+# JVM features and the major version they are available from
+FEATURES = {
+    "unified_logging": 9,
+    "container_support": 10,
+    "dynamic_cds": 13,
+    "auto_cds": 19,
+}
 
-@require_installed("java", __tool_name__)
-def run_jar(jar: Path, *args, check: bool = False, log_output: bool = True):
+# Class data sharing archives are stored in the cache directory
+CDS_CACHE_NAME = "cds"
 
-    cmd = f"java -jar {str(jar)} {' '.join(args)}"
 
-    res = shell.run(cmd, check=check, log_output=log_output)
+class JavaRuntime:
+    """
+    Description of the Java runtime
+
+    Holds the resolved `path` of the Java executable, its `version`, `vendor` and the `features` of the JVM (see
+    `FEATURES`) that can be used when launching it.
+    """
+
+    def __init__(
+        self, path: str, version: Version, vendor: str | None, features: list[str]
+    ):
+        self.path = path
+        self.version = version
+        self.vendor = vendor
+        self.features = features
+
+    def __repr__(self) -> str:
+        return "<java={} ({})>".format(self.version, self.vendor)
+
+    def has(self, feature: str) -> bool:
+        return feature in self.features
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "version": str(self.version),
+            "vendor": self.vendor,
+            "features": self.features,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "JavaRuntime":
+        return JavaRuntime(
+            data["path"], Version(data["version"]), data["vendor"], data["features"]
+        )
+
+
+@cache
+def runtime() -> JavaRuntime | None:
+    """
+    Get the Java runtime, returns None if not installed
+
+    It is detected once per process and cached on disk as long as the Java executable does not change.
+    """
+    return _detect_runtime()
+
+
+@version_cache.cached("java", dump=JavaRuntime.to_dict, load=JavaRuntime.from_dict)
+def _detect_runtime() -> JavaRuntime | None:
+    if (path := shell.which("java")) is None:
+        return None
+
+    try:
+        res = shell.run(
+            [path, "-XshowSettings:properties", "-version"],
+            check=True,
+            log_output=False,
+        )
+
+    except shell.CalledProcessError:
+        return None
+
+    properties = {
+        match[1]: match[2].strip()
+        for line in res.stdout
+        if (match := PROPERTY_REGEX.match(line))
+    }
+
+    # Fall back to the version output, e.g. `openjdk version "21.0.2"`
+    if (version_str := properties.get("java.version")) is None:
+        match = VERSION_REGEX.search(res.stdout_oneline)
+        version_str = match[1] if match else None
+
+    # Old version scheme, e.g. 1.8.0_392 is Java 8
+    if version_str is not None and version_str.startswith("1."):
+        version_str = version_str.removeprefix("1.")
+
+    version = Version(version_str)
+    major = int(version.major) if version.major and version.major.isdigit() else 0
+
+    return JavaRuntime(
+        path=path,
+        version=version,
+        vendor=properties.get("java.vendor"),
+        features=[feature for feature, since in FEATURES.items() if major >= since],
+    )
+
+
+def run_jar(
+    jar: Path,
+    *args,
+    check: bool = False,
+    log_output: bool = True,
+    create_cds: bool = False,
+    jvm_options: list[str] | None = None,
+    log_gc: bool = False,
+    **kwargs,
+):
+    """
+    Run a jar file, further keyword arguments are passed to `shell.run`
+
+    The class data sharing archive of the jar is used if it exists to speed up the start of the JVM. With
+    `create_cds` the archive is created from the classes loaded during this run, so it should only be set for runs
+    representative of the usual use of the jar. `jvm_options` are passed to the JVM (see `jvm.options`) and with
+    `log_gc` the time spent for garbage collection is logged after the run.
+    """
+    if (java := runtime()) is None:
+        raise NotInstalledException(f"{__tool_name__} is needed but not installed")
+
+    gc_log = None
+    if log_gc and java.has("unified_logging"):
+        fd, gc_log = tempfile.mkstemp(prefix="fhirscripts-gc-", suffix=".log")
+        os.close(fd)
+        gc_log = Path(gc_log)
+
+    # Arguments may contain multiple arguments separated by spaces, e.g. "-ig ."
+    cmd = (
+        [java.path]
+        + (jvm_options or [])
+        + (jvm.gc_log_options(gc_log) if gc_log else [])
+        + cds_args(jar, create=create_cds)
+        + ["-jar", str(jar)]
+        + [part for arg in args for part in shlex.split(arg)]
+    )
+
+    start = time.perf_counter()
+    try:
+        res = shell.run(cmd, check=check, log_output=log_output, **kwargs)
+
+    finally:
+        if gc_log is not None:
+            _log_gc(gc_log, time.perf_counter() - start)
+            gc_log.unlink(missing_ok=True)
+
     return res
 
 
+def _log_gc(gc_log: Path, duration: float):
+    pauses, total = jvm.gc_summary(gc_log)
+
+    log.info(
+        "Garbage collection: {} pauses, {:.1f} s ({:.0f}% of {:.1f} s)".format(
+            pauses, total / 1000, total / 10 / duration if duration else 0, duration
+        )
+    )
+
+
+def cds_archive(jar: Path) -> Path | None:
+    """
+    Get the path of the class data sharing archive of `jar`, returns None if the jar or Java are not installed
+
+    The archive is specific to the jar and the Java runtime, so a new archive is used as soon as one of them changes.
+    """
+    if (java := runtime()) is None:
+        return None
+
+    try:
+        stat = jar.stat()
+
+    except OSError:
+        return None
+
+    jar_path = os.path.realpath(jar)
+    state = "|".join(
+        [
+            jar_path,
+            str(stat.st_mtime_ns),
+            str(stat.st_size),
+            java.path,
+            str(java.version),
+        ]
+    )
+
+    return (
+        cache_dir()
+        / CDS_CACHE_NAME
+        / "{}-{}-{}.jsa".format(
+            jar.stem,
+            hashlib.sha256(jar_path.encode()).hexdigest()[:8],
+            hashlib.sha256(state.encode()).hexdigest()[:16],
+        )
+    )
+
+
+def cds_in_use(jar: Path) -> bool:
+    """
+    Check if the jar is started using a class data sharing archive
+    """
+    return (archive := cds_archive(jar)) is not None and archive.exists()
+
+
+def remove_cds_archives(jar: Path, keep: Path | None = None):
+    """
+    Remove the class data sharing archives of `jar`, except `keep`
+    """
+    jar_path = os.path.realpath(jar)
+    pattern = "{}-{}-*.jsa".format(
+        jar.stem, hashlib.sha256(jar_path.encode()).hexdigest()[:8]
+    )
+
+    for archive in (cache_dir() / CDS_CACHE_NAME).glob(pattern):
+        if archive != keep:
+            archive.unlink(missing_ok=True)
+
+
+def cds_args(jar: Path, create: bool = False) -> list[str]:
+    """
+    Get the JVM arguments to use the class data sharing archive of `jar`, creating it if `create` is set
+
+    Requires Java 13 to create archives, starting with Java 19 the JVM recreates invalid archives by itself.
+    """
+    if (java := runtime()) is None or not java.has("dynamic_cds"):
+        return []
+
+    if (archive := cds_archive(jar)) is None:
+        return []
+
+    if archive.exists():
+        # Recreated by the JVM if it does not match anymore
+        if create and java.has("auto_cds"):
+            return [f"-XX:SharedArchiveFile={archive}", "-XX:+AutoCreateSharedArchive"]
+
+        return [f"-XX:SharedArchiveFile={archive}"]
+
+    if not create:
+        return []
+
+    # Archives of previous versions of the jar are not used anymore
+    remove_cds_archives(jar, keep=archive)
+    archive.parent.mkdir(parents=True, exist_ok=True)
+
+    if java.has("auto_cds"):
+        return [f"-XX:SharedArchiveFile={archive}", "-XX:+AutoCreateSharedArchive"]
+
+    return [f"-XX:ArchiveClassesAtExit={archive}"]
+
+
 def require_min_version(min: Version):
     if not has_min_version(min):
         raise PrerequisiteFailed(
@@ -31,20 +278,12 @@ def require_min_version(min: Version):
         )
 
 
-def has_min_version(min: Version):
-    return (v := version()) and min >= v
+def has_min_version(min: Version) -> bool:
+    return (v := version()) is not None and v >= min
 
 
 def version(*args, **kwargs) -> Version | None:
     """
     Get the installed version, returns None if not installed
     """
-    try:
-        res = shell.run("java -version", check=True, log_output=False)
-
-        # Extract the version string from output
-        match = VERSION_REGEX.search(res.stdout_oneline)
-        return Version(match[1] if match else None)
-
-    except shell.CalledProcessError:
-        return None
+    return java.version if (java := runtime()) else None
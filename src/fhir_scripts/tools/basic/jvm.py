@@ -0,0 +1,158 @@
+import os
+import re
+from pathlib import Path
+
+CGROUP_DIR = Path("/sys/fs/cgroup")
+
+# Values at least this high mean no limit in cgroup v1
+CGROUP_V1_UNLIMITED = 1 << 60
+
+# Part of the available memory used for the heap, the rest is needed by the JVM itself and other processes
+HEAP_FRACTION = 0.75
+
+# Below these limits the JVM does not benefit from a parallel collector
+MIN_PARALLEL_GC_CPUS = 2
+MIN_PARALLEL_GC_MEMORY = 1792 * 1024 * 1024
+
+GC_OPTIONS = {
+    "g1": "-XX:+UseG1GC",
+    "parallel": "-XX:+UseParallelGC",
+    "serial": "-XX:+UseSerialGC",
+    "z": "-XX:+UseZGC",
+    "shenandoah": "-XX:+UseShenandoahGC",
+}
+
+GC_PAUSE_REGEX = re.compile(r"\bPause\b.*?(\d+(?:\.\d+)?)ms\s*$")
+
+
+def memory_limit() -> int | None:
+    """
+    Get the memory available in bytes, respecting the limits of a container (cgroup v2 or v1)
+    """
+    for limit_file in [
+        CGROUP_DIR / "memory.max",
+        CGROUP_DIR / "memory" / "memory.limit_in_bytes",
+    ]:
+        value = _read(limit_file)
+        if value is not None and value.isdigit() and int(value) < CGROUP_V1_UNLIMITED:
+            return int(value)
+
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def cpu_limit() -> float | None:
+    """
+    Get the number of CPUs available, respecting the limits of a container (cgroup v2 or v1)
+    """
+    # cgroup v2, e.g. "200000 100000" or "max 100000"
+    if (value := _read(CGROUP_DIR / "cpu.max")) is not None:
+        quota, _, period = value.partition(" ")
+        if quota.isdigit() and period.isdigit() and int(period) > 0:
+            return int(quota) / int(period)
+
+    # cgroup v1, -1 if not limited
+    quota = _read(CGROUP_DIR / "cpu" / "cpu.cfs_quota_us")
+    period = _read(CGROUP_DIR / "cpu" / "cpu.cfs_period_us")
+    if quota and period and quota.isdigit() and period.isdigit() and int(period) > 0:
+        return int(quota) / int(period)
+
+    try:
+        return len(os.sched_getaffinity(0))
+
+    except AttributeError:
+        return os.cpu_count()
+
+
+def options(
+    max_heap: str | None = None,
+    gc: str | None = None,
+    gc_threads: int | None = None,
+) -> list[str]:
+    """
+    Get the JVM options for heap size and garbage collector
+
+    Values not given are derived from the memory and CPUs available: the heap uses `HEAP_FRACTION` of the memory, a
+    parallel collector (G1) is used if there are enough resources and it uses one thread per CPU. `max_heap` is
+    either a size like `6g` or a percentage of the available memory like `75%`.
+    """
+    memory = memory_limit()
+    cpus = cpu_limit()
+
+    result = []
+
+    if max_heap is not None and max_heap.endswith("%"):
+        result.append(f"-XX:MaxRAMPercentage={float(max_heap[:-1])}")
+
+    elif max_heap is not None:
+        result.append(f"-Xmx{max_heap}")
+
+    elif memory is not None:
+        result.append(f"-Xmx{int(memory * HEAP_FRACTION) // (1024 * 1024)}m")
+
+    if gc is None:
+        small = (cpus is not None and cpus < MIN_PARALLEL_GC_CPUS) or (
+            memory is not None and memory < MIN_PARALLEL_GC_MEMORY
+        )
+        gc = "serial" if small else "g1"
+
+    if (gc_option := GC_OPTIONS.get(gc.lower())) is None:
+        raise Exception(
+            "Unknown garbage collector '{}', use one of {}".format(
+                gc, ", ".join(GC_OPTIONS.keys())
+            )
+        )
+
+    result.append(gc_option)
+
+    if gc_threads is None and cpus is not None and gc.lower() != "serial":
+        gc_threads = max(1, round(cpus))
+
+    if gc_threads is not None:
+        result.append(f"-XX:ParallelGCThreads={gc_threads}")
+
+    return result
+
+
+def config_options(config) -> list[str]:
+    """
+    Get the JVM options from the settings of a tool (see `BuildJvmToolConfig`)
+    """
+    return options(config.max_heap, config.gc, config.gc_threads) + config.args
+
+
+def gc_log_options(log_file: Path) -> list[str]:
+    """
+    Get the JVM options to log the garbage collection to `log_file`, requires Java 9
+    """
+    return [f"-Xlog:gc:file={log_file}"]
+
+
+def gc_summary(log_file: Path) -> tuple[int, float]:
+    """
+    Get the number of pauses and their total duration in milliseconds from a garbage collection log
+    """
+    pauses, total = 0, 0.0
+
+    try:
+        with log_file.open(encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if match := GC_PAUSE_REGEX.search(line):
+                    pauses += 1
+                    total += float(match[1])
+
+    except OSError:
+        pass
+
+    return pauses, total
+
+
+def _read(file: Path) -> str | None:
+    try:
+        return file.read_text().strip()
+
+    except OSError:
+        return None
@@ -4,7 +4,7 @@ from pathlib import Path
 
 from ...helper import require_installed
 from ...version import Version
-from . import shell
+from . import shell, version_cache
 
 
 @require_installed("npm", __tool_name__)
@@ -16,7 +16,8 @@ def install(pkg_name: str, as_global: bool = False):
     else:
         cmd = f"npm install {pkg_name}"
 
-    res = shell.run(cmd)
+    # sudo may ask for a password
+    res = shell.run(cmd, interactive=as_global)
 
     if res.returncode != 0:
         raise shell.CalledProcessError(
@@ -24,6 +25,7 @@ def install(pkg_name: str, as_global: bool = False):
         )
 
 
+@version_cache.cached("npm", "node")
 def version(*args, **kwargs) -> Version | None:
     """
     Get the installed version, returns None if not installed
@@ -0,0 +1,86 @@
+import re
+
+from ...exception import OutputAbortedException
+
+ERROR = "error"
+WARNING = "warning"
+
+# Number of records kept, further errors and warnings are only counted
+MAX_RECORDS = 100
+
+
+class OutputRecord:
+    """
+    An error or warning found in the output of a tool, `line` is the number of the output line
+    """
+
+    def __init__(self, level: str, text: str, line: int):
+        self.level = level
+        self.text = text
+        self.line = line
+
+    def __repr__(self) -> str:
+        return "<{}={}>".format(self.level, self.text)
+
+
+class OutputParser:
+    """
+    Follows the output of a tool line by line, e.g. as `on_line` of `shell.run`
+
+    Lines matching `error` or `warning` are counted and recorded. If a line matches one of the `fatal` patterns or
+    more than `max_errors` errors are found, an `OutputAbortedException` is raised, which stops the tool when used
+    with `shell.run`.
+    """
+
+    def __init__(
+        self,
+        error: re.Pattern,
+        warning: re.Pattern,
+        fatal: list[re.Pattern | str] = [],
+        max_errors: int | None = None,
+    ):
+        self.error = error
+        self.warning = warning
+        self.fatal = [re.compile(pattern) for pattern in fatal]
+        self.max_errors = max_errors
+
+        self.errors = 0
+        self.warnings = 0
+        self.records: list[OutputRecord] = []
+        self._line = 0
+
+    def __call__(self, line: str):
+        self._line += 1
+
+        for pattern in self.fatal:
+            if pattern.search(line):
+                self._record(ERROR, line)
+                self.errors += 1
+                raise OutputAbortedException(f"Fatal output: {line}")
+
+        if self.error.search(line):
+            self._record(ERROR, line)
+            self.errors += 1
+
+            if self.max_errors is not None and self.errors >= self.max_errors:
+                raise OutputAbortedException(
+                    f"Reached the maximum of {self.max_errors} error(s), last: {line}"
+                )
+
+        elif self.warning.search(line):
+            self._record(WARNING, line)
+            self.warnings += 1
+
+    def __repr__(self) -> str:
+        return "<output errors={} warnings={}>".format(self.errors, self.warnings)
+
+    @property
+    def error_records(self) -> list[OutputRecord]:
+        return [record for record in self.records if record.level == ERROR]
+
+    def summary(self) -> str:
+        return "{} error(s), {} warning(s)".format(self.errors, self.warnings)
+
+    def _record(self, level: str, text: str):
+        if len(self.records) < MAX_RECORDS:
+            self.records.append(OutputRecord(level, text, self._line))
@@ -2,38 +2,39 @@ __tool_name__ = "pipx"
 
 import re
 import tomllib
+from functools import cache
 
-import requests
-
-from ...helper import NotInstalledException, check_installed
+from ...helper import is_installed
 from ...version import Version
-from . import shell
+from . import http, shell, version_cache
 
 VERSION_REGEX = re.compile(r"Python\s+(\d+(?:\.\d+){,2})\b", re.IGNORECASE)
 VERSION_FILE_REGEX = re.compile(
     r"(?:Version\()?['\"]?([\d\.]+)['\"]?\)?", re.IGNORECASE
 )
 
-try:
-    check_installed("uv", __tool_name__)
-    UV_AVAILABLE = True
 
-except NotInstalledException:
-    UV_AVAILABLE = False
+@cache
+def uv_available() -> bool:
+    """
+    Checks if uv is installed, only checked once when needed
+    """
+    return is_installed("uv")
 
-try:
-    check_installed("pipx", __tool_name__)
-    PIPX_AVAILABLE = True
 
-except NotInstalledException:
-    PIPX_AVAILABLE = False
+@cache
+def pipx_available() -> bool:
+    """
+    Checks if pipx is installed, only checked once when needed
+    """
+    return is_installed("pipx")
 
 
 def install(pkg_name: str, as_global: bool = False):
-    if UV_AVAILABLE:
+    if uv_available():
         cmd = "uv tool install --force {}"
 
-    elif PIPX_AVAILABLE:
+    elif pipx_available():
         if as_global:
             cmd = "sudo pipx install -f --global {}"
 
@@ -43,7 +44,8 @@ def install(pkg_name: str, as_global: bool = False):
     else:
         raise Exception("No Python manager installed")
 
-    res = shell.run(cmd.format(pkg_name))
+    # sudo may ask for a password
+    res = shell.run(cmd.format(pkg_name), interactive=as_global)
 
     if res.returncode != 0:
         raise shell.CalledProcessError(
@@ -55,7 +57,7 @@ def latest_version_number(url: str) -> Version | None:
     url_raw = url.removeprefix("git+").removesuffix(".git") + "/raw/main/"
 
     pyproject_url = url_raw + "pyproject.toml"
-    content = requests.get(pyproject_url)
+    content = http.get(pyproject_url)
 
     if content.status_code != 200:
         return None
@@ -82,7 +84,7 @@ def latest_version_number(url: str) -> Version | None:
             file = file.replace(".", "/") + ".py"
             version_url = url_raw + "src/" + file
 
-            content = requests.get(version_url).text
+            content = http.get(version_url).text
 
             attrs = {
                 split[0].strip().strip("'"): split[1].strip().strip("'")
@@ -100,6 +102,7 @@ def latest_version_number(url: str) -> Version | None:
     return Version()
 
 
+@version_cache.cached("python3")
 def version(*args, **kwargs) -> Version | None:
     """
     Get the installed version of FSH Sushi, returns None if sushi is not installed
@@ -1,15 +1,44 @@
+import asyncio
+import os
 import re
-import subprocess
-from subprocess import CalledProcessError
+import shlex
+import shutil
+import signal
+import sys
+import threading
+from collections import deque
+from contextlib import ExitStack
 from io import IOBase
-from tqdm import tqdm
+from pathlib import Path
+from subprocess import CalledProcessError, TimeoutExpired
+from typing import Callable
 
-from ... import helper, log
+from ... import helper, log, trace
 
 CalledProcessError = CalledProcessError
+TimeoutExpired = TimeoutExpired
 
 COLOR_FORMATTING = re.compile(r"(?:\x1b|\\e)\[\d+(?:;\d+)?m")
 
+# Commands containing one of these need to be executed by the shell
+SHELL_SYNTAX = re.compile(r"[|&;<>()$`\\*?\[\]{}~#\n]")
+
+# Buffer size for writing the output to a file
+LOG_FILE_BUFFER = 1024 * 1024
+
+# Size of the chunks the output is read in
+READ_SIZE = 64 * 1024
+
+# Time in seconds a terminated command gets to exit before it is killed
+TERMINATE_TIMEOUT = 5
+
+# Resolved executables per `PATH`
+_executables: dict[tuple[str, str], str] = {}
+
+# Commands currently running
+_lock = threading.Lock()
+_processes: set = set()
+
 
 class ShellResult:
     def __init__(self, process=None):
@@ -75,35 +104,125 @@ def _oneline(list_: list[str]) -> str:
     return " ".join(list_)
 
 
-def run(cmd, check: bool = False, log_output: bool = True):
+def which(cmd: str) -> str | None:
     """
-    Execute a command on the shell
+    Get the absolute path of the executable `cmd`, returns None if not found
 
-    By default the return code is not check (`check = False`), but if set to true and the return code is not equal to 0 an
-    `CalledProcessError` is raised. If `log_output` is set to `True` (default), the output of the command is printed on the command line.
+    Uses the semantics of `shutil.which`, but found executables are remembered for the current process and `PATH`.
     """
+    path = os.environ.get("PATH", os.defpath)
 
-    res = ShellResult()
-    with subprocess.Popen(
-        cmd,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-    ) as proc:
-        for line in proc.stdout:
-            line = helper.clean_string(line)
-            res.stdout.append(line)
+    if (exe := _executables.get((cmd, path))) is None:
+        # Not found executables are not remembered as they might be installed in the meantime
+        if (found := shutil.which(cmd, path=path)) is None:
+            return None
 
-            if log_output:
-                log.debug(line)
+        exe = _executables[(cmd, path)] = os.path.abspath(found)
+
+    return exe
+
+
+def _popen_args(cmd: str | list[str]) -> tuple[str | list[str], bool]:
+    """
+    Get the arguments for `Popen` and if the command needs to be executed by the shell
+
+    Simple commands are executed directly using the resolved executable. Commands using shell syntax or an executable
+    that cannot be resolved are executed by the shell.
+    """
+    if isinstance(cmd, str):
+        if SHELL_SYNTAX.search(cmd):
+            return cmd, True
+
+        try:
+            argv = shlex.split(cmd)
+
+        except ValueError:
+            return cmd, True
+
+    else:
+        argv = list(cmd)
+
+    # Variable assignments are handled by the shell
+    if not argv or "=" in argv[0] or (exe := which(argv[0])) is None:
+        return cmd if isinstance(cmd, str) else shlex.join(cmd), True
+
+    return [exe] + argv[1:], False
+
+
+def run(
+    cmd: str | list[str],
+    check: bool = False,
+    log_output: bool = True,
+    capture: int | None = None,
+    log_file: Path | None = None,
+    strip_colors: bool = True,
+    timeout: float | None = None,
+    on_line: Callable[[str], None] | None = None,
+    interactive: bool = False,
+):
+    """
+    Execute a command
+
+    `cmd` is either a command line or a list of arguments. Simple commands are executed directly, others using the
+    shell. By default the return code is not check (`check = False`), but if set to true and the return code is not
+    equal to 0 an `CalledProcessError` is raised. If `log_output` is set to `True` (default), the output of the
+    command is printed on the command line.
 
-        proc.wait()
+    By default the whole output is kept in the result. For commands with a lot of output, `capture` limits it to the
+    last `capture` lines and `0` does not keep any output. If `log_file` is provided, the whole output is also written
+    to this file. Color codes and surrounding whitespace are removed from the lines, unless `strip_colors` is `False`.
 
-        res.stderr = proc.stderr
-        res.args = proc.args
-        res.returncode = proc.returncode
+    This is a blocking wrapper around `run_async` and must not be called from a running event loop.
+    """
+    return asyncio.run(
+        run_async(
+            cmd,
+            check=check,
+            log_output=log_output,
+            capture=capture,
+            log_file=log_file,
+            strip_colors=strip_colors,
+            timeout=timeout,
+            on_line=on_line,
+            interactive=interactive,
+        )
+    )
+
+
+async def run_async(
+    cmd: str | list[str],
+    check: bool = False,
+    log_output: bool = True,
+    capture: int | None = None,
+    log_file: Path | None = None,
+    strip_colors: bool = True,
+    timeout: float | None = None,
+    on_line: Callable[[str], None] | None = None,
+    interactive: bool = False,
+) -> ShellResult:
+    """
+    Execute a command without blocking the event loop
+
+    Takes the same arguments as `run`, so multiple commands can be executed concurrently, e.g. using
+    `asyncio.gather`. Each line of the output is passed to `on_line` if provided. If the command does not finish within
+    `timeout` seconds, a `TimeoutExpired` is raised. The command runs in its own session and process group, which is
+    terminated together with all processes started by the command on a timeout or if the task is cancelled.
+
+    Commands using the terminal, e.g. `sudo` asking for a password, need to be `interactive`. These run in the process
+    group of the caller instead and receive Ctrl+C with it, but only the command itself is terminated.
+    """
+    with trace.span(cmd if isinstance(cmd, str) else shlex.join(cmd), "shell") as span:
+        res = await _run_async(
+            cmd,
+            capture,
+            log_output,
+            log_file,
+            strip_colors,
+            timeout,
+            on_line,
+            interactive,
+        )
+        span.set(exit_code=res.returncode)
 
     if check and res.returncode != 0:
         raise CalledProcessError(
@@ -113,6 +232,174 @@ def run(cmd, check: bool = False, log_output: bool = True):
     return res
 
 
+async def _run_async(
+    cmd: str | list[str],
+    capture: int | None,
+    log_output: bool,
+    log_file: Path | None,
+    strip_colors: bool,
+    timeout: float | None,
+    on_line: Callable[[str], None] | None,
+    interactive: bool,
+) -> ShellResult:
+    args, use_shell = _popen_args(cmd)
+
+    # Nothing to read if the output is not used at all
+    discard = capture == 0 and not log_output and log_file is None and on_line is None
+    output = asyncio.subprocess.DEVNULL if discard else asyncio.subprocess.PIPE
+
+    if use_shell:
+        proc = await asyncio.create_subprocess_shell(
+            args,
+            stdout=output,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=not interactive,
+        )
+    else:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=output,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=not interactive,
+        )
+
+    with _lock:
+        _processes.add(proc)
+
+    lines = deque(maxlen=capture)
+
+    try:
+        async with asyncio.timeout(timeout):
+            if not discard:
+                await _read_output(
+                    proc.stdout,
+                    lines if capture != 0 else None,
+                    log_output,
+                    log_file,
+                    strip_colors,
+                    on_line,
+                )
+
+            await proc.wait()
+
+    except TimeoutError:
+        await _terminate(proc)
+        raise TimeoutExpired(args, timeout, _oneline(list(lines)))
+
+    except BaseException:
+        # Cancelled or failed while reading the output, do not leave the process behind
+        await _terminate(proc)
+        raise
+
+    finally:
+        with _lock:
+            _processes.discard(proc)
+
+    res = ShellResult()
+    res.args = args
+    res.returncode = proc.returncode
+    res._stdout = list(lines)
+
+    return res
+
+
+async def _read_output(
+    stream: asyncio.StreamReader,
+    lines: deque | None,
+    log_output: bool,
+    log_file: Path | None,
+    strip_colors: bool,
+    on_line: Callable[[str], None] | None,
+):
+    # Check once how to print the output instead of for every line
+    if log_output:
+        write = sys.stdout.write
+        prefix, suffix = (
+            (log.Colors.GRAY, log.Colors.RESET) if log.supports_color() else ("", "")
+        )
+
+    with ExitStack() as stack:
+        if log_file is not None:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            file = stack.enter_context(
+                log_file.open("w", encoding="utf-8", buffering=LOG_FILE_BUFFER)
+            )
+
+        def handle(raw_line: bytes):
+            line = raw_line.decode("utf-8", errors="replace")
+            line = helper.clean_string(line) if strip_colors else line.rstrip("\r")
+
+            if lines is not None:
+                lines.append(line)
+
+            if log_output:
+                write(f"{prefix}{line}{suffix}\n")
+
+            if log_file is not None:
+                file.write(line + "\n")
+
+            if on_line is not None:
+                on_line(line)
+
+        # Lines are split manually as `StreamReader.readline` fails on very long lines
+        buffer = b""
+        while chunk := await stream.read(READ_SIZE):
+            *raw_lines, buffer = (buffer + chunk).split(b"\n")
+
+            for raw_line in raw_lines:
+                handle(raw_line)
+
+        # Output without a trailing newline
+        if buffer:
+            handle(buffer)
+
+    if log_output:
+        sys.stdout.flush()
+
+
+async def _terminate(proc: asyncio.subprocess.Process):
+    """
+    Terminate `proc` and its process group if it has its own, killing it if it does not exit in time
+    """
+    if proc.returncode is not None:
+        return
+
+    _signal(proc, signal.SIGTERM)
+
+    try:
+        await asyncio.wait_for(proc.wait(), TERMINATE_TIMEOUT)
+
+    except TimeoutError:
+        _signal(proc, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM)
+        await proc.wait()
+
+
+def _signal(proc, sig: int):
+    try:
+        # Processes not running interactively are the leader of their own process group
+        if hasattr(os, "killpg") and os.getpgid(proc.pid) == proc.pid:
+            os.killpg(proc.pid, sig)
+        else:
+            proc.send_signal(sig)
+
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def terminate_all():
+    """
+    Interrupt all commands that are still running, e.g. if the user aborted
+
+    Commands running in their own process group do not receive Ctrl+C from the terminal, so it is forwarded to them.
+    """
+    with _lock:
+        processes = list(_processes)
+
+    for proc in processes:
+        if proc.returncode is None:
+            _signal(proc, signal.SIGINT)
+
+
 def run_progress(cmd, total, prefixes, desc):
     """
     Execute a command on shell with a progress bar
@@ -121,32 +408,25 @@ def run_progress(cmd, total, prefixes, desc):
     defines a list of prefixes of lines to be counted as progress and `desc` is a string that is added as a title in
     front of the progress bar.
     """
-    with subprocess.Popen(
-        cmd,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-    ) as proc:
-        with tqdm(
-            total=total, unit="obj", desc=desc, disable=False, dynamic_ncols=True
-        ) as bar:
-            for line in proc.stdout:
-                line = line.rstrip()
-                for pref in prefixes:
-                    if line.startswith(pref):
-                        bar.update(1)
-                        break  # avoid double count if multiple prefixes match
-            proc.wait()
-
-            # If we had an estimated total that was too large/small, normalize so bar shows 100%.
-            if bar.total is None or bar.n != bar.total:
-                bar.total = bar.n
-                bar.refresh()
-
-            if proc.returncode != 0:
-                res = ShellResult(proc)
-                raise CalledProcessError(
-                    proc.returncode, proc.args, res.stdout_oneline, res.stderr_oneline
-                )
+    from tqdm import tqdm
+
+    prefixes = tuple(prefixes)
+
+    with tqdm(
+        total=total, unit="obj", desc=desc, disable=False, dynamic_ncols=True
+    ) as bar:
+
+        def on_line(line: str):
+            # Count each line only once even if multiple prefixes match
+            if line.startswith(prefixes):
+                bar.update(1)
+
+        res = run(cmd, log_output=False, capture=0, on_line=on_line)
+
+        # If we had an estimated total that was too large/small, normalize so bar shows 100%.
+        if bar.total is None or bar.n != bar.total:
+            bar.total = bar.n
+            bar.refresh()
+
+    if res.returncode != 0:
+        raise CalledProcessError(res.returncode, res.args)
@@ -0,0 +1,144 @@
+import json
+import os
+from functools import wraps
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable
+
+from ...helper import cache_dir
+from ...version import Version
+from . import shell
+
+CACHE_NAME = "versions.json"
+
+_lock = Lock()
+_entries: dict[str, dict] | None = None
+
+
+def cached(
+    *executables: str,
+    files: list[Path] = [],
+    dump: Callable[[Any], dict] | None = None,
+    load: Callable[[dict], Any] | None = None,
+):
+    """
+    Decorator that caches the version returned by the decorated function on disk
+
+    The entry is identified by the resolved paths of `executables` and `files` and is only valid as long as their
+    modification time and size stay the same, so updating one of them invalidates it automatically. If one of them
+    cannot be found, the function is called without caching. Only found versions are cached. Other values than a
+    `Version` can be cached providing `dump` and `load` to convert them from and to JSON.
+    """
+    dump = dump or _dump
+    load = load or _load
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if (stats := _stats(executables, files)) is None:
+                return func(*args, **kwargs)
+
+            key = "|".join([name] + [stat[0] for stat in stats])
+
+            if (entry := _get(key)) is not None and entry["stats"] == stats:
+                return load(entry["version"])
+
+            version = func(*args, **kwargs)
+
+            if version is not None:
+                _set(key, {"stats": stats, "version": dump(version)})
+
+            return version
+
+        return wrapper
+
+    return decorator
+
+
+def _stats(executables: tuple[str, ...], files: list[Path]) -> list[list] | None:
+    paths = []
+    for exe in executables:
+        if (path := shell.which(exe)) is None:
+            return None
+
+        paths.append(path)
+
+    paths += [str(f) for f in files]
+
+    try:
+        stats = []
+        for path in paths:
+            real_path = os.path.realpath(path)
+            stat = os.stat(real_path)
+            stats.append([real_path, stat.st_mtime_ns, stat.st_size])
+
+        return stats
+
+    except OSError:
+        return None
+
+
+def _cache_file() -> Path:
+    return cache_dir() / CACHE_NAME
+
+
+def _read() -> dict[str, dict]:
+    global _entries
+
+    if _entries is None:
+        try:
+            _entries = json.loads(_cache_file().read_text("utf-8"))
+
+        except (OSError, ValueError):
+            _entries = {}
+
+    return _entries
+
+
+def _get(key: str) -> dict | None:
+    with _lock:
+        return _read().get(key)
+
+
+def _set(key: str, entry: dict):
+    with _lock:
+        entries = _read()
+        entries[key] = entry
+
+        # Write atomically, so other processes never read a partial file
+        cache_file = _cache_file()
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file.write_text(json.dumps(entries, indent=2), "utf-8")
+            tmp_file.replace(cache_file)
+
+        except OSError:
+            tmp_file.unlink(missing_ok=True)
+
+
+def _dump(version: Version | None) -> dict | None:
+    if version is None:
+        return None
+
+    return {
+        "major": version.major,
+        "minor": version.minor,
+        "patch": version.patch,
+        "add_version": _dump(version.add_version),
+    }
+
+
+def _load(data: dict | None) -> Version | None:
+    if data is None:
+        return None
+
+    version = Version()
+    version.major = data["major"]
+    version.minor = data["minor"]
+    version.patch = data["patch"]
+    version.add_version = _load(data["add_version"])
+
+    return version
@@ -1,18 +1,19 @@
 __tool_name__ = "epatools"
+__installer__ = "python"
 
 import re
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from zipfile import ZIP_DEFLATED, ZipFile
 
 import yaml
 
 from .. import log
 from ..exception import NoConfigException
 from ..helper import check_installed
+from ..models.build_config import BuildArgsArchive
 from ..models.config import Config
 from ..version import Version
-from .basic import python, shell
+from .basic import archive as zip_archive
+from .basic import python, shell, version_cache
 
 VERSION_REGEX = re.compile(r"EPATOOLS\s\(v(\d+(?:\.\d+){,2})\b", re.IGNORECASE)
 PACKAGE = "git+https://github.com/onyg/epa-tools.git"
@@ -58,13 +59,17 @@ def openapi(config: Config, *args, **kwargs):
     ]
 
     # Archive the API files
-    update_archive(api_files + config.build.args.openapi.additional_archive)
+    update_archive(
+        api_files + config.build.args.openapi.additional_archive,
+        archive_config=config.build.args.archive,
+    )
 
 
 def update(*args, **kwargs):
     python.install(PACKAGE, as_global=True)
 
 
+@version_cache.cached("epatools", "python3")
 def version(*args, **kwargs) -> Version | None:
     """
     Get the installed version of epatools, returns None if not installed
@@ -88,36 +93,36 @@ def latest_version(*args, **kwargs) -> Version | None:
     return python.latest_version_number(PACKAGE)
 
 
-def update_archive(archive_files: list[Path], output_dir: Path | None = None):
+def update_archive(
+    archive_files: list[Path],
+    output_dir: Path | None = None,
+    archive_config: BuildArgsArchive | None = None,
+):
     archive = Path("./output/full-ig.zip")
 
     if output_dir is None:
         output_dir = Path("./output")
 
+    if archive_config is None:
+        archive_config = BuildArgsArchive()
+
     if not archive.exists():
         raise Exception("Archive does not exists: " + str(archive))
 
     log.info("Update IG archive")
-    with TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-
-        # Extract existing archive
-        with ZipFile(archive, "r") as zip_ref:
-            zip_ref.extractall(tmp_path)
-
-        # Add new content files from config
-        for content_file in archive_files:
-            content_path = output_dir / content_file
-            if content_path.exists():
-                # Copy to temp directory
-                log.info(f"Adding or replacing '{content_file}' in '{archive}'")
-                dest = tmp_path / "site" / content_file.name
-                dest.write_bytes(content_path.read_bytes())
-
-        # Create new archive
-        with ZipFile(archive, "w", ZIP_DEFLATED) as zip_ref:
-            for file_path in tmp_path.rglob("*"):
-                if file_path.is_file():
-                    zip_ref.write(file_path, file_path.relative_to(tmp_path))
-
-    log.succ(f"IG archive updated successfully: {str(archive)}")
+
+    # New content files are placed in the site folder of the archive
+    files = {}
+    for content_file in archive_files:
+        content_path = output_dir / content_file
+        if content_path.exists():
+            log.info(f"Adding or replacing '{content_file}' in '{archive}'")
+            files[f"site/{content_file.name}"] = content_path
+
+    copied, written = zip_archive.update(
+        archive, files, archive_config.compression_level, archive_config.workers
+    )
+
+    log.succ(
+        f"IG archive updated successfully: {str(archive)} ({written} file(s) added or replaced, {copied} kept)"
+    )
@@ -3,8 +3,9 @@ from pathlib import Path
 
 from .. import log
 from ..exception import NotInstalledException
+from ..models.build_config import BuildJvmConfig
 from ..version import Version
-from .basic import github, java, shell
+from .basic import github, java, jvm, shell
 
 JAR_NAME = "fhir-pkg-tool.jar"
 REPO_URL = "https://github.com/Gefyra/fhir-pkg-tool"
@@ -15,7 +16,8 @@ JAR = JAR_DIR / JAR_NAME
 MIN_JAVA_VER = "21"
 
 
-def install_deps():
+def install_deps(jvm_config: BuildJvmConfig | None = None):
+    jvm_config = jvm_config or BuildJvmConfig()
     ensure_installed()
     java.require_min_version(Version(MIN_JAVA_VER))
 
@@ -27,7 +29,14 @@ def install_deps():
 
     try:
         args = ["--sushi-deps-file {}".format(sushi_config)]
-        java.run_jar(JAR, check=True, *args)
+        java.run_jar(
+            JAR,
+            *args,
+            check=True,
+            create_cds=True,
+            jvm_options=jvm.config_options(jvm_config.tool("fhir_pkg_tool")),
+            log_gc=jvm_config.log_gc,
+        )
         log.succ("{} run successful".format(__tool_name__))
 
     except shell.CalledProcessError:
@@ -46,7 +55,7 @@ def ensure_installed():
         raise NotInstalledException(f"{__tool_name__} is needed but not installed")
 
 
-def update(*args, **kwargs):
+def update(*args, **kwargs) -> int:
     java.require_min_version(Version(MIN_JAVA_VER))
 
     if not JAR_DIR.exists():
@@ -54,6 +63,12 @@ def update(*args, **kwargs):
 
     shell.run(f'curl -L "{DOWNLOAD_URL}" -o "{JAR}"', check=True)
 
+    # The class data sharing archive of the previous jar is useless, a new one is created on the next run
+    java.remove_cds_archives(JAR)
+
+    # Report the downloaded bytes
+    return JAR.stat().st_size
+
 
 def version(short: bool = False, *args, **kwargs) -> Version | None:
     """
@@ -72,4 +87,11 @@ def latest_version(*args, **kwargs) -> Version | None:
     return github.latest_version_number(REPO_URL)
 
 
+def status(*args, **kwargs) -> str | None:
+    """
+    Get additional information about the installation
+    """
+    return "class data sharing" if java.cds_in_use(JAR) else None
+
+
 __tool_name__ = "FHIR Package Snapshot Tool"
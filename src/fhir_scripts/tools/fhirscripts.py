@@ -1,4 +1,5 @@
 __tool_name__ = "fhirscripts"
+__installer__ = "python"
 
 import importlib.metadata
 
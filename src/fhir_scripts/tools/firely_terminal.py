@@ -1,11 +1,12 @@
 __tool_name__ = "Firely Terminal"
+__installer__ = "dotnet"
 
 import re
 from pathlib import Path
 
 from ..helper import require_installed
 from ..version import Version
-from .basic import dotnet, shell
+from .basic import dotnet, shell, version_cache
 
 VERSION_REGEX = re.compile(r"Firely Terminal\s+(\d+(?:\.\d+){,2})\b", re.IGNORECASE)
 
@@ -43,6 +44,7 @@ def update(install: bool = False, *args, **kwargs):
         pass
 
 
+@version_cache.cached("fhir", "dotnet")
 def version(short: bool = False, *args, **kwargs) -> Version | None:
     """
     Get the installed version, returns None if not installed
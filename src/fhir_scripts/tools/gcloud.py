@@ -4,11 +4,11 @@ import re
 from functools import wraps
 from pathlib import Path
 
-from .. import helper, log
+from .. import helper, log, trace
 from ..helper import require_installed
 from ..types import Url
 from ..version import Version
-from .basic import shell
+from .basic import shell, version_cache
 
 CMD_LIST = "gcloud projects list"
 CMD_LOGIN = "gcloud auth login"
@@ -30,13 +30,13 @@ def logged_in(func):
         if not _logged_in:
             log.info("Check gcloud login")
             try:
-                shell.run(CMD_LIST, check=True, log_output=False)
+                shell.run(CMD_LIST, check=True, log_output=False, capture=0)
                 log.succ("Already logged in")
 
             except shell.CalledProcessError:
                 # Not logged in
                 try:
-                    shell.run(CMD_LOGIN)
+                    shell.run(CMD_LOGIN, interactive=True)
                     log.succ("Login successful")
 
                 except Exception as e:
@@ -48,6 +48,7 @@ def logged_in(func):
     return wrapper
 
 
+@version_cache.cached("gcloud")
 def version(*args, **kwargs) -> Version | None:
     """
     Get the installed version, returns None if not installed
@@ -90,19 +91,20 @@ def _rsync(source: Path | Url, target: Url):
 
     source = source.absolute() if isinstance(source, Path) else source
 
-    if source.is_dir():
-        total = len(
-            list(source.glob("**/*") if isinstance(source, Path) else ls(source))
-        )
-        shell.run_progress(
-            CMD_RSYNC.format(source, target),
-            total=total,
-            prefixes=["Copying "],
-            desc="Syncing",
-        )
-
-    else:
-        shell.run(CMD_CP.format(source, target), check=True, log_output=False)
+    with trace.span("gcloud copy", "deploy", source=str(source), target=str(target)):
+        if source.is_dir():
+            total = len(
+                list(source.glob("**/*") if isinstance(source, Path) else ls(source))
+            )
+            shell.run_progress(
+                CMD_RSYNC.format(source, target),
+                total=total,
+                prefixes=["Copying "],
+                desc="Syncing",
+            )
+
+        else:
+            shell.run(CMD_CP.format(source, target), check=True, log_output=False)
 
 
 @require_installed("gcloud", __tool_name__)
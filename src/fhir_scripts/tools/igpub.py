@@ -1,12 +1,20 @@
 import json
+import re
+import time
 from pathlib import Path
 
 import yaml
 
-from .. import log
-from ..exception import NotInstalledException
+from .. import log, trace
+from ..exception import NotInstalledException, OutputAbortedException
+from ..helper import cache_dir, project_id
+from ..models.build_config import (
+    BuildFailFastToolConfig,
+    BuildJvmConfig,
+    BuildProfileConfig,
+)
 from ..version import Version
-from .basic import github, java, shell
+from .basic import github, java, jvm, output, shell, version_cache
 
 REPO_URL = "https://github.com/HL7/fhir-ig-publisher"
 DOWNLOAD_URL = REPO_URL + "/releases/latest/download/publisher.jar"
@@ -15,23 +23,247 @@ PUBLISHER_JAR = INPUT_CACHE_DIR / "publisher.jar"
 
 MIN_JAVA_VER = "17"
 
+# Lines of output kept from a run, the IG Publisher prints a lot but only the end is of interest
+OUTPUT_LINES = 1000
 
-def run():
+ERROR_REGEX = re.compile(r"^(?:Error|ERROR)\b|^Exception\b")
+WARNING_REGEX = re.compile(r"^(?:Warning|WARNING)\b")
+
+# The IG Publisher cannot recover from these
+FATAL_PATTERNS = [r"java\.lang\.OutOfMemoryError", r'^Exception in thread "main"']
+
+# Phases of a run and the beginning of the line announcing them, in the order they occur
+PHASES = [
+    ("Configuration", "Load Configuration"),
+    ("Content", "Load Content"),
+    ("Conformance Resources", "Processing Conformance Resources"),
+    ("Snapshots", "Generating Snapshots"),
+    ("Narratives", "Generating Narratives"),
+    ("Validation", "Validating Resources"),
+    ("Outputs", "Generating Outputs"),
+    ("Summary", "Generating Summary Outputs"),
+    ("Jekyll", "Running Jekyll"),
+    ("Finishing", "Finished"),
+]
+
+# Durations of the phases of previous runs and the output of the last run, per project
+PHASES_CACHE_NAME = "igpub"
+
+# Seconds between updates of the progress bar
+PROGRESS_INTERVAL = 0.5
+
+# Lines of output shown if a run with progress bar fails
+TAIL_LINES = 50
+
+
+class PhaseProgress:
+    """
+    Follows the phases of a run in its output, e.g. as `on_line` of `shell.run`
+
+    With `show` a progress bar is shown, which estimates the remaining time using the durations of the phases of the
+    previous run of the same project.
+    """
+
+    def __init__(self, show: bool = False):
+        self.history: dict[str, float] = _read_phases()
+        self.durations: dict[str, float] = {}
+        self.index = -1
+        self.phase_start = time.perf_counter_ns()
+        self.last_refresh = 0.0
+        self.bar = None
+
+        if show:
+            from tqdm import tqdm
+
+            self.bar = tqdm(
+                total=100,
+                desc="Starting",
+                bar_format="{desc}: {percentage:3.0f}%|{bar}| {postfix}",
+                dynamic_ncols=True,
+            )
+
+    def __call__(self, line: str):
+        for index in range(self.index + 1, len(PHASES)):
+            if line.startswith(PHASES[index][1]):
+                self._enter(index)
+                break
+
+        if (
+            self.bar is not None
+            and time.monotonic() - self.last_refresh > PROGRESS_INTERVAL
+        ):
+            self._refresh()
+
+    @property
+    def phase(self) -> str | None:
+        return PHASES[self.index][0] if self.index >= 0 else None
+
+    def progress(self) -> tuple[float, float | None]:
+        """
+        Get the progress in percent and the estimated remaining time in seconds if known
+        """
+        expected = [self.history.get(name) for name, _ in PHASES]
+        elapsed = (time.perf_counter_ns() - self.phase_start) / 1e9
+
+        # Without previous run each phase counts the same
+        if not self.history:
+            return max(0, self.index) / len(PHASES) * 100, None
+
+        total = sum(e for e in expected if e is not None)
+        done = sum(e for e in expected[: max(0, self.index)] if e is not None)
+
+        if self.index >= 0 and (current := expected[self.index]) is not None:
+            done += min(elapsed, current)
+
+        return (done / total * 100 if total else 0), max(0.0, total - done)
+
+    def close(self, success: bool):
+        """
+        Finish the current phase and store the durations if the run was successful
+        """
+        self._enter(None)
+
+        if self.bar is not None:
+            if success:
+                self.bar.n = 100
+                self.bar.set_description("Finished")
+                self.bar.set_postfix_str("")
+
+            self.bar.close()
+
+        if success and self.durations:
+            _write_phases(self.durations)
+
+    def _enter(self, index: int | None):
+        now = time.perf_counter_ns()
+
+        if self.index >= 0:
+            self.durations[self.phase] = (now - self.phase_start) / 1e9
+            trace.record(self.phase, "igpub", self.phase_start, now)
+
+        self.index = index if index is not None else self.index
+        self.phase_start = now
+
+        if index is not None and self.bar is not None:
+            self._refresh()
+
+    def _refresh(self):
+        percent, remaining = self.progress()
+
+        self.bar.n = min(100, round(percent))
+        self.bar.set_description(self.phase or "Starting", refresh=False)
+        self.bar.set_postfix_str(
+            (
+                "ETA {:d}:{:02d}".format(*divmod(round(remaining), 60))
+                if remaining is not None
+                else "no previous run"
+            ),
+            refresh=False,
+        )
+        self.bar.refresh()
+        self.last_refresh = time.monotonic()
+
+
+def run(
+    jvm_config: BuildJvmConfig | None = None,
+    profile: BuildProfileConfig | None = None,
+    fail_fast: BuildFailFastToolConfig | None = None,
+    progress: bool = False,
+):
+    """
+    Run the IG Publisher
+
+    The `profile` defines if a publication build is run and additional arguments, e.g. to skip expensive phases. The
+    IG Publisher is stopped as soon as a fatal error occurs or the maximum number of errors of `fail_fast` is reached.
+    With `progress` a progress bar is shown on a terminal instead of the output, which is written to a file.
+    """
+    jvm_config = jvm_config or BuildJvmConfig()
+    profile = profile or BuildProfileConfig()
+    fail_fast = fail_fast or BuildFailFastToolConfig()
+    parser = output.OutputParser(
+        ERROR_REGEX,
+        WARNING_REGEX,
+        fatal=FATAL_PATTERNS + fail_fast.fatal,
+        max_errors=fail_fast.max_errors,
+    )
     is_installed()
     java.require_min_version(Version(MIN_JAVA_VER))
 
     log.info("Run IG Publisher")
 
-    sushi_config = yaml.safe_load(Path("./sushi-config.yaml").read_text("utf-8"))
+    args = ["-no-sushi", "-ig ."]
+
+    if profile.publish:
+        sushi_config = yaml.safe_load(Path("./sushi-config.yaml").read_text("utf-8"))
+        publish_url = sushi_config["canonical"] + "/" + sushi_config["version"]
+        args.append(f"-publish {publish_url}")
+
+    args += profile.args
 
-    publish_url = sushi_config["canonical"] + "/" + sushi_config["version"]
+    # The progress bar only works on a terminal, the phases are followed anyway to estimate later runs
+    show_progress = progress and log.supports_color()
+    log_file = _phases_file().with_suffix(".log") if show_progress else None
+    phases = PhaseProgress(show=show_progress)
+
+    if log_file is not None:
+        log.info(f"Output is written to {log_file}")
+
+    def on_line(line: str):
+        phases(line)
+        parser(line)
+
+    res = None
     try:
-        args = ["-no-sushi", "-ig .", f"-publish {publish_url}"]
-        java.run_jar(PUBLISHER_JAR, check=True, *args)
-        log.succ("IG Publisher run successful")
+        res = java.run_jar(
+            PUBLISHER_JAR,
+            *args,
+            log_output=not show_progress,
+            capture=OUTPUT_LINES,
+            log_file=log_file,
+            create_cds=True,
+            jvm_options=jvm.config_options(jvm_config.tool("igpub")),
+            log_gc=jvm_config.log_gc,
+            on_line=on_line,
+        )
 
-    except shell.CalledProcessError:
-        raise Exception("IG Publisher run failed")
+    except OutputAbortedException as e:
+        raise Exception(f"IG Publisher run failed: stopped early, {str(e)}")
+
+    finally:
+        phases.close(res is not None and res.returncode == 0)
+
+    if res.returncode != 0:
+        # Show the end of the hidden output, which usually contains the cause
+        if show_progress:
+            for line in res.stdout[-TAIL_LINES:]:
+                log.debug(line)
+
+        raise Exception(f"IG Publisher run failed: {parser.summary()}")
+
+    log.succ(f"IG Publisher run successful: {parser.summary()}")
+
+
+def _phases_file() -> Path:
+    return cache_dir() / PHASES_CACHE_NAME / f"{project_id()}.json"
+
+
+def _read_phases() -> dict[str, float]:
+    try:
+        return json.loads(_phases_file().read_text("utf-8"))["phases"]
+
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _write_phases(durations: dict[str, float]):
+    phases_file = _phases_file()
+
+    try:
+        phases_file.parent.mkdir(parents=True, exist_ok=True)
+        phases_file.write_text(json.dumps({"phases": durations}, indent=2), "utf-8")
+
+    except OSError:
+        pass
 
 
 def is_installed() -> None:
@@ -65,7 +297,7 @@ def qa():
     log.info(f"QA result: {', '.join(result)}")
 
 
-def update(*args, **kwargs):
+def update(*args, **kwargs) -> int:
     java.require_min_version(Version(MIN_JAVA_VER))
 
     if not INPUT_CACHE_DIR.exists():
@@ -73,7 +305,14 @@ def update(*args, **kwargs):
 
     shell.run(f'curl -L "{DOWNLOAD_URL}" -o "{PUBLISHER_JAR}"', check=True)
 
+    # The class data sharing archive of the previous jar is useless, a new one is created on the next run
+    java.remove_cds_archives(PUBLISHER_JAR)
+
+    # Report the downloaded bytes
+    return PUBLISHER_JAR.stat().st_size
 
+
+@version_cache.cached("java", files=[PUBLISHER_JAR])
 def version(short: bool = False, *args, **kwargs) -> Version | None:
     """
     Get the installed version of IG Publisher, returns None if not installed
@@ -95,4 +334,11 @@ def latest_version(*args, **kwargs) -> Version | None:
     return github.latest_version_number(REPO_URL)
 
 
+def status(*args, **kwargs) -> str | None:
+    """
+    Get additional information about the installation
+    """
+    return "class data sharing" if java.cds_in_use(PUBLISHER_JAR) else None
+
+
 __tool_name__ = "IG Publisher"
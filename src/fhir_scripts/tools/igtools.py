@@ -1,4 +1,5 @@
 __tool_name__ = "igtools"
+__installer__ = "python"
 
 import re
 from functools import wraps
@@ -8,7 +9,7 @@ from .. import log
 from ..exception import NoConfigException
 from ..helper import require_installed
 from ..version import Version
-from .basic import python, shell
+from .basic import python, shell, version_cache
 
 VERSION_REGEX = re.compile(r"IGTOOLS\s\(v(\d+(?:\.\d+){,2})\b", re.IGNORECASE)
 PACKAGE = "git+https://github.com/onyg/req-tooling.git"
@@ -68,6 +69,7 @@ def update(*args, **kwargs):
     python.install(PACKAGE, as_global=True)
 
 
+@version_cache.cached("igtools", "python3")
 def version(short: bool = False, *args, **kwargs) -> Version | None:
     """
     Get the installed version of igtools, returns None if not installed
@@ -1,4 +1,5 @@
 __tool_name__ = "publishtools"
+__installer__ = "python"
 
 import re
 from pathlib import Path
@@ -6,7 +7,7 @@ from pathlib import Path
 from .. import log
 from ..helper import require_installed
 from ..version import Version
-from .basic import python, shell
+from .basic import python, shell, version_cache
 
 VERSION_REGEX = re.compile(r"IGTOOLS\s\(v(\d+(?:\.\d+){,2})\b", re.IGNORECASE)
 PACKAGE = "git+https://github.com/gematik/publish-tools.git"
@@ -38,6 +39,7 @@ def update(*args, **kwargs):
     python.install(PACKAGE, as_global=True)
 
 
+@version_cache.cached("publishtools", "python3")
 def version(short: bool = False, *args, **kwargs) -> Version | None:
     """
     Get the installed version of igtools, returns None if not installed
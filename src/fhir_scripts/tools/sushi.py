@@ -1,31 +1,62 @@
 __tool_name__ = "FSH Sushi"
+__installer__ = "npm"
 
 import re
 
 from .. import log
+from ..exception import OutputAbortedException
 from ..helper import require_installed
+from ..models.build_config import BuildFailFastToolConfig
 from ..version import Version
-from .basic import github, npm, shell
+from .basic import github, npm, output, shell, version_cache
 
 VERSION_REGEX = re.compile(r"SUSHI\sv(\d+(?:\.\d+){,2})\b", re.IGNORECASE)
 REPO_URL = "https://github.com/FHIR/sushi"
 
+# Messages are logged with their level in front, e.g. "error Cannot resolve ..."
+ERROR_REGEX = re.compile(r"^error\s")
+WARNING_REGEX = re.compile(r"^warn\s")
+
+# Number of errors shown if the run failed
+SHOW_ERRORS = 5
+
 
 @require_installed("sushi", __tool_name__)
-def run():
+def run(fail_fast: BuildFailFastToolConfig | None = None):
+    """
+    Run sushi
+
+    With `fail_fast` sushi is stopped as soon as the maximum number of errors or a fatal message is reached.
+    """
+    fail_fast = fail_fast or BuildFailFastToolConfig()
+    parser = output.OutputParser(
+        ERROR_REGEX,
+        WARNING_REGEX,
+        fatal=fail_fast.fatal,
+        max_errors=fail_fast.max_errors,
+    )
+
     log.info("Run sushi")
     try:
-        shell.run("sushi build .")
-        log.succ("Sushi run successful")
+        shell.run("sushi build .", check=True, on_line=parser)
+        log.succ(f"Sushi run successful: {parser.summary()}")
+
+    except OutputAbortedException as e:
+        raise Exception(f"Sushi run failed: stopped early, {str(e)}")
 
     except shell.CalledProcessError:
-        raise Exception("Sushi run failed")
+        # Repeat the first errors as they are easily lost in the output
+        for record in parser.error_records[:SHOW_ERRORS]:
+            log.fail(record.text)
+
+        raise Exception(f"Sushi run failed: {parser.summary()}")
 
 
 def update(*args, **kwargs):
     npm.install("fsh-sushi", as_global=True)
 
 
+@version_cache.cached("sushi", "npm", "node")
 def version(short: bool = False, *args, **kwargs) -> Version | None:
     """
     Get the installed version of FSH Sushi, returns None if sushi is not installed
@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator
+
+SERVICE_NAME = "fhir-scripts"
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_lock = threading.Lock()
+_target: str | None = None
+_spans: list["Span"] = []
+_current: ContextVar["Span | None"] = ContextVar("span", default=None)
+
+# All spans of a run share the same trace
+_trace_id = os.urandom(16).hex()
+
+# Offset to convert the monotonic clock into unix time
+_origin_ns = time.time_ns() - time.perf_counter_ns()
+
+
+class Span:
+    """
+    A timed operation, e.g. a command, a pipeline step or a subprocess
+
+    `args` describe the operation and can be extended while it runs using `set`. Spans started while another span is
+    active (in the same thread or task) are nested within it.
+    """
+
+    def __init__(self, name: str, category: str, args: dict, parent: "Span | None"):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent = parent
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent else _trace_id
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = self.start_ns
+        self.error: str | None = None
+
+    def __repr__(self) -> str:
+        return "<span={} ({})>".format(self.name, self.category)
+
+    def set(self, **kwargs):
+        self.args.update(kwargs)
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+
+def start(target: str | Path):
+    """
+    Start recording spans, they are written to `target` calling `finish`
+
+    `target` is either a file or the URL of an OTLP/HTTP collector (e.g. `http://localhost:4318/v1/traces`). Files
+    ending with `.otlp.json` are written as OTLP JSON, all others in the Chrome trace format that can be opened using
+    chrome://tracing or Perfetto.
+    """
+    global _target
+
+    with _lock:
+        _target = str(target)
+        _spans.clear()
+
+
+def enabled() -> bool:
+    return _target is not None
+
+
+@contextmanager
+def span(name: str, category: str, **args) -> Iterator[Span]:
+    """
+    Record the enclosed code as span, if recording is enabled
+
+    Exceptions are recorded in the span and raised again.
+    """
+    current = Span(name, category, args, _current.get())
+    token = _current.set(current)
+
+    try:
+        yield current
+
+    except BaseException as e:
+        current.error = str(e) or type(e).__name__
+        raise
+
+    finally:
+        current.end_ns = time.perf_counter_ns()
+        _current.reset(token)
+
+        if _target is not None:
+            with _lock:
+                _spans.append(current)
+
+
+def record(name: str, category: str, start_ns: int, end_ns: int, **args):
+    """
+    Record a span that already finished, `start_ns` and `end_ns` are taken from `time.perf_counter_ns`
+    """
+    if _target is None:
+        return
+
+    recorded = Span(name, category, args, _current.get())
+    recorded.start_ns = start_ns
+    recorded.end_ns = end_ns
+
+    with _lock:
+        _spans.append(recorded)
+
+
+def finish():
+    """
+    Write the recorded spans to the target and stop recording
+    """
+    global _target
+
+    with _lock:
+        target, spans = _target, list(_spans)
+        _target = None
+        _spans.clear()
+
+    if target is None:
+        return
+
+    if target.startswith(("http://", "https://")):
+        from .tools.basic import http
+
+        http.session().post(target, json=to_otlp(spans), timeout=30)
+
+    elif target.endswith(".otlp.json"):
+        Path(target).write_text(json.dumps(to_otlp(spans)), "utf-8")
+
+    else:
+        Path(target).write_text(json.dumps(to_chrome(spans)), "utf-8")
+
+
+def to_chrome(spans: list[Span]) -> dict:
+    """
+    Convert the spans into the Chrome trace event format
+    """
+    pid = os.getpid()
+
+    events = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": thread_id,
+            "args": {"name": thread_name},
+        }
+        for thread_id, thread_name in {(s.thread_id, s.thread_name) for s in spans}
+    ]
+
+    events += [
+        {
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": (_origin_ns + s.start_ns) / 1000,
+            "dur": s.duration_ns / 1000,
+            "pid": pid,
+            "tid": s.thread_id,
+            "args": s.args | ({"error": s.error} if s.error else {}),
+        }
+        for s in sorted(spans, key=lambda s: s.start_ns)
+    ]
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """
+    Convert the spans into the OTLP JSON format
+    """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": SERVICE_NAME})
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __package__},
+                        "spans": [_otlp_span(s) for s in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _otlp_span(s: Span) -> dict:
+    span = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 1,
+        "startTimeUnixNano": str(_origin_ns + s.start_ns),
+        "endTimeUnixNano": str(_origin_ns + s.end_ns),
+        "attributes": _otlp_attributes({"category": s.category} | s.args),
+        "status": (
+            {"code": STATUS_ERROR, "message": s.error}
+            if s.error
+            else {"code": STATUS_OK}
+        ),
+    }
+
+    if s.parent is not None:
+        span["parentSpanId"] = s.parent.span_id
+
+    return span
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    result = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+
+        else:
+            typed = {"stringValue": str(value)}
+
+        result.append({"key": key, "value": typed})
+
+    return result
@@ -1,10 +1,16 @@
-import importlib
-import pkgutil
+import time
 from argparse import ArgumentParser
-
-import fhir_scripts.tools
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from threading import Lock
 
 from . import log
+from .helper import format_size
+from .tools import UPDATE, get_tools
+from .tools.basic import shell
+
+# Maximum number of tools updated at the same time
+MAX_WORKERS = 4
 
 
 def setup_parser(parser: ArgumentParser, *args, **kwarsg):
@@ -12,24 +18,64 @@ def setup_parser(parser: ArgumentParser, *args, **kwarsg):
 
 
 def update(*args, **kwargs):
-    # Get modules dynmaically
-    mod_names = [
-        name
-        for _, name, _ in pkgutil.iter_modules(
-            fhir_scripts.tools.__path__, fhir_scripts.tools.__name__ + "."
+    tools = list(get_tools(UPDATE).values())
+    modules = [tool.load() for tool in tools]
+
+    # Tools using the same package manager are updated one after another
+    locks = {tool.installer: Lock() for tool in tools if tool.installer}
+
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+    try:
+        futures = [
+            executor.submit(
+                _update, module, *args, lock=locks.get(tool.installer), **kwargs
+            )
+            for tool, module in zip(tools, modules)
+        ]
+        wait(futures)
+
+    except BaseException:
+        # Do not wait for running updates, e.g. if the user aborted
+        shell.terminate_all()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    executor.shutdown()
+
+    # Summary of all updated tools
+    rows = []
+    for tool, future in zip(tools, futures):
+        if future.exception() or (result := future.result()) is None:
+            continue
+
+        duration, size = result
+        rows.append(
+            [
+                tool.tool_name,
+                f"{duration:.1f} s",
+                format_size(size) if size is not None else "n/a",
+            ]
         )
-    ]
-    modules = [
-        mod
-        for mod_name in mod_names
-        if (mod := importlib.import_module(mod_name)) and hasattr(mod, "update")
-    ]
 
-    for module in modules:
-        _update(module, *args, **kwargs)
+    if rows:
+        log.info("Update summary")
+        log.table(["Tool", "Time", "Downloaded"], rows)
+
+    # Raise the first error after all other tools were updated
+    for future in futures:
+        if e := future.exception():
+            raise e
 
 
-def _update(module, dry_run: bool = False, *args, **kwargs):
+def _update(
+    module, dry_run: bool = False, lock=None, *args, **kwargs
+) -> tuple[float, int | None] | None:
+    """
+    Update a tool if it was installed before
+
+    Returns the duration of the update and the downloaded bytes if known, or `None` if nothing was updated.
+    """
     name = getattr(module, "__tool_name__", None) or module.__name__
     prev_version = module.version()
 
@@ -40,19 +86,24 @@ def _update(module, dry_run: bool = False, *args, **kwargs):
 
         if not latest or latest != prev_version:
             if dry_run:
-                if latest_func := getattr(module, "latest_version", None):
+                if latest_func:
                     log.info(
-                        "Would update {}: {} -> {}".format(
-                            name, prev_version, latest_func()
-                        )
+                        "Would update {}: {} -> {}".format(name, prev_version, latest)
                     )
 
                 else:
                     log.info("Would update {}: from {}".format(name, prev_version))
 
             else:
-                module.update()
+                with lock or nullcontext():
+                    start = time.monotonic()
+                    downloaded = module.update()
+                    duration = time.monotonic() - start
+
                 log.succ(f"Updated {name}: {str(prev_version)} → {module.version()}")
+                return duration, downloaded if isinstance(downloaded, int) else None
+
+    return None
 
 
 __doc__ = "Update tools"
@@ -43,13 +43,13 @@ class Version:
         if self.unknown or other.unknown:
             return False
 
-        if res := _gt_helper(self.major, other.major) is not None:
+        if (res := _gt_helper(self.major, other.major)) is not None:
             return res
 
-        if res := _gt_helper(self.minor, other.minor) is not None:
+        if (res := _gt_helper(self.minor, other.minor)) is not None:
             return res
 
-        if res := _gt_helper(self.patch, other.patch) is not None:
+        if (res := _gt_helper(self.patch, other.patch)) is not None:
             return res
 
         return False
@@ -65,6 +65,10 @@ def _gt_helper(one, two) -> bool | None:
     if two is None:
         return True
 
+    # Compare numerically if possible, so 9 < 17
+    if one.isdigit() and two.isdigit():
+        one, two = int(one), int(two)
+
     if one < two:
         return False
 
@@ -1,9 +1,15 @@
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 
-from . import log, tools
+from . import log
+from .tools import LATEST_VERSION, VERSION, get_tools
+from .tools.basic import shell
 
 TARGET_BASE_DIR = "ig/fhir"
 
+# Maximum number of concurrent version probes
+MAX_WORKERS = 8
+
 
 def setup_parser(parser: ArgumentParser, *args, **kwarsg):
     parser.add_argument(
@@ -12,18 +18,45 @@ def setup_parser(parser: ArgumentParser, *args, **kwarsg):
 
 
 def versions(outdated: bool = False, *args, **kwargs) -> bool:
-    up_to_date = True
-    for name, module in tools.__dict__.items():
-        if not name.startswith("__") and (
-            version_func := getattr(module, "version", None)
+    tools = list(get_tools(VERSION).values())
+    modules = [tool.load() for tool in tools]
+
+    # Probe all tools concurrently, local versions as well as the latest versions
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+    try:
+        version_futures = [executor.submit(module.version) for module in modules]
+        # The status is only shown with the installed versions
+        status_futures = [
+            (
+                executor.submit(status)
+                if not outdated and (status := getattr(module, "status", None))
+                else None
+            )
+            for module in modules
+        ]
+        latest_futures = [
+            (
+                executor.submit(module.latest_version)
+                if outdated and tool.has(LATEST_VERSION)
+                else None
+            )
+            for tool, module in zip(tools, modules)
+        ]
+
+        # Report in the order of the tools
+        up_to_date = True
+        for tool, version_future, latest_future, status_future in zip(
+            tools, version_futures, latest_futures, status_futures
         ):
+            tool_name = tool.tool_name
+
             try:
-                tool_name = getattr(module, "__tool_name__", None) or name
-                version = version_func()
+                version = version_future.result()
 
                 if outdated:
-                    if latest_func := getattr(module, "latest_version", None):
-                        latest = latest_func() if latest_func else None
+                    if latest_future is not None:
+                        latest = latest_future.result()
 
                         if latest is not None and latest != version:
                             log.info("{}: {} < {}".format(tool_name, version, latest))
@@ -35,13 +68,26 @@ def versions(outdated: bool = False, *args, **kwargs) -> bool:
                         )
 
                 elif version is not None:
-                    log.info("{}: {}".format(tool_name, version.long))
+                    status = status_future.result() if status_future else None
+                    log.info(
+                        "{}: {}{}".format(
+                            tool_name, version.long, f" ({status})" if status else ""
+                        )
+                    )
 
             except Exception as e:
                 raise Exception(
                     "Error occured during processing version of {}".format(tool_name), e
                 )
 
+    except BaseException:
+        # Do not wait for the remaining probes, e.g. if the user aborted
+        shell.terminate_all()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    executor.shutdown()
+
     if outdated and up_to_date:
         log.succ("Everything up-to-date")
         return True
@@ -2,6 +2,7 @@ import json
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 from fhir_scripts import check
 
@@ -62,6 +63,66 @@ class TestCheckDefVersions(unittest.TestCase):
         self.assertEqual(wanted, res)
 
 
+class TestCheckReadKeys(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.file = Path(self.tmpdir.name) / "def.json"
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def test_read(self):
+        content = {
+            "resourceType": "StructureDefinition",
+            "meta": {"profile": ["x"], "version": "nested"},
+            "count": 12345,
+            "version": "1.2.3",
+            "snapshot": {"element": [{"id": str(i)} for i in range(100)]},
+            "date": "2020-01-01",
+        }
+        self.file.write_text(json.dumps(content, indent=2))
+
+        # Values span multiple parts of the file
+        with patch("fhir_scripts.check.READ_SIZE", 4):
+            self.assertDictEqual(
+                {"version": "1.2.3", "date": "2020-01-01"},
+                check.read_keys(self.file, check.DEF_KEYS),
+            )
+
+    def test_stops_early(self):
+        self.file.write_text('{"version": "1.2.3", "date": "2020-01-01", "broken": [')
+
+        self.assertDictEqual(
+            {"version": "1.2.3", "date": "2020-01-01"},
+            check.read_keys(self.file, check.DEF_KEYS),
+        )
+
+    def test_missing(self):
+        self.file.write_text('{"version": "1.2.3", "count": 1}')
+        self.assertDictEqual(
+            {"version": "1.2.3"}, check.read_keys(self.file, check.DEF_KEYS)
+        )
+
+        self.file.write_text("[1, 2]")
+        self.assertDictEqual({}, check.read_keys(self.file, check.DEF_KEYS))
+
+    def test_processes(self):
+        files = []
+        for i in range(4):
+            file = Path(self.tmpdir.name) / f"def{i}.json"
+            file.write_text(json.dumps({"version": f"1.0.{i}", "date": "2020-01-01"}))
+            files.append(file)
+
+        with patch("fhir_scripts.check.DEF_PROCESSES_THRESHOLD", 2):
+            self.assertListEqual(
+                [(f"1.0.{i}", "2020-01-01") for i in range(4)],
+                check._read_def_versions(files),
+            )
+
+
 class TestCheckVersions(unittest.TestCase):
 
     def test_matching(self):
@@ -288,6 +349,107 @@ class TestCheckTransitiveDeps(unittest.TestCase):
         res = check._check_transitive_deps(input_sushi, Path(self.tmpdir.name))
         self.assertEqual(wanted, res)
 
+    def test_read_once(self):
+        input_sushi = {
+            "dependencies": {"org.example.abc": "1.2.3", "org.example.def": "4.5.6"}
+        }
+        input_pkgs = {
+            "org.example.abc#1.2.3": {"org.example.ghi": "1.0.0"},
+            "org.example.def#4.5.6": {"org.example.ghi": "1.0.0"},
+            "org.example.ghi#1.0.0": {},
+        }
+        self.setupFiles(input_pkgs)
+
+        with patch(
+            "fhir_scripts.check.DependencyGraph._read_deps",
+            autospec=True,
+            side_effect=check.DependencyGraph._read_deps,
+        ) as read_deps:
+            res = check._check_transitive_deps(input_sushi, Path(self.tmpdir.name))
+
+        self.assertEqual((0, 0), res)
+        self.assertEqual(3, read_deps.call_count)
+
+    def test_cycle(self):
+        input_sushi = {"dependencies": {"org.example.abc": "1.2.3"}}
+        input_pkgs = {
+            "org.example.abc#1.2.3": {"org.example.def": "4.5.6"},
+            "org.example.def#4.5.6": {"org.example.abc": "1.2.3"},
+        }
+        self.setupFiles(input_pkgs)
+
+        res = check._check_transitive_deps(input_sushi, Path(self.tmpdir.name))
+        self.assertEqual((0, 1), res)
+
+    def test_cycle_between_direct_deps(self):
+        input_sushi = {
+            "dependencies": {"org.example.abc": "1.2.3", "org.example.def": "4.5.6"}
+        }
+        input_pkgs = {
+            "org.example.abc#1.2.3": {"org.example.def": "4.5.6"},
+            "org.example.def#4.5.6": {"org.example.abc": "1.2.3"},
+        }
+        self.setupFiles(input_pkgs)
+
+        graph = check.DependencyGraph(Path(self.tmpdir.name))
+        graph.build(input_sushi["dependencies"])
+
+        self.assertListEqual(
+            [
+                [
+                    ("org.example.abc", "1.2.3"),
+                    ("org.example.def", "4.5.6"),
+                    ("org.example.abc", "1.2.3"),
+                ]
+            ],
+            graph.cycles,
+        )
+
+        res = check._check_transitive_deps(input_sushi, Path(self.tmpdir.name))
+        self.assertEqual((0, 1), res)
+
+    def test_export(self):
+        input_sushi = {
+            "dependencies": {"org.example.abc": "1.2.3", "org.example.def": "4.5.6"}
+        }
+        input_pkgs = {
+            "org.example.abc#1.2.3": {"org.example.def": "4.5.7"},
+            "org.example.def#4.5.6": {},
+        }
+        self.setupFiles(input_pkgs)
+
+        graph_file = Path(self.tmpdir.name) / "graph.json"
+        check._check_transitive_deps(
+            input_sushi, Path(self.tmpdir.name), graph_file=graph_file
+        )
+        graph = json.loads(graph_file.read_text())
+
+        self.assertDictEqual(
+            {
+                "org.example.def": {
+                    "4.5.6": ["project", "org.example.def#4.5.6"],
+                    "4.5.7": [
+                        "project",
+                        "org.example.abc#1.2.3",
+                        "org.example.def#4.5.7",
+                    ],
+                }
+            },
+            graph["conflicts"],
+        )
+        self.assertFalse(graph["packages"]["org.example.def#4.5.7"]["installed"])
+
+        dot_file = Path(self.tmpdir.name) / "graph.dot"
+        check._check_transitive_deps(
+            input_sushi, Path(self.tmpdir.name), graph_file=dot_file
+        )
+        dot = dot_file.read_text()
+
+        self.assertIn(
+            '"org.example.abc#1.2.3" -> "org.example.def#4.5.7" [color=red];', dot
+        )
+        self.assertIn('"org.example.def#4.5.7" [color=red, style=dashed];', dot)
+
 
 class TestCheckRelease(unittest.TestCase):
 
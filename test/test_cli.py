@@ -0,0 +1,68 @@
+import importlib
+import pkgutil
+import sys
+import unittest
+
+import fhir_scripts
+from fhir_scripts import cli
+from fhir_scripts.commands import COMMANDS
+
+
+class TestCommandRegistry(unittest.TestCase):
+
+    def test_registry_complete(self):
+        mod_names = [
+            name
+            for _, name, _ in pkgutil.iter_modules(
+                fhir_scripts.__path__, fhir_scripts.__name__ + "."
+            )
+        ]
+
+        modules = {
+            mod_name.split(".")[-1]: importlib.import_module(mod_name)
+            for mod_name in mod_names
+        }
+
+        commands = {
+            cmd: mod
+            for cmd, mod in modules.items()
+            if hasattr(mod, "__handler__") or hasattr(mod, "__handlers__")
+        }
+
+        for cmd, module in commands.items():
+            self.assertIn(cmd, COMMANDS, f"Command '{cmd}' missing in registry")
+            self.assertEqual(module.__doc__, COMMANDS[cmd].help)
+
+        for cmd, command in COMMANDS.items():
+            self.assertIn(command.module, commands)
+
+
+class TestCliSelectedCmd(unittest.TestCase):
+
+    def test_cmd(self):
+        self.assertEqual("check", cli._selected_cmd(["check", "--release"]))
+
+    def test_config(self):
+        self.assertEqual("check", cli._selected_cmd(["--config", "check", "check"]))
+
+    def test_help(self):
+        self.assertIsNone(cli._selected_cmd(["--help"]))
+
+    def test_unknown(self):
+        self.assertIsNone(cli._selected_cmd(["foo"]))
+
+
+class TestCliGetArgs(unittest.TestCase):
+
+    def test_only_selected_imported(self):
+        sys.modules.pop("fhir_scripts.publish", None)
+
+        module_dict = {}
+        parser_dict = {}
+        args = cli.get_args(module_dict, parser_dict, ["check", "--release"])
+
+        self.assertEqual("check", args.cmd)
+        self.assertTrue(args.release)
+        self.assertListEqual(["check"], list(module_dict.keys()))
+        self.assertListEqual(list(COMMANDS.keys()), list(parser_dict.keys()))
+        self.assertNotIn("fhir_scripts.publish", sys.modules)
@@ -2,6 +2,7 @@ import unittest
 from pathlib import Path
 
 from fhir_scripts import config
+from fhir_scripts.models.build_config import BuildConfig
 from fhir_scripts.models.config import Config
 
 
@@ -26,3 +27,28 @@ class TestConfigLoad(unittest.TestCase):
         self.assertIsInstance(cfg, config.Config)
 
         self.assertEqual(cfg, Config())
+
+
+class TestBuildProfiles(unittest.TestCase):
+
+    def test_default(self):
+        config = BuildConfig()
+
+        self.assertTrue(config.get_profile().publish)
+        self.assertFalse(config.get_profile("dev").publish)
+        self.assertListEqual(["-tx n/a"], config.get_profile("dev").args)
+
+    def test_configured(self):
+        config = BuildConfig.model_validate(
+            {
+                "profile": "dev",
+                "profiles": {"dev": {"publish": False, "args": ["-no-network"]}},
+            }
+        )
+
+        self.assertListEqual(["-no-network"], config.get_profile().args)
+        self.assertTrue(config.get_profile("release").publish)
+
+    def test_unknown(self):
+        with self.assertRaises(Exception):
+            BuildConfig().get_profile("foo")
@@ -0,0 +1,124 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts import check
+from fhir_scripts.package_index import PackageIndex
+
+
+class TestPackageIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pkg_dir = Path(self.tmpdir.name) / "packages"
+        self.pkg_dir.mkdir()
+        self.index = PackageIndex(self.pkg_dir)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def install(self, pkg: str, deps: dict[str, str]):
+        package = self.pkg_dir / pkg / "package"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / "package.json").write_text(
+            json.dumps({"dependencies": deps, "fhirVersions": ["4.0.1"]})
+        )
+
+    def test_refresh(self):
+        self.install("org.example.abc#1.2.3", {"org.example.def": "4.5.6"})
+        self.install("org.example.def#4.5.6", {})
+
+        self.assertEqual((2, 0), self.index.refresh())
+
+        package = self.index.get("org.example.abc", "1.2.3")
+        self.assertDictEqual({"org.example.def": "4.5.6"}, package.dependencies)
+        self.assertListEqual(["4.0.1"], package.fhir_versions)
+        self.assertIsNone(self.index.get("org.example.abc", "1.0.0"))
+        self.assertListEqual(
+            [("org.example.abc", "1.2.3")], self.index.dependants("org.example.def")
+        )
+
+    def test_content(self):
+        self.install("org.example.abc#1.2.3", {})
+
+        # The files of the packages are only read if requested
+        with patch("fhir_scripts.package_index._size_and_hash") as size_and_hash:
+            self.index.refresh()
+            size_and_hash.assert_not_called()
+
+        package = self.index.get("org.example.abc", "1.2.3")
+        self.assertIsNone(package.size)
+        self.assertIsNone(package.hash)
+
+        self.assertEqual((0, 0), self.index.refresh(content=True))
+        package = self.index.get("org.example.abc", "1.2.3")
+        self.assertGreater(package.size, 0)
+        self.assertEqual(64, len(package.hash))
+
+    def test_skips_incomplete(self):
+        self.install("org.example.abc#1.2.3", {})
+        self.install(".org.example.def#4.5.6.123.456.tmp", {})
+
+        self.assertEqual((1, 0), self.index.refresh())
+        self.assertListEqual(
+            ["org.example.abc"], [p.name for p in self.index.packages()]
+        )
+
+    def test_incremental(self):
+        self.install("org.example.abc#1.2.3", {})
+        self.install("org.example.def#4.5.6", {})
+        self.index.refresh()
+
+        # Nothing changed
+        self.assertEqual((0, 0), self.index.refresh())
+
+        # Changed, added and removed packages
+        self.install("org.example.abc#1.2.3", {"org.example.ghi": "1.0.0"})
+        self.install("org.example.ghi#1.0.0", {})
+        (self.pkg_dir / "org.example.def#4.5.6" / "package" / "package.json").unlink()
+        (self.pkg_dir / "org.example.def#4.5.6" / "package").rmdir()
+        (self.pkg_dir / "org.example.def#4.5.6").rmdir()
+
+        self.assertEqual((2, 1), self.index.refresh())
+        self.assertListEqual(
+            ["org.example.abc", "org.example.ghi"],
+            [p.name for p in self.index.packages()],
+        )
+        self.assertDictEqual(
+            {"org.example.ghi": "1.0.0"},
+            self.index.dependencies("org.example.abc", "1.2.3"),
+        )
+
+    def test_persistent(self):
+        self.install("org.example.abc#1.2.3", {})
+        self.index.refresh()
+
+        with PackageIndex(self.pkg_dir) as index:
+            self.assertEqual((0, 0), index.refresh())
+            self.assertEqual(1, len(index.packages("org.example.abc")))
+
+    def test_check(self):
+        self.install("org.example.abc#1.2.3", {"org.example.def": "4.5.7"})
+        self.install("org.example.def#4.5.6", {})
+        sushi_config = {
+            "dependencies": {"org.example.abc": "1.2.3", "org.example.def": "4.5.6"}
+        }
+
+        with patch(
+            "fhir_scripts.package_index.default_pkg_dir", return_value=self.pkg_dir
+        ):
+            self.assertEqual((1, 1), check._check_transitive_deps(sushi_config))
+
+    def test_check_without_cache(self):
+        pkg_dir = Path(self.tmpdir.name) / "home" / ".fhir" / "packages"
+        sushi_config = {"dependencies": {"org.example.abc": "1.2.3"}}
+
+        with patch("fhir_scripts.package_index.default_pkg_dir", return_value=pkg_dir):
+            self.assertEqual((1, 0), check._check_transitive_deps(sushi_config))
+
+        self.assertFalse(pkg_dir.parent.exists())
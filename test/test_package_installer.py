@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts import package_installer
+
+
+class TestPackageInstaller(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pkg_dir = Path(self.tmpdir.name) / "packages"
+        self.package_dir = Path(self.tmpdir.name) / "archives"
+        self.package_dir.mkdir()
+        self.env = patch.dict(
+            os.environ,
+            {"FHIR_SCRIPTS_CACHE_DIR": str(Path(self.tmpdir.name) / "cache")},
+        )
+        self.env.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def archive(self, file_name: str, files: dict[str, bytes]) -> Path:
+        archive = self.package_dir / file_name
+        with tarfile.open(archive, "w:gz") as tar:
+            for name, content in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+
+        return archive
+
+    def package(self, pkg: str, version: str, deps: dict[str, str], separator="-"):
+        return self.archive(
+            f"{pkg}{separator}{version}.tgz",
+            {
+                "package/package.json": json.dumps(
+                    {"name": pkg, "version": version, "dependencies": deps}
+                ).encode(),
+                "package/StructureDefinition-a.json": b"{}",
+            },
+        )
+
+    def test_install_all(self):
+        self.package("org.example.abc", "1.2.3", {"org.example.def": "4.5.6"})
+        self.package("org.example.def", "4.5.6", {}, separator="_")
+
+        count = package_installer.install_all(
+            {"org.example.abc": "1.2.3"}, self.pkg_dir, self.package_dir
+        )
+
+        self.assertEqual(2, count)
+        self.assertTrue(
+            package_installer.installed("org.example.def", "4.5.6", self.pkg_dir)
+        )
+        self.assertListEqual(
+            ["org.example.abc#1.2.3", "org.example.def#4.5.6"],
+            sorted(os.listdir(self.pkg_dir)),
+        )
+
+        # Installed packages are kept
+        self.assertEqual(
+            0,
+            package_installer.install_all(
+                {"org.example.abc": "1.2.3"}, self.pkg_dir, self.package_dir
+            ),
+        )
+
+    def stream(self, archive: Path, urls: list[str]):
+        @contextmanager
+        def stream(url: str):
+            urls.append(url)
+            with archive.open("rb") as f:
+                yield f
+
+        return patch("fhir_scripts.tools.basic.http.stream", side_effect=stream)
+
+    def test_download(self):
+        archive = self.package("org.example.abc", "1.2.3", {})
+        archive = archive.rename(Path(self.tmpdir.name) / archive.name)
+        urls = []
+
+        with self.stream(archive, urls):
+            count = package_installer.install_all(
+                {"org.example.abc": "1.2.3"}, self.pkg_dir, self.package_dir
+            )
+
+        self.assertEqual(1, count)
+        self.assertListEqual(
+            [package_installer.FHIR_REGISTRY + "/org.example.abc/1.2.3"], urls
+        )
+
+        # The complete archive is kept in the package directory
+        self.assertEqual(
+            archive.read_bytes(),
+            (self.package_dir / "org.example.abc-1.2.3.tgz").read_bytes(),
+        )
+
+    def test_download_without_package_dir(self):
+        archive = self.package("org.example.abc", "1.2.3", {})
+        archive = archive.rename(Path(self.tmpdir.name) / archive.name)
+
+        with self.stream(archive, []):
+            count = package_installer.install_all(
+                {"org.example.abc": "1.2.3"}, self.pkg_dir
+            )
+
+        self.assertEqual(1, count)
+        self.assertTrue(
+            package_installer.installed("org.example.abc", "1.2.3", self.pkg_dir)
+        )
+        self.assertListEqual([], os.listdir(self.package_dir))
+
+    def test_atomic(self):
+        archive = self.archive("broken.tgz", {"other/file.json": b"{}"})
+
+        with self.assertRaises(Exception):
+            package_installer.install(archive, "org.example.abc", "1.2.3", self.pkg_dir)
+
+        self.assertListEqual([], os.listdir(self.pkg_dir))
+
+    def test_unsafe_paths(self):
+        archive = self.archive(
+            "unsafe.tgz",
+            {"package/package.json": b"{}", "../outside.json": b"{}"},
+        )
+
+        with self.assertRaises(tarfile.TarError):
+            package_installer.install(archive, "org.example.abc", "1.2.3", self.pkg_dir)
+
+        self.assertFalse((Path(self.tmpdir.name) / "outside.json").exists())
+        self.assertListEqual([], os.listdir(self.pkg_dir))
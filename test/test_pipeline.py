@@ -0,0 +1,165 @@
+import os
+import signal
+import threading
+import time
+import unittest
+
+from fhir_scripts import pipeline
+from fhir_scripts.models.build_config import BuildConfig
+from fhir_scripts.tools.basic import shell
+
+
+def create_steps(steps: list) -> list[pipeline.Step]:
+    return pipeline.create_steps(
+        BuildConfig.model_validate({"pipeline": steps}).pipeline
+    )
+
+
+class TestPipelineCreateSteps(unittest.TestCase):
+
+    def test_linear(self):
+        steps = create_steps(["sushi", "igpub", {"shell": "touch file"}])
+
+        self.assertListEqual(["sushi", "igpub", "shell"], [s.id for s in steps])
+        self.assertListEqual([[], ["sushi"], ["igpub"]], [s.needs for s in steps])
+        self.assertEqual("touch file", steps[2].args)
+
+    def test_needs(self):
+        steps = create_steps(
+            [
+                "sushi",
+                {"step": "requirements", "needs": []},
+                {"id": "lint", "shell": "ls", "needs": ["sushi", "requirements"]},
+            ]
+        )
+
+        self.assertListEqual(["sushi", "requirements", "lint"], [s.id for s in steps])
+        self.assertListEqual(
+            [[], [], ["sushi", "requirements"]], [s.needs for s in steps]
+        )
+        self.assertEqual("shell", steps[2].name)
+
+    def test_same_name(self):
+        steps = create_steps([{"shell": "ls"}, {"shell": "pwd"}])
+
+        self.assertListEqual(["shell#1", "shell#2"], [s.id for s in steps])
+
+
+class TestPipelineValidate(unittest.TestCase):
+
+    def test_valid(self):
+        pipeline.validate(create_steps(["sushi", "igpub"]))
+
+    def test_duplicate(self):
+        with self.assertRaises(Exception) as e:
+            pipeline.validate(create_steps(["sushi", {"id": "sushi", "shell": "ls"}]))
+
+        self.assertIn("duplicate", str(e.exception))
+
+    def test_unknown(self):
+        with self.assertRaises(Exception) as e:
+            pipeline.validate(create_steps([{"step": "sushi", "needs": ["foo"]}]))
+
+        self.assertIn("foo", str(e.exception))
+
+    def test_cycle(self):
+        with self.assertRaises(Exception) as e:
+            pipeline.validate(
+                create_steps(
+                    [
+                        {"step": "sushi", "needs": ["igpub"]},
+                        {"step": "igpub", "needs": ["sushi"]},
+                    ]
+                )
+            )
+
+        self.assertIn("cycle", str(e.exception))
+
+
+class TestPipelineRun(unittest.TestCase):
+
+    STEPS = [
+        "sushi",
+        {"step": "requirements", "needs": []},
+        {"step": "igpub", "needs": ["sushi", "requirements"]},
+        {"step": "openapi", "needs": ["igpub"]},
+        {"step": "igpub_qa", "needs": ["igpub"]},
+    ]
+
+    def test_stages(self):
+        stages = pipeline.stages(create_steps(self.STEPS))
+
+        self.assertListEqual(
+            [["sushi", "requirements"], ["igpub"], ["openapi", "igpub_qa"]],
+            [[s.id for s in stage] for stage in stages],
+        )
+
+    def test_order(self):
+        lock = threading.Lock()
+        started = []
+        finished = []
+
+        def func(step: pipeline.Step):
+            with lock:
+                started.append((step.id, set(finished)))
+
+            time.sleep(0.1)
+
+            with lock:
+                finished.append(step.id)
+
+        steps = create_steps(self.STEPS)
+        start = time.monotonic()
+        durations = pipeline.run(steps, func, workers=4)
+
+        # Independent steps run at the same time
+        self.assertLess(time.monotonic() - start, 0.45)
+        self.assertSetEqual({s.id for s in steps}, set(durations.keys()))
+
+        for id, done in started:
+            step = next(s for s in steps if s.id == id)
+            self.assertTrue(set(step.needs) <= done)
+
+    def test_error(self):
+        processed = []
+
+        def func(step: pipeline.Step):
+            if step.id == "sushi":
+                raise Exception("failed")
+
+            processed.append(step.id)
+
+        with self.assertRaises(Exception) as e:
+            pipeline.run(create_steps(self.STEPS), func, workers=1)
+
+        self.assertEqual("failed", str(e.exception))
+        self.assertNotIn("igpub", processed)
+
+    def test_interrupt(self):
+        def func(step: pipeline.Step):
+            shell.run("sleep 5", log_output=False)
+
+        # Ctrl+C only reaches this process, not the command of the running step
+        timer = threading.Timer(0.3, os.kill, (os.getpid(), signal.SIGINT))
+        timer.start()
+
+        start = time.monotonic()
+        with self.assertRaises(KeyboardInterrupt):
+            pipeline.run(create_steps(["sushi"]), func)
+
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_critical_path(self):
+        steps = create_steps(self.STEPS)
+        durations = {
+            "sushi": 5,
+            "requirements": 1,
+            "igpub": 10,
+            "openapi": 1,
+            "igpub_qa": 2,
+        }
+
+        self.assertListEqual(
+            ["sushi", "igpub", "igpub_qa"],
+            [s.id for s in pipeline.critical_path(steps, durations)],
+        )
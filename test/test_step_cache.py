@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts import step_cache
+
+
+class TestStepCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(
+            os.environ, {"FHIR_SCRIPTS_CACHE_DIR": self.cache_dir.name}
+        )
+        self.env.start()
+        os.chdir(self.tmpdir.name)
+
+        Path("input/fsh").mkdir(parents=True)
+        Path("input/fsh/profile.fsh").write_text("Profile: A")
+        Path("sushi-config.yaml").write_text("id: test")
+
+        self.version = "1.0.0"
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.env.stop()
+        self.tmpdir.cleanup()
+        self.cache_dir.cleanup()
+        return super().tearDown()
+
+    def cache(
+        self, config: dict = {}, store_outputs: bool = False
+    ) -> step_cache.StepCache:
+        spec = step_cache.Spec(
+            inputs=["input", "*.yaml"],
+            outputs=["fsh-generated"],
+            version=lambda: self.version,
+            exclude=["input/data"],
+        )
+        return step_cache.StepCache("sushi", spec, config, store_outputs)
+
+    def run_step(self, content: str = "generated", store_outputs: bool = False):
+        Path("fsh-generated").mkdir(exist_ok=True)
+        Path("fsh-generated/profile.json").write_text(content)
+        self.cache(store_outputs=store_outputs).save()
+
+    def test_not_run(self):
+        self.assertEqual("no previous run", self.cache().outdated())
+
+    def test_up_to_date(self):
+        self.run_step()
+
+        cache = self.cache()
+        self.assertIsNone(cache.outdated())
+        self.assertFalse(cache.restore())
+
+    def test_input_changed(self):
+        self.run_step()
+        Path("input/fsh/profile.fsh").write_text("Profile: B")
+
+        self.assertIn("input/fsh/profile.fsh", self.cache().outdated())
+
+    def test_input_added(self):
+        self.run_step()
+        Path("input/fsh/other.fsh").write_text("Profile: C")
+
+        self.assertIn("input/fsh/other.fsh", self.cache().outdated())
+
+    def test_version_changed(self):
+        self.run_step()
+        self.version = "2.0.0"
+
+        self.assertIn("tool version", self.cache().outdated())
+
+    def test_config_changed(self):
+        self.run_step()
+
+        self.assertEqual(
+            "configuration changed", self.cache({"args": "other"}).outdated()
+        )
+
+    def test_excluded(self):
+        self.run_step()
+        Path("input/data").mkdir()
+        Path("input/data/requirements.json").write_text("[]")
+
+        self.assertIsNone(self.cache().outdated())
+
+    def test_output_changed(self):
+        self.run_step()
+        Path("fsh-generated/profile.json").write_text("modified")
+
+        self.assertEqual("outputs changed", self.cache().outdated())
+        self.assertFalse(
+            (self.cache().dir / step_cache.OUTPUTS_NAME / "fsh-generated").exists()
+        )
+
+    def test_restore(self):
+        self.run_step(store_outputs=True)
+        Path("fsh-generated/profile.json").write_text("modified")
+        Path("fsh-generated/extra.json").write_text("extra")
+
+        cache = self.cache(store_outputs=True)
+        self.assertIsNone(cache.outdated())
+        self.assertTrue(cache.restore())
+
+        self.assertEqual("generated", Path("fsh-generated/profile.json").read_text())
+        self.assertFalse(Path("fsh-generated/extra.json").exists())
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts import tools
+
+
+class TestToolsRegistry(unittest.TestCase):
+
+    def test_builtin_match_modules(self):
+        for name, tool in tools.BUILTIN_TOOLS.items():
+            module = tool.load()
+
+            self.assertEqual(name, module.__name__.rsplit(".", 1)[-1])
+            self.assertEqual(module.__tool_name__, tool.tool_name)
+            self.assertEqual(getattr(module, "__installer__", None), tool.installer)
+            self.assertListEqual(
+                [c for c in tools.CAPABILITIES if hasattr(module, c)],
+                tool.capabilities,
+            )
+
+    def test_capability(self):
+        result = tools.get_tools(tools.UPDATE)
+
+        self.assertIn("sushi", result)
+        self.assertNotIn("gcloud", result)
+
+
+class TestToolsEntryPoints(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"FHIR_SCRIPTS_CACHE_DIR": self.tmpdir.name})
+        self.env.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def entry_points(self, *args, **kwargs):
+        return [
+            EntryPoint(
+                name="other", value="fhir_scripts.tools.gcloud", group=kwargs["group"]
+            )
+        ]
+
+    def test_registered(self):
+        with patch("importlib.metadata.entry_points", side_effect=self.entry_points):
+            tool = tools.get_tool("other")
+
+        self.assertIsNotNone(tool)
+        self.assertEqual("gCloud SDK", tool.tool_name)
+        self.assertListEqual([tools.VERSION, tools.LATEST_VERSION], tool.capabilities)
+
+    def test_manifest_cached(self):
+        with patch("importlib.metadata.entry_points", side_effect=self.entry_points):
+            tools.get_tools()
+
+        manifest = json.loads(
+            (Path(self.tmpdir.name) / tools.MANIFEST_NAME).read_text("utf-8")
+        )
+        self.assertEqual(1, len(manifest))
+
+        # Module is not imported again if described in manifest
+        with patch("importlib.metadata.entry_points", side_effect=self.entry_points):
+            with patch("importlib.import_module") as import_module:
+                tool = tools.get_tool("other")
+
+        import_module.assert_not_called()
+        self.assertEqual("gCloud SDK", tool.tool_name)
@@ -0,0 +1,205 @@
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from fhir_scripts.tools.basic import archive
+
+
+class Unseekable(io.RawIOBase):
+    """
+    Stream without seeking, so sizes are written to data descriptors
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self.file.write(b)
+
+
+class TestArchiveUpdate(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.archive = self.dir / "full-ig.zip"
+
+        with ZipFile(self.archive, "w", ZIP_DEFLATED) as zf:
+            zf.writestr("site/index.html", "<html>" * 1000)
+            zf.writestr("site/openapi.json", "{}")
+            zf.writestr("site/image.png", b"\x89PNG", compress_type=ZIP_STORED)
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def test_update(self):
+        new_file = self.dir / "openapi.json"
+        new_file.write_text('{"openapi": "3.0"}')
+        added_file = self.dir / "other.json"
+        added_file.write_text("[]")
+
+        result = archive.update(
+            self.archive,
+            {"site/openapi.json": new_file, "site/other.json": added_file},
+        )
+
+        self.assertEqual((2, 2), result)
+        with ZipFile(self.archive) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual("<html>" * 1000, zf.read("site/index.html").decode())
+            self.assertEqual(b'{"openapi": "3.0"}', zf.read("site/openapi.json"))
+            self.assertEqual(b"[]", zf.read("site/other.json"))
+            self.assertEqual(ZIP_STORED, zf.getinfo("site/image.png").compress_type)
+            self.assertEqual(4, len(zf.infolist()))
+
+    def test_copied_raw(self):
+        with ZipFile(self.archive) as zf:
+            before = zf.getinfo("site/index.html")
+
+        with patch("zipfile._get_decompressor") as decompressor:
+            archive.update(self.archive, {})
+            decompressor.assert_not_called()
+
+        with ZipFile(self.archive) as zf:
+            after = zf.getinfo("site/index.html")
+
+        self.assertEqual(before.compress_size, after.compress_size)
+        self.assertEqual(before.CRC, after.CRC)
+
+    def test_data_descriptor(self):
+        with self.archive.open("wb") as f, ZipFile(Unseekable(f), "w") as zf:
+            zf.writestr("site/index.html", "<html>")
+
+        archive.update(self.archive, {})
+
+        with ZipFile(self.archive) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(0, zf.getinfo("site/index.html").flag_bits & 0x08)
+
+    def test_without_raw_copy(self):
+        new_file = self.dir / "openapi.json"
+        new_file.write_text('{"openapi": "3.0"}')
+
+        with patch(
+            "fhir_scripts.tools.basic.archive.raw_supported", return_value=False
+        ):
+            result = archive.update(self.archive, {"site/openapi.json": new_file})
+
+        self.assertEqual((2, 1), result)
+        with ZipFile(self.archive) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual("<html>" * 1000, zf.read("site/index.html").decode())
+            self.assertEqual(b'{"openapi": "3.0"}', zf.read("site/openapi.json"))
+            self.assertEqual(ZIP_STORED, zf.getinfo("site/image.png").compress_type)
+
+    def test_raw_supported(self):
+        with ZipFile(self.archive) as zf:
+            self.assertTrue(archive.raw_supported(zf))
+
+    def test_strip_extra(self):
+        zip64 = (0x0001).to_bytes(2, "little") + (8).to_bytes(2, "little") + bytes(8)
+        other = (0x5455).to_bytes(2, "little") + (1).to_bytes(2, "little") + b"\x00"
+
+        self.assertEqual(
+            other + other, archive.strip_extra(other + zip64 + other, 0x0001)
+        )
+        self.assertEqual(b"", archive.strip_extra(zip64, 0x0001))
+
+    def test_atomic(self):
+        before = self.archive.read_bytes()
+
+        with self.assertRaises(OSError):
+            archive.update(self.archive, {"site/missing.json": self.dir / "missing"})
+
+        self.assertEqual(before, self.archive.read_bytes())
+        self.assertListEqual(["full-ig.zip"], os.listdir(self.dir))
+
+
+class TestArchiveWriteFiles(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.files = {}
+
+        for i in range(50):
+            file = self.dir / f"page{i}.html"
+            file.write_text(f"<html><body>{i}</body></html>" * (i + 1))
+            self.files[f"site/page{i}.html"] = file
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def write(self, file_name: str, **kwargs) -> bytes:
+        archive_file = self.dir / file_name
+        with ZipFile(archive_file, "w") as zf:
+            archive.write_files(zf, self.files, **kwargs)
+
+        return archive_file.read_bytes()
+
+    def test_content(self):
+        self.write("archive.zip", workers=4)
+
+        with ZipFile(self.dir / "archive.zip") as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertListEqual(sorted(self.files.keys()), zf.namelist())
+            self.assertEqual(
+                self.files["site/page3.html"].read_bytes(), zf.read("site/page3.html")
+            )
+
+    def test_deterministic(self):
+        first = self.write("first.zip", workers=1)
+
+        # Modification times and the number of workers do not matter
+        for file in self.files.values():
+            os.utime(file, (0, 0))
+
+        self.assertEqual(first, self.write("second.zip", workers=8))
+
+    def test_deterministic_without_raw_copy(self):
+        with patch(
+            "fhir_scripts.tools.basic.archive.raw_supported", return_value=False
+        ):
+            first = self.write("first.zip")
+
+            for file in self.files.values():
+                os.utime(file, (0, 0))
+
+            self.assertEqual(first, self.write("second.zip"))
+
+    def test_chunked(self):
+        first = self.write("first.zip")
+
+        # Files spanning multiple chunks and compressed to temporary files
+        with (
+            patch("fhir_scripts.tools.basic.archive.COPY_SIZE", 7),
+            patch("fhir_scripts.tools.basic.archive.SPOOL_SIZE", 16),
+        ):
+            self.assertEqual(first, self.write("second.zip", workers=4))
+
+    def test_level(self):
+        self.assertGreater(
+            len(self.write("stored.zip", level=0)), len(self.write("best.zip", level=9))
+        )
+
+    def test_level_without_raw_copy(self):
+        with patch(
+            "fhir_scripts.tools.basic.archive.raw_supported", return_value=False
+        ):
+            self.assertGreater(
+                len(self.write("stored.zip", level=0)),
+                len(self.write("best.zip", level=9)),
+            )
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from fhir_scripts.tools.basic import http
+
+
+class Handler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    body = b"content"
+    requests: list[dict] = []
+
+    def do_GET(self):
+        Handler.requests.append(dict(self.headers))
+
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        if self.headers.get("If-None-Match") == Handler.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", Handler.etag)
+        self.send_header("Content-Length", str(len(Handler.body)))
+        self.end_headers()
+        self.wfile.write(Handler.body)
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+class TestHttpGet(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        return super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        return super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"FHIR_SCRIPTS_CACHE_DIR": self.tmpdir.name})
+        self.env.start()
+        Handler.requests = []
+        Handler.etag = '"v1"'
+        Handler.body = b"content"
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def test_cached(self):
+        first = http.get(self.url + "/file")
+        second = http.get(self.url + "/file")
+
+        self.assertEqual(1, len(Handler.requests))
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual("content", second.text)
+
+    def test_revalidate(self):
+        http.get(self.url + "/file")
+        res = http.get(self.url + "/file", max_age=0)
+
+        self.assertEqual(2, len(Handler.requests))
+        self.assertEqual('"v1"', Handler.requests[1].get("If-None-Match"))
+        self.assertTrue(res.from_cache)
+        self.assertEqual("content", res.text)
+
+    def test_changed(self):
+        http.get(self.url + "/file")
+
+        Handler.etag = '"v2"'
+        Handler.body = b"changed"
+        res = http.get(self.url + "/file", max_age=0)
+
+        self.assertFalse(res.from_cache)
+        self.assertEqual("changed", res.text)
+        self.assertEqual("changed", http.get(self.url + "/file").text)
+
+    def test_not_cached_error(self):
+        http.get(self.url + "/missing")
+        res = http.get(self.url + "/missing")
+
+        self.assertEqual(2, len(Handler.requests))
+        self.assertEqual(404, res.status_code)
+
+    def test_offline(self):
+        http.get(self.url + "/file")
+
+        with patch.dict(os.environ, {"FHIR_SCRIPTS_OFFLINE": "1"}):
+            res = http.get(self.url + "/file", max_age=0)
+            missing = http.get(self.url + "/other")
+
+        self.assertEqual(1, len(Handler.requests))
+        self.assertEqual("content", res.text)
+        self.assertEqual(504, missing.status_code)
+
+    def test_unreachable(self):
+        http.get(self.url + "/file")
+
+        with patch.object(http.session(), "get", side_effect=ConnectionError()):
+            res = http.get(self.url + "/file", max_age=0)
+
+        self.assertTrue(res.from_cache)
+
+    def test_stream(self):
+        with http.stream(self.url + "/file") as stream:
+            self.assertEqual(b"content", stream.read())
+
+        # Not cached
+        with patch.dict(os.environ, {"FHIR_SCRIPTS_OFFLINE": "1"}):
+            with self.assertRaises(Exception):
+                with http.stream(self.url + "/file"):
+                    pass
+
+    def test_stream_missing(self):
+        with self.assertRaises(Exception):
+            with http.stream(self.url + "/missing"):
+                pass
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts.exception import PrerequisiteFailed
+from fhir_scripts.tools.basic import java
+from fhir_scripts.tools.basic.shell import ShellResult
+from fhir_scripts.version import Version
+
+PROPERTIES_OUTPUT = """Property settings:
+    java.home = /usr/lib/jvm/java-21-openjdk-amd64
+    java.vendor = Eclipse Adoptium
+    java.version = 21.0.2
+    java.vm.name = OpenJDK 64-Bit Server VM
+
+openjdk version "21.0.2" 2024-01-16
+"""
+
+
+@patch("fhir_scripts.tools.basic.version_cache._stats", lambda *args: None)
+@patch("fhir_scripts.tools.basic.java.shell.which", lambda *args: "/usr/bin/java")
+class TestJavaRuntime(unittest.TestCase):
+
+    def setUp(self) -> None:
+        java.runtime.cache_clear()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        java.runtime.cache_clear()
+        return super().tearDown()
+
+    def shell_run(self, output: str):
+        def run(*args, **kwargs):
+            res = ShellResult()
+            res.stdout = output
+            return res
+
+        return patch("fhir_scripts.tools.basic.java.shell.run", side_effect=run)
+
+    def test_detect(self):
+        with self.shell_run(PROPERTIES_OUTPUT):
+            runtime = java.runtime()
+
+        self.assertEqual("/usr/bin/java", runtime.path)
+        self.assertEqual(Version("21.0.2"), runtime.version)
+        self.assertEqual("Eclipse Adoptium", runtime.vendor)
+        self.assertTrue(runtime.has("auto_cds"))
+
+    def test_old_version_scheme(self):
+        with self.shell_run("java.version = 1.8.0_392"):
+            runtime = java.runtime()
+
+        self.assertEqual("8", runtime.version.major)
+        self.assertFalse(runtime.has("unified_logging"))
+
+    def test_detected_once(self):
+        with self.shell_run(PROPERTIES_OUTPUT) as run:
+            java.has_min_version(Version("17"))
+            java.has_min_version(Version("21"))
+            java.version()
+
+        run.assert_called_once()
+
+    def test_min_version(self):
+        with self.shell_run(PROPERTIES_OUTPUT):
+            self.assertTrue(java.has_min_version(Version("17")))
+            self.assertTrue(java.has_min_version(Version("21")))
+            self.assertFalse(java.has_min_version(Version("25")))
+
+    def test_require_min_version(self):
+        with self.shell_run(PROPERTIES_OUTPUT):
+            with self.assertRaises(PrerequisiteFailed):
+                java.require_min_version(Version("25"))
+
+
+class TestJavaCds(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(
+            os.environ, {"FHIR_SCRIPTS_CACHE_DIR": self.tmpdir.name + "/cache"}
+        )
+        self.env.start()
+
+        self.jar = Path(self.tmpdir.name) / "publisher.jar"
+        self.jar.write_bytes(b"jar")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def runtime(self, version: str):
+        major = int(version.split(".")[0])
+        runtime = java.JavaRuntime(
+            "/usr/bin/java",
+            Version(version),
+            None,
+            [f for f, since in java.FEATURES.items() if major >= since],
+        )
+        return patch("fhir_scripts.tools.basic.java.runtime", return_value=runtime)
+
+    def test_not_supported(self):
+        with self.runtime("11.0.2"):
+            self.assertListEqual([], java.cds_args(self.jar, create=True))
+
+    def test_no_archive(self):
+        with self.runtime("21.0.2"):
+            self.assertListEqual([], java.cds_args(self.jar))
+            self.assertFalse(java.cds_in_use(self.jar))
+
+    def test_create_auto(self):
+        with self.runtime("21.0.2"):
+            archive = java.cds_archive(self.jar)
+
+            self.assertListEqual(
+                [f"-XX:SharedArchiveFile={archive}", "-XX:+AutoCreateSharedArchive"],
+                java.cds_args(self.jar, create=True),
+            )
+            self.assertTrue(archive.parent.exists())
+
+    def test_create_dynamic(self):
+        with self.runtime("17.0.2"):
+            archive = java.cds_archive(self.jar)
+
+            self.assertListEqual(
+                [f"-XX:ArchiveClassesAtExit={archive}"],
+                java.cds_args(self.jar, create=True),
+            )
+
+    def test_use(self):
+        with self.runtime("17.0.2"):
+            archive = java.cds_archive(self.jar)
+            archive.parent.mkdir(parents=True)
+            archive.write_bytes(b"archive")
+
+            self.assertListEqual(
+                [f"-XX:SharedArchiveFile={archive}"], java.cds_args(self.jar)
+            )
+            self.assertTrue(java.cds_in_use(self.jar))
+
+    def test_jar_changed(self):
+        with self.runtime("21.0.2"):
+            archive = java.cds_archive(self.jar)
+            archive.parent.mkdir(parents=True)
+            archive.write_bytes(b"archive")
+
+            self.jar.write_bytes(b"new jar")
+            new_archive = java.cds_archive(self.jar)
+            java.cds_args(self.jar, create=True)
+
+        self.assertNotEqual(archive, new_archive)
+        self.assertFalse(archive.exists())
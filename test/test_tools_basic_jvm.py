@@ -0,0 +1,117 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts.models.build_config import BuildJvmConfig
+from fhir_scripts.tools.basic import jvm
+
+GB = 1024 * 1024 * 1024
+
+GC_LOG = """[0.012s][info][gc] Using G1
+[0.512s][info][gc] GC(0) Pause Young (Normal) (G1 Evacuation Pause) 24M->3M(256M) 2.500ms
+[1.024s][info][gc] GC(1) Pause Young (Normal) (G1 Evacuation Pause) 30M->5M(256M) 7.500ms
+[1.100s][info][gc] GC(2) Concurrent Mark Cycle 12.000ms
+"""
+
+
+class TestJvmLimits(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cgroup = Path(self.tmpdir.name)
+        self.patch = patch("fhir_scripts.tools.basic.jvm.CGROUP_DIR", self.cgroup)
+        self.patch.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def test_cgroup_v2(self):
+        (self.cgroup / "memory.max").write_text(f"{8 * GB}\n")
+        (self.cgroup / "cpu.max").write_text("200000 100000\n")
+
+        self.assertEqual(8 * GB, jvm.memory_limit())
+        self.assertEqual(2, jvm.cpu_limit())
+
+    def test_cgroup_v2_unlimited(self):
+        (self.cgroup / "memory.max").write_text("max\n")
+        (self.cgroup / "cpu.max").write_text("max 100000\n")
+
+        # Falls back to the resources of the machine
+        self.assertGreater(jvm.memory_limit(), 0)
+        self.assertGreaterEqual(jvm.cpu_limit(), 1)
+
+    def test_cgroup_v1(self):
+        (self.cgroup / "memory").mkdir()
+        (self.cgroup / "memory" / "memory.limit_in_bytes").write_text(f"{4 * GB}\n")
+        (self.cgroup / "cpu").mkdir()
+        (self.cgroup / "cpu" / "cpu.cfs_quota_us").write_text("150000\n")
+        (self.cgroup / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+        self.assertEqual(4 * GB, jvm.memory_limit())
+        self.assertEqual(1.5, jvm.cpu_limit())
+
+
+class TestJvmOptions(unittest.TestCase):
+
+    def limits(self, memory: int, cpus: float):
+        return (
+            patch("fhir_scripts.tools.basic.jvm.memory_limit", return_value=memory),
+            patch("fhir_scripts.tools.basic.jvm.cpu_limit", return_value=cpus),
+        )
+
+    def options(self, memory: int, cpus: float, *args, **kwargs) -> list[str]:
+        memory_patch, cpu_patch = self.limits(memory, cpus)
+        with memory_patch, cpu_patch:
+            return jvm.options(*args, **kwargs)
+
+    def test_auto(self):
+        self.assertListEqual(
+            ["-Xmx6144m", "-XX:+UseG1GC", "-XX:ParallelGCThreads=4"],
+            self.options(8 * GB, 4),
+        )
+
+    def test_auto_small(self):
+        self.assertListEqual(["-Xmx768m", "-XX:+UseSerialGC"], self.options(GB, 1))
+
+    def test_configured(self):
+        self.assertListEqual(
+            ["-Xmx4g", "-XX:+UseParallelGC", "-XX:ParallelGCThreads=2"],
+            self.options(8 * GB, 4, max_heap="4g", gc="parallel", gc_threads=2),
+        )
+
+    def test_percentage(self):
+        self.assertIn(
+            "-XX:MaxRAMPercentage=60.0", self.options(8 * GB, 4, max_heap="60%")
+        )
+
+    def test_tool_override(self):
+        config = BuildJvmConfig.model_validate(
+            {
+                "max_heap": "4g",
+                "args": ["-Dfoo"],
+                "igpub": {"gc": "z", "args": ["-Dbar"]},
+            }
+        )
+        tool = config.tool("igpub")
+
+        self.assertEqual("4g", tool.max_heap)
+        self.assertEqual("z", tool.gc)
+        self.assertListEqual(["-Dfoo", "-Dbar"], tool.args)
+        self.assertIsNone(config.tool("fhir_pkg_tool").gc)
+
+
+class TestJvmGcSummary(unittest.TestCase):
+
+    def test_summary(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = Path(tmpdir) / "gc.log"
+            log_file.write_text(GC_LOG)
+
+            self.assertEqual((2, 10.0), jvm.gc_summary(log_file))
+
+    def test_missing(self):
+        self.assertEqual((0, 0.0), jvm.gc_summary(Path("does-not-exist.log")))
@@ -0,0 +1,57 @@
+import re
+import time
+import unittest
+
+from fhir_scripts.exception import OutputAbortedException
+from fhir_scripts.tools.basic import output, shell
+
+ERROR = re.compile(r"^error\s")
+WARNING = re.compile(r"^warn\s")
+
+
+class TestOutputParser(unittest.TestCase):
+
+    def test_count(self):
+        parser = output.OutputParser(ERROR, WARNING)
+
+        for line in ["info Start", "error Broken", "warn Odd", "warn Odder", "done"]:
+            parser(line)
+
+        self.assertEqual(1, parser.errors)
+        self.assertEqual(2, parser.warnings)
+        self.assertEqual("1 error(s), 2 warning(s)", parser.summary())
+        self.assertEqual(2, parser.error_records[0].line)
+
+    def test_max_errors(self):
+        parser = output.OutputParser(ERROR, WARNING, max_errors=2)
+        parser("error First")
+
+        with self.assertRaises(OutputAbortedException):
+            parser("error Second")
+
+    def test_fatal(self):
+        parser = output.OutputParser(ERROR, WARNING, fatal=[r"OutOfMemoryError"])
+
+        with self.assertRaises(OutputAbortedException):
+            parser("java.lang.OutOfMemoryError: Java heap space")
+
+        self.assertEqual(1, parser.errors)
+
+    def test_records_bounded(self):
+        parser = output.OutputParser(ERROR, WARNING)
+
+        for i in range(output.MAX_RECORDS + 10):
+            parser(f"warn {i}")
+
+        self.assertEqual(output.MAX_RECORDS + 10, parser.warnings)
+        self.assertEqual(output.MAX_RECORDS, len(parser.records))
+
+    def test_stops_process(self):
+        parser = output.OutputParser(ERROR, WARNING, max_errors=1)
+
+        start = time.monotonic()
+        with self.assertRaises(OutputAbortedException):
+            shell.run("echo 'error Broken'; sleep 5", log_output=False, on_line=parser)
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertSetEqual(set(), shell._processes)
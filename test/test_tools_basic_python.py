@@ -8,9 +8,9 @@ from fhir_scripts.version import Version
 
 class TestPythonInstall(unittest.TestCase):
 
+    @patch("fhir_scripts.tools.basic.python.uv_available", lambda: True)
+    @patch("fhir_scripts.tools.basic.python.pipx_available", lambda: False)
     def test_uv_installed(self):
-        python.UV_AVAILABLE = True
-        python.PIPX_AVAILABLE = False
 
         pkg = "test"
         cmd_wanted = "uv tool install --force {}".format(pkg)
@@ -28,9 +28,9 @@ class TestPythonInstall(unittest.TestCase):
         self.assertEqual(1, len(called_cmd))
         self.assertEqual(cmd_wanted, called_cmd[0])
 
+    @patch("fhir_scripts.tools.basic.python.uv_available", lambda: False)
+    @patch("fhir_scripts.tools.basic.python.pipx_available", lambda: True)
     def test_pipx_installed(self):
-        python.UV_AVAILABLE = False
-        python.PIPX_AVAILABLE = True
 
         pkg = "test"
         cmd_wanted = "pipx install -f {}".format(pkg)
@@ -48,9 +48,9 @@ class TestPythonInstall(unittest.TestCase):
         self.assertEqual(1, len(called_cmd))
         self.assertEqual(cmd_wanted, called_cmd[0])
 
+    @patch("fhir_scripts.tools.basic.python.uv_available", lambda: False)
+    @patch("fhir_scripts.tools.basic.python.pipx_available", lambda: False)
     def test_none_installed(self):
-        python.UV_AVAILABLE = True
-        python.PIPX_AVAILABLE = False
 
         pkg = "test"
 
@@ -64,6 +64,27 @@ class TestPythonInstall(unittest.TestCase):
             self.fail("Did not raise exception if no Python manager is installed")
 
 
+class TestPythonAvailable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        python.uv_available.cache_clear()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        python.uv_available.cache_clear()
+        return super().tearDown()
+
+    def test_checked_once(self):
+        with patch(
+            "fhir_scripts.tools.basic.python.is_installed", return_value=True
+        ) as is_installed:
+            self.assertTrue(python.uv_available())
+            self.assertTrue(python.uv_available())
+
+        is_installed.assert_called_once_with("uv")
+
+
+@patch("fhir_scripts.tools.basic.version_cache._stats", lambda *args: None)
 class TestPythonVersion(unittest.TestCase):
     def test_version(self):
         version = Version("3.1.2")
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import signal
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts.tools.basic import shell
+
+
+class TestShellWhich(unittest.TestCase):
+
+    def setUp(self) -> None:
+        shell._executables.clear()
+        return super().setUp()
+
+    def test_found(self):
+        exe = shell.which("sh")
+
+        self.assertIsNotNone(exe)
+        self.assertTrue(os.path.isabs(exe))
+
+    def test_not_found(self):
+        self.assertIsNone(shell.which("fhirscripts-does-not-exist"))
+
+    def test_remembered(self):
+        with patch("shutil.which", return_value="/bin/sh") as which:
+            shell.which("sh")
+            shell.which("sh")
+
+        which.assert_called_once()
+
+    def test_path_changed(self):
+        with patch("shutil.which", return_value="/bin/sh") as which:
+            shell.which("sh")
+
+            with patch.dict(os.environ, {"PATH": "/bin"}):
+                shell.which("sh")
+
+        self.assertEqual(2, which.call_count)
+
+
+class TestShellRun(unittest.TestCase):
+
+    def test_direct(self):
+        args, use_shell = shell._popen_args("echo 'Hello World'")
+
+        self.assertFalse(use_shell)
+        self.assertEqual(shell.which("echo"), args[0])
+        self.assertListEqual(["Hello World"], args[1:])
+
+    def test_shell_syntax(self):
+        cmd = "echo Hello | cat"
+        self.assertEqual((cmd, True), shell._popen_args(cmd))
+
+    def test_not_found(self):
+        cmd = "fhirscripts-does-not-exist -v"
+        self.assertEqual((cmd, True), shell._popen_args(cmd))
+
+    def test_output(self):
+        res = shell.run("echo 'Hello World'", log_output=False)
+
+        self.assertEqual(0, res.returncode)
+        self.assertListEqual(["Hello World"], res.stdout)
+
+    def test_list(self):
+        res = shell.run(["echo", "Hello", "World"], log_output=False)
+
+        self.assertListEqual(["Hello World"], res.stdout)
+
+    def test_check(self):
+        with self.assertRaises(shell.CalledProcessError):
+            shell.run("fhirscripts-does-not-exist -v", check=True, log_output=False)
+
+
+class TestShellRunCapture(unittest.TestCase):
+
+    CMD = 'for i in 1 2 3 4 5; do echo "line $i"; done'
+
+    def test_all(self):
+        res = shell.run(self.CMD, log_output=False)
+
+        self.assertEqual(5, len(res.stdout))
+
+    def test_bounded(self):
+        res = shell.run(self.CMD, log_output=False, capture=2)
+
+        self.assertListEqual(["line 4", "line 5"], res.stdout)
+
+    def test_none(self):
+        res = shell.run("echo Hello; exit 3", log_output=False, capture=0)
+
+        self.assertListEqual([], res.stdout)
+        self.assertEqual(3, res.returncode)
+
+    def test_log_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = Path(tmpdir) / "logs" / "output.log"
+            res = shell.run(self.CMD, log_output=False, capture=1, log_file=log_file)
+
+            self.assertListEqual(["line 5"], res.stdout)
+            self.assertEqual(
+                "".join(f"line {i}\n" for i in range(1, 6)), log_file.read_text()
+            )
+
+    def test_strip_colors(self):
+        cmd = "printf '\\033[31mred\\033[0m\\n'"
+
+        self.assertListEqual(["red"], shell.run(cmd, log_output=False).stdout)
+        self.assertListEqual(
+            ["\x1b[31mred\x1b[0m"],
+            shell.run(cmd, log_output=False, strip_colors=False).stdout,
+        )
+
+
+class TestShellRunAsync(unittest.TestCase):
+
+    def test_concurrent(self):
+        async def run_both():
+            return await asyncio.gather(
+                shell.run_async("sleep 0.5; echo first", log_output=False),
+                shell.run_async("sleep 0.5; echo second", log_output=False),
+            )
+
+        start = time.monotonic()
+        first, second = asyncio.run(run_both())
+
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertListEqual(["first"], first.stdout)
+        self.assertListEqual(["second"], second.stdout)
+
+    def test_on_line(self):
+        lines = []
+        shell.run("echo a; echo b", log_output=False, capture=0, on_line=lines.append)
+
+        self.assertListEqual(["a", "b"], lines)
+
+    def test_no_trailing_newline(self):
+        res = shell.run("printf 'a\\nb'", log_output=False)
+
+        self.assertListEqual(["a", "b"], res.stdout)
+
+    def test_timeout(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            marker = Path(tmpdir) / "marker"
+
+            # The subshell keeps running unless the whole process group is terminated
+            with self.assertRaises(shell.TimeoutExpired):
+                shell.run(
+                    f"(sleep 1; touch {marker}) & wait",
+                    log_output=False,
+                    timeout=0.2,
+                )
+
+            time.sleep(1.2)
+            self.assertFalse(marker.exists())
+            self.assertSetEqual(set(), shell._processes)
+
+    def test_interactive(self):
+        cmd = ["python3", "-c", "import os; print(os.getpgrp())"]
+
+        # Only interactive commands run in the process group of the caller
+        self.assertNotEqual(
+            [str(os.getpgrp())], shell.run(cmd, log_output=False).stdout
+        )
+        self.assertListEqual(
+            [str(os.getpgrp())],
+            shell.run(cmd, log_output=False, interactive=True).stdout,
+        )
+
+    def test_terminate_all(self):
+        async def interrupt():
+            task = asyncio.create_task(shell.run_async("sleep 5", log_output=False))
+            await asyncio.sleep(0.2)
+            shell.terminate_all()
+
+            return await task
+
+        start = time.monotonic()
+        res = asyncio.run(interrupt())
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(-signal.SIGINT, res.returncode)
+
+    def test_cancel(self):
+        async def cancel():
+            task = asyncio.create_task(shell.run_async("sleep 5", log_output=False))
+            await asyncio.sleep(0.2)
+            task.cancel()
+
+            start = time.monotonic()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(cancel()), 1)
+        self.assertSetEqual(set(), shell._processes)
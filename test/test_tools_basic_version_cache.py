@@ -0,0 +1,86 @@
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts.tools.basic import shell, version_cache
+from fhir_scripts.version import Version
+
+
+class TestVersionCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.bin_dir = Path(self.tmpdir.name) / "bin"
+        self.bin_dir.mkdir()
+        self.exe = self.bin_dir / "fhirscripts-test-tool"
+        self.write_exe("1")
+
+        self.env = patch.dict(
+            os.environ,
+            {
+                "FHIR_SCRIPTS_CACHE_DIR": str(Path(self.tmpdir.name) / "cache"),
+                "PATH": str(self.bin_dir),
+            },
+        )
+        self.env.start()
+        version_cache._entries = None
+
+        self.calls = 0
+
+        @version_cache.cached("fhirscripts-test-tool")
+        def version() -> Version | None:
+            self.calls += 1
+            version = Version("1.2.3")
+            version.add_version = Version("4.5")
+            return version
+
+        self.version = version
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        version_cache._entries = None
+        shell._executables.clear()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def write_exe(self, content: str):
+        self.exe.write_text(f"#!/bin/sh\necho {content}\n")
+        self.exe.chmod(self.exe.stat().st_mode | stat.S_IEXEC)
+
+    def test_cached(self):
+        first = self.version()
+        second = self.version()
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual(first.long, second.long)
+
+    def test_persisted(self):
+        self.version()
+
+        # Simulate a new process
+        version_cache._entries = None
+        result = self.version()
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual("1.2.3 [4.5]", result.long)
+
+    def test_invalidated(self):
+        self.version()
+
+        self.write_exe("22")
+        self.version()
+
+        self.assertEqual(2, self.calls)
+
+    def test_not_found(self):
+        self.exe.unlink()
+
+        self.version()
+        self.version()
+
+        self.assertEqual(2, self.calls)
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fhir_scripts.tools import igpub
+
+OUTPUT = [
+    "FHIR IG Publisher Version 1.8.0",
+    "Load Configuration from /tmp/ig.ini",
+    "Load Content",
+    "Processing Conformance Resources",
+    "Generating Snapshots",
+    "Validating Resources",
+    "Load Content",
+    "Generating Outputs",
+    "Finished. Statistics",
+]
+
+
+class TestPhaseProgress(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"FHIR_SCRIPTS_CACHE_DIR": self.tmpdir.name})
+        self.env.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def test_phases(self):
+        progress = igpub.PhaseProgress()
+        self.assertIsNone(progress.phase)
+
+        for line in OUTPUT[:6]:
+            progress(line)
+
+        self.assertEqual("Validation", progress.phase)
+
+        # Phases only move forward
+        progress(OUTPUT[6])
+        self.assertEqual("Validation", progress.phase)
+
+        progress.close(True)
+        self.assertSetEqual(
+            {
+                "Configuration",
+                "Content",
+                "Conformance Resources",
+                "Snapshots",
+                "Validation",
+            },
+            set(progress.durations.keys()),
+        )
+
+    def test_progress_without_history(self):
+        progress = igpub.PhaseProgress()
+        progress(OUTPUT[2])
+
+        self.assertEqual((10.0, None), progress.progress())
+
+    def test_progress_with_history(self):
+        igpub._write_phases(
+            {"Configuration": 10.0, "Content": 30.0, "Validation": 60.0}
+        )
+
+        progress = igpub.PhaseProgress()
+        progress(OUTPUT[2])
+
+        with patch(
+            "time.perf_counter_ns", return_value=progress.phase_start + 20 * 10**9
+        ):
+            percent, remaining = progress.progress()
+
+        self.assertEqual(30.0, percent)
+        self.assertEqual(70.0, remaining)
+
+        # The expected duration of a phase is not exceeded
+        with patch(
+            "time.perf_counter_ns", return_value=progress.phase_start + 90 * 10**9
+        ):
+            self.assertEqual(60.0, progress.progress()[1])
+
+    def test_stored_per_project(self):
+        progress = igpub.PhaseProgress()
+        for line in OUTPUT:
+            progress(line)
+        progress.close(True)
+
+        stored = json.loads(igpub._phases_file().read_text())["phases"]
+        self.assertIn("Outputs", stored)
+
+        with (
+            tempfile.TemporaryDirectory() as other,
+            patch("pathlib.Path.cwd", return_value=Path(other)),
+        ):
+            self.assertDictEqual({}, igpub._read_phases())
+
+    def test_not_stored_on_failure(self):
+        progress = igpub.PhaseProgress()
+        progress(OUTPUT[1])
+        progress.close(False)
+
+        self.assertFalse(igpub._phases_file().exists())
@@ -0,0 +1,81 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from fhir_scripts import trace
+from fhir_scripts.tools.basic import shell
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        trace.finish()
+        self.tmpdir.cleanup()
+        return super().tearDown()
+
+    def record(self, file_name: str) -> dict:
+        target = Path(self.tmpdir.name) / file_name
+        trace.start(target)
+
+        with trace.span("build pipeline", "command"):
+            with trace.span("sushi", "step") as span:
+                span.set(skipped=False)
+                shell.run("exit 3", log_output=False)
+
+            try:
+                with trace.span("igpub", "step"):
+                    raise Exception("failed")
+
+            except Exception:
+                pass
+
+        trace.finish()
+        return json.loads(target.read_text())
+
+    def test_disabled(self):
+        with trace.span("sushi", "step"):
+            pass
+
+        self.assertFalse(trace.enabled())
+        self.assertListEqual([], trace._spans)
+
+    def test_chrome(self):
+        data = self.record("trace.json")
+        events = {e["name"]: e for e in data["traceEvents"] if e["ph"] == "X"}
+
+        self.assertSetEqual(
+            {"build pipeline", "sushi", "exit 3", "igpub"}, set(events.keys())
+        )
+        self.assertEqual(3, events["exit 3"]["args"]["exit_code"])
+        self.assertFalse(events["sushi"]["args"]["skipped"])
+        self.assertEqual("failed", events["igpub"]["args"]["error"])
+
+        # Nested spans are within their parent
+        parent, child = events["build pipeline"], events["sushi"]
+        self.assertLessEqual(parent["ts"], child["ts"])
+        self.assertGreaterEqual(
+            parent["ts"] + parent["dur"], child["ts"] + child["dur"]
+        )
+
+    def test_otlp(self):
+        data = self.record("trace.otlp.json")
+        spans = {
+            s["name"]: s for s in data["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        }
+
+        self.assertNotIn("parentSpanId", spans["build pipeline"])
+        self.assertEqual(
+            spans["build pipeline"]["spanId"], spans["sushi"]["parentSpanId"]
+        )
+        self.assertEqual(spans["sushi"]["spanId"], spans["exit 3"]["parentSpanId"])
+        self.assertEqual(1, len({s["traceId"] for s in spans.values()}))
+        self.assertEqual(trace.STATUS_ERROR, spans["igpub"]["status"]["code"])
+        self.assertIn(
+            {"key": "exit_code", "value": {"intValue": "3"}},
+            spans["exit 3"]["attributes"],
+        )
@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from fhir_scripts import update
+from fhir_scripts.tools import CAPABILITIES, Tool
+from fhir_scripts.version import Version
+
+
+class FakeTool(Tool):
+    def __init__(self, name: str, installer: str | None, tracker: dict):
+        super().__init__(name, name, name, CAPABILITIES, installer)
+
+        def update(*args, **kwargs):
+            with tracker["lock"]:
+                tracker["active"][installer] = tracker["active"].get(installer, 0) + 1
+                tracker["max"][installer] = max(
+                    tracker["max"].get(installer, 0), tracker["active"][installer]
+                )
+
+            time.sleep(0.1)
+
+            with tracker["lock"]:
+                tracker["active"][installer] -= 1
+
+            return 1024
+
+        self.module = SimpleNamespace(
+            __tool_name__=name,
+            version=lambda: Version("1.0.0"),
+            latest_version=lambda: Version("1.1.0"),
+            update=update,
+        )
+
+    def load(self):
+        return self.module
+
+
+class TestUpdate(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tracker = {"lock": threading.Lock(), "active": {}, "max": {}}
+        return super().setUp()
+
+    def test_same_installer_serialized(self):
+        tools = {
+            name: FakeTool(name, installer, self.tracker)
+            for name, installer in [
+                ("a", "python"),
+                ("b", "python"),
+                ("c", None),
+                ("d", None),
+            ]
+        }
+
+        with patch("fhir_scripts.update.get_tools", return_value=tools):
+            with patch("fhir_scripts.update.log.table") as table:
+                update.update()
+
+        self.assertEqual(1, self.tracker["max"]["python"])
+        self.assertEqual(2, self.tracker["max"][None])
+
+        header, rows = table.call_args.args
+        self.assertListEqual(["a", "b", "c", "d"], [row[0] for row in rows])
+        self.assertListEqual(["1.0 KB"] * 4, [row[2] for row in rows])
+
+    def test_dry_run(self):
+        tool = FakeTool("a", None, self.tracker)
+        tool.module.latest_version = latest = Mock(return_value=Version("1.1.0"))
+
+        with patch("fhir_scripts.update.get_tools", return_value={"a": tool}):
+            update.update(dry_run=True)
+
+        latest.assert_called_once()
+        self.assertDictEqual({}, self.tracker["max"])
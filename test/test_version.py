@@ -0,0 +1,28 @@
+import unittest
+
+from fhir_scripts.version import Version
+
+
+class TestVersionCompare(unittest.TestCase):
+
+    def test_greater(self):
+        self.assertTrue(Version("21.0.2") > Version("17"))
+        self.assertTrue(Version("1.2.4") > Version("1.2.3"))
+        self.assertTrue(Version("17.0.1") > Version("17"))
+
+    def test_not_greater(self):
+        self.assertFalse(Version("17") > Version("21.0.2"))
+        self.assertFalse(Version("1.2.3") > Version("1.2.3"))
+        self.assertFalse(Version("17") > Version("17.0.1"))
+
+    def test_numeric(self):
+        self.assertTrue(Version("17") > Version("9"))
+        self.assertTrue(Version("1.10.0") > Version("1.9.0"))
+
+    def test_greater_equal(self):
+        self.assertTrue(Version("17") >= Version("17"))
+        self.assertFalse(Version("11") >= Version("17"))
+
+    def test_unknown(self):
+        self.assertFalse(Version() > Version("1.2.3"))
+        self.assertFalse(Version("1.2.3") > Version())
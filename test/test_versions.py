@@ -0,0 +1,66 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fhir_scripts import versions
+from fhir_scripts.tools import CAPABILITIES, Tool
+from fhir_scripts.version import Version
+
+
+class FakeTool(Tool):
+    def __init__(self, name: str, version: str, latest: str, delay: float = 0):
+        super().__init__(name, name, name, CAPABILITIES)
+
+        def probe(value):
+            time.sleep(delay)
+            return Version(value)
+
+        self.module = SimpleNamespace(
+            version=lambda: probe(version), latest_version=lambda: probe(latest)
+        )
+
+    def load(self):
+        return self.module
+
+
+class TestVersions(unittest.TestCase):
+
+    def test_concurrent(self):
+        tools = {
+            name: FakeTool(name, "1.0.0", "1.0.0", delay=0.2)
+            for name in ["a", "b", "c", "d"]
+        }
+
+        start = time.monotonic()
+        with patch("fhir_scripts.versions.get_tools", return_value=tools):
+            versions.versions(outdated=True)
+
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    def test_stable_order(self):
+        tools = {
+            "slow": FakeTool("slow", "1.0.0", "1.1.0", delay=0.2),
+            "fast": FakeTool("fast", "2.0.0", "2.1.0"),
+        }
+
+        with patch("fhir_scripts.versions.get_tools", return_value=tools):
+            with patch("fhir_scripts.versions.log.info") as info:
+                versions.versions(outdated=True)
+
+        self.assertListEqual(
+            ["slow: 1.0.0 < 1.1.0", "fast: 2.0.0 < 2.1.0"],
+            [call.args[0] for call in info.call_args_list],
+        )
+
+    def test_status_only_without_outdated(self):
+        tool = FakeTool("igpub", "1.0.0", "1.0.0")
+        tool.module.status = lambda: status.append(True) or "CDS in use"
+        status = []
+
+        with patch("fhir_scripts.versions.get_tools", return_value={"igpub": tool}):
+            versions.versions(outdated=True)
+            self.assertListEqual([], status)
+
+            versions.versions()
+            self.assertListEqual([True], status)